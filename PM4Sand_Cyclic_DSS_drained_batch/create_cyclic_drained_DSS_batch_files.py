@@ -7,9 +7,26 @@ Created on Tue Jun 21 12:10:27 2022
 - File opens Template with header line info, writes parametrically varying 
   parameters underneath, writes complete contents of DSS_cyclic_drained.fis file
   sets savefile information (for *.sav in running FLAC) and closes it
+- Template and test files are read once and all drivers are written by the shared
+  generate_drivers engine in ../batch_generation/sweep_PM4SandDrivers.py
 - Each produced *.fis file is named according to the varied parameters
 - a batch_drainedDSS_vol.fis or batch_drainedDSS_MRD.fis is produced populated by call commands for each file
   generated for later being called in FLAC
+- drivers and batch file can be placed in a dedicated sweep folder (sweep_dir) and written
+  in parallel (processes); each file is written atomically and the batch file last
+- with shards > 1 the call lines are split in batch_*_shardN.fis files (written instead of
+  the batch file) balanced by estimated driver cost, for running several FLAC instances at once
+- generation is incremental: only drivers that changed are rewritten and, with resume = 1,
+  the batch files only call drivers whose txt outputs are missing, stale or truncated
+- call lines are ordered longest job first using run times learned from completed
+  runs; dry_run = 1 only reports drivers, expected wall time and disk footprint
+- thin = 1 writes thin drivers: template header and parameters plus a call to one
+  shared copy of the test body written in the sweep folder
+- adaptive = 1 (MRD only) reads the _MRD.txt files of the coarse pass and adds follow-up
+  drivers (dDSS_MRD_Dr35_ref1_Ncyc3, no _max as they run their own strain levels) only at
+  strain levels where G/Gmax or damping change fastest (see
+  ../batch_generation/adaptive_PM4SandDrivers.py); run FLAC and rerun this file for each
+  refinement round
 - As of now, placeholders for relative density (can be provided with 1 or more array values)
   number of cycles to be performed at each strain limit (degradation), and maximum strain
   to be reached by each driver
@@ -25,6 +42,12 @@ Created on Tue Jun 21 12:10:27 2022
 - CAUTION: file naming conventions intimately related to post-processing & plotting protocols
 """
 
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch_generation"))
+from   sweep_PM4SandDrivers import (generate_drivers)
+from   adaptive_PM4SandDrivers import (adaptive_mrd_design)
+
 # Input Parameters
 Soil     = ""
 TestName = "dDSS" # will match template Driver and built upon that
@@ -42,92 +65,88 @@ gamma_dict = {1:"0.0003%",2:"0.001%",3:"0.003%",4:"0.01%",5:"0.03%",6:"0.1%",7:"
 Test_File     = "DSS_cyclic_drained.fis"
 Template_File = "templ_drDSScyc.fis"
 
-# Initialize lines for final batch file
-call_line   = 'call #\n'
-batch_lines = []
-
-if volumetric  != 1:
-  for Dr_i in Dr:
-      for Ncyc_i in Ncyc:
-          for gamma_count_i in gamma_count:
-                # First create a file name 
-                BaseFile = TestName+Soil+ "_MRD" + "_Dr" +str(int(Dr_i*100))+"_Ncyc"+str(Ncyc_i)+"_max"+str(gamma_dict[gamma_count_i])
-                FileName = BaseFile+".fis"
-
-                # Create a new file and open template and test file
-                fileID 			= open(FileName,"w+");
-                Template_fileId = open(Template_File,"r");
-                Test_fileId     = open(Test_File,"r")
-
-                # Writing to a file
-                fileID.write(Template_fileId.read())
-                fileID.write("\n\n")
-
-                fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-                fileID.write("def $var_inputs\n")
-                fileID.write("\t$Dr           = " + str(Dr_i) + " \n")
-                fileID.write("\t$Ncycles      = " + str(Ncyc_i) + " \n")
-                fileID.write("\t$strain_count = " + str(gamma_count_i) + " \n")
-                fileID.write("\t$basefile     = \'" + BaseFile + "\' \n")
-                fileID.write("end \n");
-                fileID.write("$var_inputs\n\n")
-
-                fileID.write(Test_fileId.read())
-
-                fileID.write(";-------------Footer-------------------\n")
-                fileID.write(";save @$savefile\n")
-                fileID.write(";--------------------------------------\n")
-
-                # Closing the files
-                Test_fileId.close()
-                Template_fileId.close()
-                fileID.close()
-                batch_lines.append(call_line.replace("#", FileName))
-  batch_file = open("batch_drainedDSS_MRD.fis", "w")
-
+# Output options
+# sweep_dir: "" writes drivers and batch file in this folder (as before), otherwise
+#            they go into that dedicated sweep folder (created if missing)
+# processes: 1 writes drivers serially, >1 spreads writing over a pool of processes
+# shards   : >1 splits the call lines in that many batch_*_shardN.fis files of similar
+#            estimated cost, written instead of the batch file, so that one FLAC instance
+#            can run each shard concurrently
+# resume   : 1 leaves drivers whose txt outputs are already complete and newer than the
+#            driver out of the batch files (an interrupted batch resumes where it stopped),
+#            0 calls every driver; unchanged drivers are never rewritten (see *_manifest.json)
+# dry_run  : 1 writes nothing and prints the plan: drivers to write and to run, expected
+#            wall time (learned from completed runs) and disk footprint
+# thin     : 1 writes thin drivers that call one shared copy of the test body (named with
+#            its content hash, so editing the body rewrites the drivers), 0 full drivers
+# adaptive : 1 plans follow-up MRD drivers at the strain levels where the curves of the
+#            completed drivers change fastest (no effect when volumetric = 1)
+sweep_dir = ""
+processes = 1
+shards    = 1
+resume    = 1
+dry_run   = 0
+thin      = 0
+adaptive  = 0
+
+# Named sweep dimensions - first one varies slowest (same order as old nested loops)
+# Volumetric drivers are always exercised @1% (gamma_dict[8]) with a single strain limit
+if volumetric != 1:
+  dimensions     = {'Dr': Dr, 'Ncyc': Ncyc, 'gamma_count': gamma_count}
+  batch_FileName = "batch_drainedDSS_MRD.fis"
 else:
-  for Dr_i in Dr:
-      for Ncyc_i in Ncyc:
-                # First create a file name 
-                BaseFile = TestName+ Soil +"_vol"+ "_Dr"+str(int(Dr_i*100))+"_Ncyc"+str(Ncyc_i)+"_max"+str(gamma_dict[8])
-                FileName = BaseFile+".fis"
-
-                # Create a new file and open template and test file
-                fileID          = open(FileName,"w+");
-                Template_fileId = open(Template_File,"r");
-                Test_fileId     = open(Test_File,"r")
-
-                # Writing to a file
-                fileID.write(Template_fileId.read())
-                fileID.write("\n\n")
-
-                fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-                fileID.write("def $var_inputs\n")
-                fileID.write("\t$Dr           = " + str(Dr_i) + " \n")
-                fileID.write("\t$Ncycles      = " + str(Ncyc_i) + " \n")
-                fileID.write("\t$strain_count = 1                   \n")
-                fileID.write("\t$basefile     = \'" + BaseFile + "\' \n")
-                fileID.write("end \n");
-                fileID.write("$var_inputs\n\n")
-
-                fileID.write(Test_fileId.read())
-
-                fileID.write(";-------------Footer-------------------\n")
-                fileID.write(";save @$savefile\n")
-                fileID.write(";--------------------------------------\n")
-
-                # Closing the files
-                Test_fileId.close()
-                Template_fileId.close()
-                fileID.close()
-                batch_lines.append(call_line.replace("#", FileName))
-  batch_file = open("batch_drainedDSS_vol.fis", "w")
-
-
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write(";                     FLAC batch calling of input files                 \n")
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write("\n")
-batch_file.writelines(batch_lines)
-batch_file.close()
+  dimensions     = {'Dr': Dr, 'Ncyc': Ncyc}
+  batch_FileName = "batch_drainedDSS_vol.fis"
+
+# First create a file name (refinement round of adaptive follow-ups after the density; they
+# run their own strain levels, not up to gamma_dict[gamma_count], so carry no _max)
+def base_name(p):
+  if volumetric != 1:
+    if p.get('refine', 0):
+      return TestName+Soil+ "_MRD" + "_Dr" +str(int(p['Dr']*100))+"_ref"+str(p['refine'])+"_Ncyc"+str(p['Ncyc'])
+    return TestName+Soil+ "_MRD" + "_Dr" +str(int(p['Dr']*100))+"_Ncyc"+str(p['Ncyc'])+"_max"+str(gamma_dict[p['gamma_count']])
+  return TestName+ Soil +"_vol"+ "_Dr"+str(int(p['Dr']*100))+"_Ncyc"+str(p['Ncyc'])+"_max"+str(gamma_dict[8])
+
+# Parameters written in the $var_inputs block of each driver
+# (follow-ups replace the strain limits by their own levels, padded to 10 with zeros, and set
+# $strain_user = 1, undefined and so 0 in FLAC for the other drivers; names padded to the
+# width of $strain_count, as the drained drivers always were)
+def fish_inputs(p):
+  if 'levels' not in p:
+    return [('$Dr', p['Dr']), ('$Ncycles', p['Ncyc']), ('$strain_count', p.get('gamma_count', 1))]
+  gammas = p['levels'] + [0.0] * (10 - len(p['levels']))
+  return ([('$Dr', p['Dr']), ('$Ncycles', p['Ncyc']), ('$strain_count', len(p['levels'])),
+           ('$strain_user', 1)] + [('$gamma_'+str(n+1), gamma) for n, gamma in enumerate(gammas)])
+inputs_width = len('$strain_count')
+
+# Estimated run cost (used to balance shards) = dynamic time in seconds: Ncyc cycles at each
+# strain limit of DSS_cyclic_drained.fis, each lasting 1/$freq with $freq lowered above
+# 0.5% strain so that the strain rate stays under $maxRate = 0.02
+Strain_limit = [0.000003, 0.00001, 0.00003, 0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1]
+def driver_cost(p):
+  if 'levels' in p:
+    limits = p['levels']
+  elif volumetric != 1:
+    limits = Strain_limit[:p['gamma_count']]
+  else:
+    limits = [0.01]   # $1st_strain when $strain_count = 1
+  return sum(p['Ncyc'] * max(1.0, 4.0 * limit / 0.02) for limit in limits)
+
+# txt files FLAC writes for each driver and minimum number of data rows in each
+# (_MRD.txt holds one row per cycle at each strain limit)
+def outputs(p):
+  return {'_1.txt': 1, '_2.txt': 1, '_3.txt': 1, '_4.txt': 1, '_5.txt': 1,
+          '_MRD.txt': p['Ncyc'] * len(p.get('levels', [0] * p.get('gamma_count', 1)))}
+
+if __name__ == "__main__":
+    design = dimensions
+    if adaptive and volumetric != 1:
+        # follow-up names do not say which coarse pass they refine
+        if len(gamma_count) > 1:
+            sys.exit("adaptive = 1 refines one coarse pass per Dr and Ncyc: give a single gamma_count")
+        design = adaptive_mrd_design(dimensions, base_name, batch_FileName, sweep_dir)
+    generate_drivers(Template_File, Test_File, batch_FileName, design, base_name, fish_inputs,
+                     sweep_dir = sweep_dir, processes = processes, shards = shards,
+                     outputs = outputs, resume = resume, dry_run = dry_run, thin = thin,
+                     driver_cost = driver_cost, inputs_width = inputs_width)
 ''' EoF'''
\ No newline at end of file
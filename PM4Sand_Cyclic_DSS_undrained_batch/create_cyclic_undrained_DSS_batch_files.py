@@ -7,9 +7,26 @@ Created on Tue Jun 21 08:03:57 2022
 - File opens Template with header line info, writes parametrically varying 
   parameters underneath, writes complete contents of DSS_cyclic_undrained.fis file
   sets savefile information (for *.sav in running FLAC) and closes it
+- Template and test files are read once and all drivers are written by the shared
+  generate_drivers engine in ../batch_generation/sweep_PM4SandDrivers.py
 - Each produced *.fis file is named according to the varied parameters
 - a batch_undrainedDSS_cyc***.fis is produced populated by call commands for each file
   generated for later being called in FLAC
+- drivers and batch file can be placed in a dedicated sweep folder (sweep_dir) and written
+  in parallel (processes); each file is written atomically and the batch file last
+- with shards > 1 the call lines are split in batch_*_shardN.fis files (written instead of
+  the batch file) balanced by estimated driver cost, for running several FLAC instances at once
+- generation is incremental: only drivers that changed are rewritten and, with resume = 1,
+  the batch files only call drivers whose txt outputs are missing, stale or truncated
+- call lines are ordered longest job first using run times learned from completed
+  runs; dry_run = 1 only reports drivers, expected wall time and disk footprint
+- thin = 1 writes thin drivers: template header and parameters plus a call to one
+  shared copy of the test body written in the sweep folder
+- skip_N_gama = 1 has FLAC skip the continuous cycle count ($N_gama, slow FISH loops):
+  the histories keep half-cycle counts (Nhalf) and post-processing computes Ncyc
+- adaptive = 1 reads the _csrN.txt results of earlier rounds and adds follow-up drivers
+  (all 5 CSRs scaled by $CSR_scale) only for parameter sets where N = 15 is not yet
+  bracketed, see ../batch_generation/adaptive_PM4SandDrivers.py
 - As of now, placeholders for relative density, overburden stress, static shear
   stress bias, and Ko (can be provided with 1 or more array values)
 - all other variables are defined inside DSS_cyclic_undrained.fis and can be either
@@ -20,6 +37,13 @@ Created on Tue Jun 21 08:03:57 2022
 - extended by kziot June 2022
 - CAUTION: file naming conventions intimately related to post-processing & plotting protocols
 """
+import math
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch_generation"))
+from   sweep_PM4SandDrivers import (generate_drivers)
+from   adaptive_PM4SandDrivers import (adaptive_csr_design)
+
 #------------------------------------------------------------------------------
 # Input Parameters - Example
 #------------------------------------------------------------------------------
@@ -44,55 +68,74 @@ Ko       = [0.5]                      # coefficient of lateral earth pressures a
 Test_File     = "DSS_cyclic_undrained.fis"
 Template_File = "templ_uDSScyc.fis"
 
-# Initialize lines for final batch file
-call_line   = 'call #\n'
-batch_lines = []
-
-for Dr_i in Dr:
-    for sig_vc_i in sig_vc:
-        for alpha_i in alpha:
-            for Ko_i in Ko:
-                # First create a file name 
-                BaseFile = TestName + Soil+"_cyc"+"_Dr"+str(int(Dr_i*100))+"_sig"+str(sig_vc_i)+"_a"+str(alpha_i)+"_Ko"+str(Ko_i)
-                FileName = BaseFile + ".fis"
-
-                # Create a new file and open template and test file
-                fileID 			= open(FileName,"w+");
-                Template_fileId = open(Template_File,"r");
-                Test_fileId     = open(Test_File,"r")
-
-                # Writing to a file
-                fileID.write(Template_fileId.read())
-                fileID.write("\n\n")
+# Output options
+# sweep_dir: "" writes drivers and batch file in this folder (as before), otherwise
+#            they go into that dedicated sweep folder (created if missing)
+# processes: 1 writes drivers serially, >1 spreads writing over a pool of processes
+# shards   : >1 splits the call lines in that many batch_*_shardN.fis files of similar
+#            estimated cost, written instead of the batch file, so that one FLAC instance
+#            can run each shard concurrently
+# resume   : 1 leaves drivers whose txt outputs are already complete and newer than the
+#            driver out of the batch files (an interrupted batch resumes where it stopped),
+#            0 calls every driver; unchanged drivers are never rewritten (see *_manifest.json)
+# dry_run  : 1 writes nothing and prints the plan: drivers to write and to run, expected
+#            wall time (learned from completed runs) and disk footprint
+# thin     : 1 writes thin drivers that call one shared copy of the test body (named with
+#            its content hash, so editing the body rewrites the drivers), 0 full drivers
+# adaptive : 1 plans the next round from the _csrN.txt results already in sweep_dir: a
+#            follow-up driver with scaled CSRs for every parameter set whose N_to_3%_strain
+#            values do not yet bracket N = 15 (run it, then generate again for the next round)
+# skip_N_gama: 1 skips $N_gama in FLAC (solver time goes to the mechanics); the histories
+#            then hold half-cycle counts in an Nhalf column and the post-processing readers
+#            compute the same continuous Ncyc (processing_plotting/history_PM4SandDrivers.py)
+sweep_dir   = ""
+processes   = 1
+shards      = 1
+resume      = 1
+dry_run     = 0
+thin        = 0
+adaptive    = 0
+skip_N_gama = 0
 
-                fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-                fileID.write("def $var_inputs\n")
-                fileID.write("\t$Dr          = " + str(Dr_i) + " \n")
-                fileID.write("\t$static_bias = " + str(alpha_i) + " \n")
-                fileID.write("\t$confinement = " + str(sig_vc_i) + " \n")
-                fileID.write("\t$Ko          = " + str(Ko_i) + " \n")
-                fileID.write("\t$basefile    = \'" + BaseFile + "\' \n")
-                fileID.write("end \n");
-                fileID.write("$var_inputs\n\n")
+# Named sweep dimensions - first one varies slowest (same order as old nested loops)
+dimensions = {'Dr': Dr, 'sig_vc': sig_vc, 'alpha': alpha, 'Ko': Ko}
 
-                fileID.write(Test_fileId.read())
+# First create a file name 
+# (follow-ups of the adaptive design add _CSRx<scale> after the density)
+def base_name(p):
+    scale = "_CSRx"+str(p['CSR_scale']) if p.get('CSR_scale', 1.0) != 1.0 else ""
+    return TestName + Soil+"_cyc"+"_Dr"+str(int(p['Dr']*100))+scale+"_sig"+str(p['sig_vc'])+"_a"+str(p['alpha'])+"_Ko"+str(p['Ko'])
 
-                fileID.write(";-------------Footer-------------------\n")
-                fileID.write(";save @$savefile\n")
-                fileID.write(";--------------------------------------\n")
+# Parameters written in the $var_inputs block of each driver
+# ($CSR_scale only for follow-ups and $skip_N_gama only when set, so that drivers of earlier
+# sweeps are not rewritten; FLAC takes an undefined $CSR_scale as 1)
+def fish_inputs(p):
+    scale = p.get('CSR_scale', 1.0)
+    return ([('$Dr', p['Dr']), ('$static_bias', p['alpha']), ('$confinement', p['sig_vc']), ('$Ko', p['Ko'])]
+            + ([('$CSR_scale', scale)] if scale != 1.0 else []) + ([('$skip_N_gama', 1)] if skip_N_gama else []))
 
-                # Closing the files
-                Test_fileId.close()
-                Template_fileId.close()
-                fileID.close()
-                batch_lines.append(call_line.replace("#", FileName))
+# Estimated run cost (used to balance shards until runs are timed) = cycles of loading:
+# $solve stops when element 1 ($CSR_limit(1) = $CSRmid / 1.6) reaches $maxStrain or after
+# $maxCycles = 150; $CSRmid being the CRR at 15 cycles of Dr at 1 atm without bias, element 1
+# needs about 15 (CSR/CRR)^(-1/0.34) cycles, its CRR with the K_sigma of Idriss & Boulanger (2008)
+# and a rough K_alpha (static bias weakens loose and strengthens dense sand)
+def driver_cost(p):
+    N160    = min(46.0, max(2.0, 46.0 * p['Dr']**2))
+    C_sigma = min(0.3, 1.0 / (18.9 - 2.55 * math.sqrt(N160)))
+    K_sigma = min(1.1, 1.0 - C_sigma * math.log(p['sig_vc']))
+    K_alpha = max(0.5, 1.0 + p['alpha'] * (4.0 * p['Dr'] - 2.0))
+    ratio   = p.get('CSR_scale', 1.0) / 1.6 / (K_sigma * K_alpha)
+    return min(150.0, 15.0 * ratio**(-1.0 / 0.34))
 
-batch_file = open("batch_undrainedDSS_cyc.fis", "w")
+# txt files FLAC writes for each driver and minimum number of data rows in each
+outputs = {'_1.txt': 1, '_2.txt': 1, '_3.txt': 1, '_4.txt': 1, '_5.txt': 1, '_csrN.txt': 5}
 
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write(";                     FLAC batch calling of input files                 \n")
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write("\n")
-batch_file.writelines(batch_lines)
-batch_file.close()
+if __name__ == "__main__":
+    design = dimensions
+    if adaptive:
+        design = adaptive_csr_design(dimensions, base_name, "batch_undrainedDSS_cyc.fis", sweep_dir)
+    generate_drivers(Template_File, Test_File, "batch_undrainedDSS_cyc.fis", design, base_name, fish_inputs,
+                     sweep_dir = sweep_dir, processes = processes, shards = shards,
+                     outputs = outputs, resume = resume, dry_run = dry_run, thin = thin,
+                     driver_cost = driver_cost)
 ''' EoF'''
\ No newline at end of file
@@ -7,9 +7,21 @@ Created on Tue Jun 21 12:10:27 2022
 - File opens Template with header line info, writes parametrically varying 
   parameters underneath, writes complete contents of DSSmono.fis file
   sets savefile information (for *.sav in running FLAC) and closes it
+- Template and test files are read once and all drivers are written by the shared
+  generate_drivers engine in ../batch_generation/sweep_PM4SandDrivers.py
 - Each produced *.fis file is named according to the varied parameters
 - a batch_DSS_mono.fis is produced populated by call commands for each file
   generated for later being called in FLAC
+- drivers and batch file can be placed in a dedicated sweep folder (sweep_dir) and written
+  in parallel (processes); each file is written atomically and the batch file last
+- with shards > 1 the call lines are split in batch_*_shardN.fis files (written instead of
+  the batch file) balanced by estimated driver cost, for running several FLAC instances at once
+- generation is incremental: only drivers that changed are rewritten and, with resume = 1,
+  the batch files only call drivers whose txt outputs are missing, stale or truncated
+- call lines are ordered longest job first using run times learned from completed
+  runs; dry_run = 1 only reports drivers, expected wall time and disk footprint
+- thin = 1 writes thin drivers: template header and parameters plus a call to one
+  shared copy of the test body written in the sweep folder
 - As of now, placeholders for relative density (can be provided with 1 or more array values)
   and the drainage conditions have been used
 - all other variables are defined inside DSSmono.fis and can be either
@@ -19,6 +31,12 @@ Created on Tue Jun 21 12:10:27 2022
 - original file in Matlab by kziot, then modified for python by kziot
 """
 
+import math
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch_generation"))
+from   sweep_PM4SandDrivers import (generate_drivers)
+
 # Input Parameters - CHANGE HERE BETWEEN PSC and DSS
 Soil     = ""
 TestName       = "PSC_mono"              # choices now as 'PSC_mono' or 'DSS_mono' will match template Driver and built upon that
@@ -34,51 +52,59 @@ drainage = [0, 1]                # 0 for undrained, 1 for drained
 # Dictionary that matches strain array index to actual maximum strain reached in driver
 drain_dict  = {0:"u",1:"d"}
 
-# Initialize lines for final batch file
-call_line   = 'call #\n'
-batch_lines = []
-
-for drainage_i in drainage:
-  for Dr_i in Dr:
-    # First create a file name 
-    BaseFile = str(drain_dict[drainage_i]) + TestName + Soil + "_Dr" + str(int(Dr_i*100))
-    FileName = BaseFile + ".fis"
-    
-    # Create a new file and open template and test file
-    fileID 			    = open(FileName,"w+");
-    Template_fileId = open(Template_File,"r");
-    Test_fileId     = open(Test_File,"r")
-
-    # Writing to a file
-    fileID.write(Template_fileId.read())
-    fileID.write("\n\n")
+# Output options
+# sweep_dir: "" writes drivers and batch file in this folder (as before), otherwise
+#            they go into that dedicated sweep folder (created if missing)
+# processes: 1 writes drivers serially, >1 spreads writing over a pool of processes
+# shards   : >1 splits the call lines in that many batch_*_shardN.fis files of similar
+#            estimated cost, written instead of the batch file, so that one FLAC instance
+#            can run each shard concurrently
+# resume   : 1 leaves drivers whose txt outputs are already complete and newer than the
+#            driver out of the batch files (an interrupted batch resumes where it stopped),
+#            0 calls every driver; unchanged drivers are never rewritten (see *_manifest.json)
+# dry_run  : 1 writes nothing and prints the plan: drivers to write and to run, expected
+#            wall time (learned from completed runs) and disk footprint
+# thin     : 1 writes thin drivers that call one shared copy of the test body (named with
+#            its content hash, so editing the body rewrites the drivers), 0 full drivers
+sweep_dir = ""
+processes = 1
+shards    = 1
+resume    = 1
+dry_run   = 0
+thin      = 0
 
-    fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-    fileID.write("def $var_inputs\n")
-    fileID.write("\t$Dr           = " + str(Dr_i) + " \n")
-    fileID.write("\t$drained      = " + str(drainage_i) + " \n")
-    fileID.write("\t$basefile     = \'" + BaseFile + "\' \n")
-    fileID.write("end \n");
-    fileID.write("$var_inputs\n\n")
+# Named sweep dimensions - first one varies slowest (same order as old nested loops)
+dimensions = {'drainage': drainage, 'Dr': Dr}
 
-    fileID.write(Test_fileId.read())
+# First create a file name 
+def base_name(p):
+    return str(drain_dict[p['drainage']]) + TestName + Soil + "_Dr" + str(int(p['Dr']*100))
 
-    fileID.write(";-------------Footer-------------------\n")
-    fileID.write(";save @$savefile\n")
-    fileID.write(";--------------------------------------\n")
+# Parameters written in the $var_inputs block of each driver
+# (names padded to the width of $strain_count, as the monotonic drivers always were)
+def fish_inputs(p):
+    return [('$Dr', p['Dr']), ('$drained', p['drainage'])]
+inputs_width = len('$strain_count')
 
-    # Closing the files
-    Test_fileId.close()
-    Template_fileId.close()
-    fileID.close()
-    batch_lines.append(call_line.replace("#", FileName))
+# Estimated run cost (used to balance shards until runs are timed) = relative solver steps:
+# the loading lasts the same dynamic time in every driver, with a time step inversely
+# proportional to the P-wave velocity of the elements: skeleton only when drained
+# (constrained modulus 3.5 G for pois = 0.3, Vs1 = 85 (N160 + 2.5)^0.25 as in the test files),
+# plus the water bulk modulus $Kwater / porosity when undrained
+def driver_cost(p):
+    N160  = min(46.0, max(2.0, 46.0 * p['Dr']**2))
+    Vs1   = 85.0 * (N160 + 2.5)**0.25
+    void  = 0.8 - p['Dr'] * (0.8 - 0.5)
+    rho_s = 2.67 * 1000.0 / (1.0 + void) * (1.0 + void / 2.67)
+    water = 0.0 if p['drainage'] else 2.0e9 * (1.0 + void) / void / rho_s
+    return math.sqrt(3.5 * Vs1**2 + water)
 
-batch_file = open(batch_FileName, "w")   #'batch_DSS_mono.fis'
+# txt files FLAC writes for each driver and minimum number of data rows in each
+outputs = {'_1.txt': 1, '_2.txt': 1, '_3.txt': 1, '_4.txt': 1, '_5.txt': 1, '_peakPhi.txt': 5}
 
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write(";                     FLAC batch calling of input files                 \n")
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write("\n")
-batch_file.writelines(batch_lines)
-batch_file.close()
+if __name__ == "__main__":
+    generate_drivers(Template_File, Test_File, batch_FileName, dimensions, base_name, fish_inputs,
+                     sweep_dir = sweep_dir, processes = processes, shards = shards,
+                     outputs = outputs, resume = resume, dry_run = dry_run, thin = thin,
+                     driver_cost = driver_cost, inputs_width = inputs_width)
 ''' EoF'''
\ No newline at end of file
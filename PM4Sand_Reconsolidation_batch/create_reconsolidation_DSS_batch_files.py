@@ -7,9 +7,23 @@ Created on Tue Jun 21 08:03:57 2022
 - File opens Template with header line info, writes parametrically varying 
   parameters underneath, writes complete contents of DSS_reconsolidation.fis file
   sets savefile information (for *.sav in running FLAC) and closes it
+- Template and test files are read once and all drivers are written by the shared
+  generate_drivers engine in ../batch_generation/sweep_PM4SandDrivers.py
 - Each produced *.fis file is named according to the varied parameters
 - a batch_DSS_reconsol.fis is produced populated by call commands for each file
   generated for later being called in FLAC
+- drivers and batch file can be placed in a dedicated sweep folder (sweep_dir) and written
+  in parallel (processes); each file is written atomically and the batch file last
+- with shards > 1 the call lines are split in batch_*_shardN.fis files (written instead of
+  the batch file) balanced by estimated driver cost, for running several FLAC instances at once
+- generation is incremental: only drivers that changed are rewritten and, with resume = 1,
+  the batch files only call drivers whose txt outputs are missing, stale or truncated
+- call lines are ordered longest job first using run times learned from completed
+  runs; dry_run = 1 only reports drivers, expected wall time and disk footprint
+- thin = 1 writes thin drivers: template header and parameters plus a call to one
+  shared copy of the test body written in the sweep folder
+- skip_N_gama = 1 has FLAC skip the continuous cycle count ($N_gama, slow FISH loops):
+  the histories keep half-cycle counts (Nhalf) and post-processing computes Ncyc
 - As of now, placeholders for relative density, overburden stress, and static shear
   stress bias have been used
 - all other variables are defined inside DSS_reconsolidation.fis and can be either
@@ -20,6 +34,11 @@ Created on Tue Jun 21 08:03:57 2022
 - extended by kziot June 2022
 - CAUTION: file naming conventions intimately related to post-processing & plotting protocols
 """
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch_generation"))
+from   sweep_PM4SandDrivers import (generate_drivers)
+
 #------------------------------------------------------------------------------
 # Input Parameters - Example
 #------------------------------------------------------------------------------
@@ -35,53 +54,60 @@ alpha    = [0.0]                    # static shear stress bias ratio
 Test_File     = "DSS_reconsolidation.fis"
 Template_File = "templ_uDSSrec.fis"
 
-# Initialize lines for final batch file
-call_line = 'call #\n'
-batch_lines = []
-
-for Dr_i in Dr:
-    for sig_vc_i in sig_vc:
-        for alpha_i in alpha:
-            # First create a file name 
-            BaseFile = TestName + Soil+ "_rec" +"_Dr"+str(int(Dr_i*100))+"_sig"+str(sig_vc_i)+"_a"+str(alpha_i)
-            FileName = BaseFile + ".fis"
-
-            # Create a new file and open template and test file
-            fileID 			= open(FileName,"w+");
-            Template_fileId = open(Template_File,"r");
-            Test_fileId     = open(Test_File,"r")
-
-            # Writing to a file
-            fileID.write(Template_fileId.read())
-            fileID.write("\n\n")
+# Output options
+# sweep_dir: "" writes drivers and batch file in this folder (as before), otherwise
+#            they go into that dedicated sweep folder (created if missing)
+# processes: 1 writes drivers serially, >1 spreads writing over a pool of processes
+# shards   : >1 splits the call lines in that many batch_*_shardN.fis files of similar
+#            estimated cost, written instead of the batch file, so that one FLAC instance
+#            can run each shard concurrently
+# resume   : 1 leaves drivers whose txt outputs are already complete and newer than the
+#            driver out of the batch files (an interrupted batch resumes where it stopped),
+#            0 calls every driver; unchanged drivers are never rewritten (see *_manifest.json)
+# dry_run  : 1 writes nothing and prints the plan: drivers to write and to run, expected
+#            wall time (learned from completed runs) and disk footprint
+# thin     : 1 writes thin drivers that call one shared copy of the test body (named with
+#            its content hash, so editing the body rewrites the drivers), 0 full drivers
+# skip_N_gama: 1 skips $N_gama in FLAC (solver time goes to the mechanics); the histories
+#            then hold half-cycle counts in an Nhalf column and the post-processing readers
+#            compute the same continuous Ncyc (processing_plotting/history_PM4SandDrivers.py)
+sweep_dir   = ""
+processes   = 1
+shards      = 1
+resume      = 1
+dry_run     = 0
+thin        = 0
+skip_N_gama = 0
 
-            fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-            fileID.write("def $var_inputs\n")
-            fileID.write("\t$Dr          = " + str(Dr_i) + " \n")
-            fileID.write("\t$static_bias = " + str(alpha_i) + " \n")
-            fileID.write("\t$confinement = " + str(sig_vc_i) + " \n")
-            fileID.write("\t$basefile    = \'" + BaseFile + "\' \n")
-            fileID.write("end \n");
-            fileID.write("$var_inputs\n\n")
+# Named sweep dimensions - first one varies slowest (same order as old nested loops)
+dimensions = {'Dr': Dr, 'sig_vc': sig_vc, 'alpha': alpha}
 
-            fileID.write(Test_fileId.read())
+# First create a file name 
+def base_name(p):
+    return TestName + Soil+ "_rec" +"_Dr"+str(int(p['Dr']*100))+"_sig"+str(p['sig_vc'])+"_a"+str(p['alpha'])
 
-            fileID.write(";-------------Footer-------------------\n")
-            fileID.write(";save @$savefile\n")
-            fileID.write(";--------------------------------------\n")
+# Parameters written in the $var_inputs block of each driver
+# ($skip_N_gama only when set, so that drivers of earlier sweeps are not rewritten)
+def fish_inputs(p):
+    return [('$Dr', p['Dr']), ('$static_bias', p['alpha']), ('$confinement', p['sig_vc'])] + \
+           ([('$skip_N_gama', 1)] if skip_N_gama else [])
 
-            # Closing the files
-            Test_fileId.close()
-            Template_fileId.close()
-            fileID.close()
-            batch_lines.append(call_line.replace("#", FileName))
+# Estimated run cost (used to balance shards until runs are timed) = relative solver steps:
+# $solve always steps through its 1000 x 0.1 s of dynamic time (element 1 stops at
+# $Strain_stop(1) = 0.5% long before $maxCycles) plus $tbias = 1 s of static bias, with a time
+# step inversely proportional to the shear wave velocity Vs1 (sig_vc)^0.25 of the elements,
+# Vs1 = 85 (N160 + 2.5)^0.25 as in DSS_reconsolidation.fis
+def driver_cost(p):
+    N160 = min(46.0, max(2.0, 46.0 * p['Dr']**2))
+    Vs   = 85.0 * (N160 + 2.5)**0.25 * p['sig_vc']**0.25
+    return Vs * (100.0 + (1.0 if p['alpha'] else 0.0))
 
-batch_file = open("batch_DSS_reconsol.fis", "w")
+# txt files FLAC writes for each driver and minimum number of data rows in each
+outputs = {'_1.txt': 1, '_2.txt': 1, '_3.txt': 1, '_4.txt': 1, '_5.txt': 1, '_csrN.txt': 5, '_evol.txt': 6}
 
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write(";                     FLAC batch calling of input files                 \n")
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write("\n")
-batch_file.writelines(batch_lines)
-batch_file.close()
+if __name__ == "__main__":
+    generate_drivers(Template_File, Test_File, "batch_DSS_reconsol.fis", dimensions, base_name, fish_inputs,
+                     sweep_dir = sweep_dir, processes = processes, shards = shards,
+                     outputs = outputs, resume = resume, dry_run = dry_run, thin = thin,
+                     driver_cost = driver_cost)
 ''' EoF'''
\ No newline at end of file
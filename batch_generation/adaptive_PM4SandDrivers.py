@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+- Adaptive designs: the next round of drivers is planned from the txt outputs of the
+  rounds already run, so that FLAC time goes where the results are still uninformative
+- Adaptive CSR (undrained cyclic DSS): every driver applies 5 CSRs around $CSRmid
+  (/1.6, /1.3, x1, x1.3, x1.6). From the _csrN.txt files of each parameter set the
+  number of cycles to the chosen criterion is checked; when N = 15 is not bracketed by
+  enough usable points (elements failing in 1-2 cycles or never reaching the criterion
+  are not usable) a follow-up driver is planned with $CSR_scale centred on the CRR
+  estimated so far, until the set is bracketed or max_drivers is reached
+- Follow-up drivers carry the scale in their name (uDSS_cyc_Dr35_CSRx0.62_sig1_a0.0_Ko0.5)
+  before the stress token so that decode_name keeps reading density and extra info
+- Adaptive MRD (drained cyclic DSS): from the _MRD.txt files of a coarse pass over the
+  strain limits, the last cycle at each strain level gives G/Gmax and Damp of the five
+  elements. Between consecutive levels where either curve changes by more than tol
+  (G/Gmax directly, Damp relative to its largest value) a level at the geometric mean
+  strain is added; the new levels go to one follow-up driver per parameter set with
+  $strain_user = 1 and $gamma_1 ... $gamma_10, for up to max_rounds refinements
+- Follow-up MRD drivers carry the round in their name and no maximum strain, as they run
+  their own levels (dDSS_MRD_Dr35_ref1_Ncyc3)
+- the planned design is a list of parameter dictionaries handed to generate_drivers: it
+  holds all drivers of earlier rounds as well, so with resume only the new ones are called
+"""
+import math
+import os
+
+from   sweep_PM4SandDrivers import (sweep_product, manifest_name, read_manifest)
+
+#------------------------------------------------------------
+# Rows of a csrN.txt (or MRD.txt) file as {'CSR': [...], 'N_to_98%_ru': [...], ...} (None if missing)
+def read_csrN(txt_FileName):
+    try:
+        with open(txt_FileName, "r") as txt_file:
+            names = txt_file.readline().split()
+            rows  = [[float(value) for value in line.split()] for line in txt_file if line.strip()]
+    except (OSError, ValueError):
+        return None
+    return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+#------------------------------------------------------------
+# Least squares line through (log N, log CSR): returns CSR at N_target, or None when the
+# points give no decreasing CSR-N trend
+def csr_at(points, N_target):
+    if len(set(N for CSR, N in points)) < 2:
+        return None
+    x  = [math.log(N)   for CSR, N in points]
+    y  = [math.log(CSR) for CSR, N in points]
+    mx = sum(x) / len(x)
+    my = sum(y) / len(y)
+    slope = sum((xi - mx) * (yi - my) for xi, yi in zip(x, y)) / sum((xi - mx)**2 for xi in x)
+    if slope >= 0.0:
+        return None
+    return math.exp(my + slope * (math.log(N_target) - mx))
+
+# Estimate of the CSR that gives N_target cycles from all (CSR, N) rows of a parameter set.
+# usable rows have N_min < N < N_cap; without any, the estimate moves away from the
+# rows that failed too fast (N <= N_min) or never failed (N >= N_cap) by 1.6^2
+def estimate_crr(rows, N_target, N_min, N_cap, b = 0.34):
+    usable = [(CSR, N) for CSR, N in rows if N_min < N < N_cap]
+    fast   = [CSR for CSR, N in rows if N <= N_min]
+    slow   = [CSR for CSR, N in rows if N >= N_cap]
+    if usable:
+        crr = csr_at(usable, N_target)
+        if crr is not None:
+            return crr
+        CSR, N = min(usable, key = lambda point: abs(math.log(point[1] / N_target)))
+        return CSR * (N / N_target)**b
+    if fast and slow:
+        return math.sqrt(min(fast) * max(slow))
+    if fast:
+        return min(fast) / 1.6**2
+    return max(slow) * 1.6**2
+
+# N_target is bracketed when usable rows lie on both sides of it and there are at least
+# min_points of them (enough for power_fit)
+def bracketed(rows, N_target, N_min, N_cap, min_points = 3):
+    usable = [N for CSR, N in rows if N_min < N < N_cap]
+    return len(usable) >= min_points and min(usable) <= N_target <= max(usable)
+#------------------------------------------------------------
+# dimensions  = sweep of the undrained generator ({'Dr': [...], 'sig_vc': [...], ...})
+# base_name   = function(params) -> BaseFile, params['CSR_scale'] is 1.0 for the first round
+# criterion   = csrN column checked (N_to_98%_ru, N_to_1%_strain or N_to_3%_strain)
+# N_min       = N up to which elements count as failing too fast (1-2 cycles)
+# N_cap       = N from which elements count as never failing ($maxCycles of the driver)
+# max_drivers = maximum number of drivers (rounds) per parameter set
+# returns the design as a list of parameter dictionaries for generate_drivers
+def adaptive_csr_design(dimensions, base_name, batch_FileName, sweep_dir = "", results_dir = None,
+                        criterion = "N_to_3%_strain", N_target = 15.0, N_min = 2.5, N_cap = 150.0,
+                        max_drivers = 4):
+    if results_dir is None:
+        results_dir = sweep_dir
+    manifest = read_manifest(os.path.join(sweep_dir, manifest_name(batch_FileName)))
+    scales   = {}   # earlier rounds of every parameter set
+    for entry in manifest.values():
+        params = dict(entry.get('params', {}))
+        scale  = params.pop('CSR_scale', 1.0)
+        scales.setdefault(tuple(sorted(params.items())), set()).add(scale)
+
+    design  = []
+    planned = 0
+    for params in sweep_product(dimensions):
+        run     = sorted(scales.get(tuple(sorted(params.items())), set()) | {1.0})
+        rows    = []
+        waiting = False
+        for scale in run:
+            design.append(dict(params, CSR_scale = scale))
+            table = read_csrN(os.path.join(results_dir, base_name(design[-1]) + "_csrN.txt"))
+            if table is None:
+                waiting = True   # results of this round still missing
+            else:
+                rows += list(zip(table['CSR'], table[criterion]))
+        if waiting or len(run) >= max_drivers or bracketed(rows, N_target, N_min, N_cap):
+            continue
+
+        # CSRmid of the first round follows from the 3rd element of any round
+        CSRmid = table['CSR'][2] / run[-1]
+        scale  = float("{:.2g}".format(estimate_crr(rows, N_target, N_min, N_cap) / CSRmid))
+        usable = [N for CSR, N in rows if N_min < N < N_cap]
+        if any(abs(math.log(scale / done)) < 0.1 for done in run):
+            # estimate already covered: step to the side missing usable points (lower CSRs
+            # give more cycles) beyond the rounds run so far
+            above = any(N >= N_target for N in usable)
+            below = any(N <= N_target for N in usable)
+            fast  = any(N <= N_min for CSR, N in rows)
+            if (below and not above) or (above == below and fast):
+                scale = float("{:.2g}".format(min(run) / 1.3))
+            else:
+                scale = float("{:.2g}".format(max(run) * 1.3))
+        design.append(dict(params, CSR_scale = scale))
+        planned = planned + 1
+        print("{}: N = {:g} not bracketed ({} usable points), follow-up {}".format(base_name(params),
+              N_target, len(usable), base_name(design[-1])))
+    print("Adaptive CSR design: {} drivers, {} new follow-ups".format(len(design), planned))
+    return design
+#------------------------------------------------------------
+# G/Gmax and Damp of the five elements in the last cycle at each strain level of an MRD
+# table: {strain (decimal, 3 digits as written by FLAC): [G/Gmax1 ... G/Gmax5, Damp1 ... Damp5]}
+def mrd_curves(table):
+    curves = {}
+    for i, eps_xy in enumerate(table['eps_xy']):
+        level = float("{:.3g}".format(eps_xy / 100.0))
+        curves[level] = ([table['G/Gmax' + str(n)][i] for n in range(1, 6)] +
+                         [table['Damp'   + str(n)][i] for n in range(1, 6)])
+    return curves
+
+# New strain levels between consecutive levels of the curves, where G/Gmax or the
+# normalised Damp of any element changes by more than tol and the strains are more than
+# min_ratio apart; the count largest changes are kept
+def refine_levels(curves, tol, min_ratio, count):
+    levels  = sorted(curves)
+    damp    = max(max(curves[level][5:]) for level in levels) or 1.0
+    changes = []
+    for low, high in zip(levels[:-1], levels[1:]):
+        change = max([abs(b - a) for a, b in zip(curves[low][:5], curves[high][:5])] +
+                     [abs(b - a) / damp for a, b in zip(curves[low][5:], curves[high][5:])])
+        if change > tol and high / low > min_ratio:
+            changes.append((change, float("{:.3g}".format(math.sqrt(low * high)))))
+    return sorted(level for change, level in sorted(changes, reverse = True)[:count])
+#------------------------------------------------------------
+# dimensions = MRD sweep of the drained generator ({'Dr': [...], 'Ncyc': [...], 'gamma_count': [...]})
+# base_name  = function(params) -> BaseFile, params of follow-ups also hold 'refine' (round)
+#              and 'levels' (strain levels in decimal)
+# tol        = change of G/Gmax (or of Damp / max Damp) between levels that is refined
+# max_rounds = maximum number of follow-up drivers per parameter set
+# max_levels = maximum strain levels per follow-up ($gamma_1 ... $gamma_10, and the
+#              (100,5) arrays of the driver hold Ncyc cycles at each level)
+# min_ratio  = levels closer than this strain ratio are not split further
+# returns the design as a list of parameter dictionaries for generate_drivers
+def adaptive_mrd_design(dimensions, base_name, batch_FileName, sweep_dir = "", results_dir = None,
+                        tol = 0.1, max_rounds = 2, max_levels = 10, min_ratio = 1.5):
+    if results_dir is None:
+        results_dir = sweep_dir
+    manifest = read_manifest(os.path.join(sweep_dir, manifest_name(batch_FileName)))
+    rounds   = {}   # earlier follow-ups of every parameter set
+    for entry in manifest.values():
+        params = dict(entry.get('params', {}))
+        refine = params.pop('refine', 0)
+        levels = params.pop('levels', None)
+        if refine > 0:
+            rounds.setdefault(tuple(sorted(params.items())), {})[refine] = levels
+
+    design  = []
+    planned = 0
+    for params in sweep_product(dimensions):
+        run     = rounds.get(tuple(sorted(params.items())), {})
+        curves  = {}
+        waiting = False
+        for refine in [0] + sorted(run):
+            design.append(dict(params, refine = refine, levels = run[refine]) if refine else params)
+            table = read_csrN(os.path.join(results_dir, base_name(design[-1]) + "_MRD.txt"))
+            if table is None:
+                waiting = True   # results of this round still missing
+            else:
+                curves.update(mrd_curves(table))
+        if waiting or len(run) >= max_rounds:
+            continue
+
+        levels = refine_levels(curves, tol, min_ratio, min(max_levels, 10, 100 // params['Ncyc']))
+        if not levels:
+            continue
+        design.append(dict(params, refine = len(run) + 1, levels = levels))
+        planned = planned + 1
+        print("{}: {} strain levels refined, follow-up {}".format(base_name(params), len(levels),
+              base_name(design[-1])))
+    print("Adaptive MRD design: {} drivers, {} new follow-ups".format(len(design), planned))
+    return design
+''' EoF'''
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+- Run-cost model for PM4Sand drivers, learned from runs that already completed
+- The run time of a completed driver is read from its timing sidecar (BaseFile_time.json,
+  seconds) when one exists; otherwise it is inferred from the row count of its element
+  histories (rows are stored every $his_steps solution steps, so rows scale with solver
+  work) times a seconds-per-row rate taken from the gaps between output mtimes
+- Costs of new drivers are predicted from the completed drivers closest to them in the
+  sweep parameters (e.g. Dr, CSR through sig_vc/alpha, $strain_count, $Ncycles), scaling
+  the prior estimate of the generator when one is given
+- CAUTION: mtime gaps measure run time only when drivers ran one after the other; runs of
+  concurrent FLAC instances (shards) should leave timing sidecars for absolute wall times
+"""
+import json
+import math
+import os
+
+#------------------------------------------------------------
+# Timing sidecar written next to the txt outputs of a driver ({"seconds": run time}); not a
+# .txt, so that the catalog and the file lists never take it for a result file
+def timing_name(BaseFile):
+    return BaseFile + "_time.json"
+
+def read_timing(results_dir, BaseFile):
+    try:
+        with open(os.path.join(results_dir, timing_name(BaseFile)), "r") as time_file:
+            return float(json.load(time_file)['seconds'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+#------------------------------------------------------------
+# completed: list of dictionaries, one per driver with complete outputs, holding
+#            'params', 'rows' (lines of an element history), 'bytes' (size of all outputs),
+#            'start' (mtime of the driver), 'end' (latest output mtime), 'seconds' (sidecar or None)
+# Fills the missing 'seconds' with rows x median seconds-per-row observed between
+# consecutive completions and returns the completed runs that have a run time
+def infer_seconds(completed):
+    rates = []
+    last_end = None
+    for run in sorted(completed, key = lambda run: run['end']):
+        start = run['start'] if last_end is None else max(run['start'], last_end)
+        if run['seconds'] is not None:
+            rates.append(run['seconds'] / max(run['rows'], 1))
+        elif run['end'] > start:
+            rates.append((run['end'] - start) / max(run['rows'], 1))
+        last_end = run['end']
+    if not rates:
+        return [run for run in completed if run['seconds'] is not None]
+    rate = sorted(rates)[len(rates)//2]
+    for run in completed:
+        if run['seconds'] is None:
+            run['seconds'] = run['rows'] * rate
+    return completed
+#------------------------------------------------------------
+# Returns function(params) predicting value(run) for new parameter sets from the k
+# nearest completed runs (inverse distance weighted geometric mean), with each sweep
+# dimension scaled by its range among the completed runs. If prior(params) is given the
+# neighbours are compared through value/prior and the prior is scaled accordingly.
+def nearest_runs_model(runs, value, prior = None, k = 4):
+    if prior is None:
+        prior = lambda params: 1.0
+    runs  = [run for run in runs if value(run) > 0 and prior(run['params']) > 0]
+    if not runs:
+        return None
+    names = [name for name in runs[0]['params']
+             if all(isinstance(run['params'].get(name), (int, float)) for run in runs)]
+    span  = {}
+    for name in names:
+        values     = [run['params'][name] for run in runs]
+        span[name] = (max(values) - min(values)) or 1.0
+    points = [([run['params'][name] / span[name] for name in names],
+               math.log(value(run) / prior(run['params']))) for run in runs]
+
+    def predict(params):
+        x = [float(params.get(name, 0.0)) / span[name] for name in names]
+        nearest = sorted((math.dist(x, point), log_ratio) for point, log_ratio in points)[:k]
+        if nearest[0][0] == 0.0:
+            same = [log_ratio for dist, log_ratio in nearest if dist == 0.0]
+            log_ratio = sum(same) / len(same)
+        else:
+            weights   = [1.0 / dist for dist, log_ratio in nearest]
+            log_ratio = sum(w * lr for w, (dist, lr) in zip(weights, nearest)) / sum(weights)
+        return prior(params) * math.exp(log_ratio)
+    return predict
+#------------------------------------------------------------
+# Learned run time in seconds (None when nothing has completed yet)
+def learn_driver_cost(completed, prior = None, k = 4):
+    return nearest_runs_model(infer_seconds(completed), lambda run: run['seconds'], prior, k)
+
+# Learned size in bytes of all txt outputs of a driver (None when nothing has completed yet)
+def learn_output_bytes(completed, k = 4):
+    return nearest_runs_model(completed, lambda run: run['bytes'], None, k)
+#------------------------------------------------------------
+def format_seconds(seconds):
+    if seconds >= 3600:
+        return "{:.1f} h".format(seconds / 3600)
+    if seconds >= 60:
+        return "{:.1f} min".format(seconds / 60)
+    return "{:.0f} s".format(seconds)
+
+def format_bytes(size):
+    for unit in ["B", "kB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return "{:.1f} {}".format(size, unit)
+        size = size / 1024
+''' EoF'''
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+- Local job queue for PM4Sand drivers: instead of one FLAC session working through a
+  batch file, every driver it calls is a job handed to a pool of workers, each running
+  its own solver process (FLAC or the stand-in of standin_PM4SandDrivers.py)
+- the worker command is a template where {driver} is replaced by the driver file name
+  and runs in the driver folder, so the txt outputs land where FLAC would put them
+- each job goes pending -> running -> done, or failed / timeout when the process exits
+  with an error, exceeds the wall-clock timeout (it is killed) or leaves incomplete
+  outputs; failed and timed-out jobs are retried up to retries times
+- one diverging or hanging driver no longer stalls the sweep: the other workers keep
+  taking jobs in the (longest job first) order of the batch file; a driver that is missing
+  or cannot be read is marked failed and the queue goes on
+- drivers whose outputs are already complete (newer than the driver, none truncated) are
+  not rerun and keep their ledger entry, so a queue can be started again after a crash
+- outputs are checked against the time of the ledger file written when the attempt starts,
+  so the check only compares file times of the same file system (coarse mtimes included)
+- every state change is written atomically to a status ledger next to the batch file
+  (batch_undrainedDSS_cyc.fis -> batch_undrainedDSS_cyc_status.json), the output of each
+  attempt to BaseFile_run.log and the run time of every completed job to the timing
+  sidecar BaseFile_time.json read by the cost model (cost_PM4SandDrivers.py)
+- usage: python queue_PM4SandDrivers.py batch_*.fis --workers 4 --timeout 3600
+         --retries 1 --command "python ../batch_generation/standin_PM4SandDrivers.py {driver}"
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from   concurrent.futures import ThreadPoolExecutor
+
+from   sweep_PM4SandDrivers  import (write_atomic, scan_outputs)
+from   cost_PM4SandDrivers   import (timing_name, format_seconds)
+from   standin_PM4SandDrivers import (batch_drivers, read_driver, read_var_inputs,
+                                     read_output_specs)
+
+#------------------------------------------------------------
+# batch_undrainedDSS_cyc.fis -> batch_undrainedDSS_cyc_status.json
+def ledger_name(batch_FileName):
+    return os.path.splitext(batch_FileName)[0] + "_status.json"
+
+def read_ledger(ledger_FileName):
+    try:
+        with open(ledger_FileName, "r") as ledger_file:
+            return json.load(ledger_file)
+    except (OSError, ValueError):
+        return {}
+#------------------------------------------------------------
+# BaseFile and expected outputs of a driver ({suffix: 1 data row}) from its own text
+def driver_outputs(driver):
+    driver_text = read_driver(driver)
+    outputs     = {}
+    for suffix, header in read_output_specs(driver_text):
+        if suffix == "_N":
+            outputs.update({"_" + str(n) + ".txt": 1 for n in range(1, 6)})
+        else:
+            outputs[suffix] = 1
+    return read_var_inputs(driver_text)['$basefile'], outputs
+#------------------------------------------------------------
+# Job states (pending, running, done, failed, timeout) are kept in the ledger and every
+# change is written to disk at once, so that the ledger always shows the current picture;
+# returns the modification time of the ledger just written (file system clock)
+def _update(queue, FileName, **fields):
+    with queue['lock']:
+        queue['ledger'][FileName].update(fields)
+        return _save(queue)
+
+def _save(queue):
+    write_atomic(queue['ledger_FileName'], json.dumps(queue['ledger'], indent = 1, sort_keys = True))
+    return os.stat(queue['ledger_FileName']).st_mtime
+
+# One job: run the command (retrying failures), check its outputs and record the timing
+def _run_job(queue, driver, BaseFile, outputs):
+    FileName = os.path.basename(driver)
+    folder   = os.path.dirname(driver)
+    command  = [part.replace("{driver}", FileName) for part in shlex.split(queue['command'])]
+    for attempt in range(1, queue['retries'] + 2):
+        start   = time.time()
+        written = _update(queue, FileName, state = "running", attempts = attempt, start = start, end = None)
+        with open(os.path.join(folder, BaseFile + "_run.log"), "w") as log_file:
+            try:
+                returncode = subprocess.run(command, cwd = folder, stdout = log_file, stderr = subprocess.STDOUT,
+                                            timeout = queue['timeout']).returncode
+                state      = "done" if returncode == 0 else "failed"
+                message    = "" if returncode == 0 else "exit code " + str(returncode)
+            except subprocess.TimeoutExpired:
+                state, message = "timeout", "killed after " + format_seconds(queue['timeout'])
+            except OSError as error:
+                state, message = "failed", str(error)
+        seconds = time.time() - start
+        if state == "done" and scan_outputs(folder, BaseFile, written, outputs) is None:
+            state, message = "failed", "incomplete outputs"
+        _update(queue, FileName, state = state, end = time.time(), seconds = seconds, message = message)
+        if state == "done":
+            write_atomic(os.path.join(folder, timing_name(BaseFile)), json.dumps({'seconds': round(seconds, 3)}) + "\n")
+            break
+    print("{}: {} after {} attempt(s), {}".format(FileName, state, attempt, format_seconds(seconds)))
+    return state
+#------------------------------------------------------------
+# batch_FileName = batch file whose call lines are the jobs (in order of submission)
+# command        = worker command, {driver} standing for the driver file name
+# workers        = number of jobs running at once
+# timeout        = wall-clock limit of one attempt in seconds (None for no limit)
+# retries        = extra attempts for a failed or timed-out job
+# returns the ledger {FileName: {'state', 'attempts', 'start', 'end', 'seconds', 'message'}}
+def run_queue(batch_FileName, command, workers = 1, timeout = None, retries = 0):
+    drivers = batch_drivers(batch_FileName)
+    queue   = {'command': command, 'timeout': timeout, 'retries': retries, 'lock': threading.Lock(),
+               'ledger_FileName': ledger_name(batch_FileName), 'ledger': read_ledger(ledger_name(batch_FileName))}
+    jobs    = []
+    states  = []
+    skipped = 0
+    for driver in drivers:
+        FileName = os.path.basename(driver)
+        try:
+            BaseFile, outputs = driver_outputs(driver)
+            complete = scan_outputs(os.path.dirname(driver), BaseFile, os.path.getmtime(driver), outputs)
+        except (OSError, ValueError, KeyError) as error:
+            queue['ledger'][FileName] = {'state': "failed", 'attempts': 0, 'message': "driver not readable: " + str(error)}
+            print("{}: failed, driver not readable ({})".format(FileName, error))
+            states.append("failed")
+            continue
+        if complete is not None:          # finished in an earlier run: keep its entry
+            queue['ledger'].setdefault(FileName, {'attempts': 0}).update(state = "done")
+            states.append("done")
+            skipped = skipped + 1
+            continue
+        queue['ledger'][FileName] = {'state': "pending", 'attempts': 0}
+        jobs.append((driver, BaseFile, outputs))
+    _save(queue)
+
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        futures = [(driver, pool.submit(_run_job, queue, driver, BaseFile, outputs))
+                   for driver, BaseFile, outputs in jobs]
+    for driver, future in futures:
+        try:
+            states.append(future.result())
+        except Exception as error:        # one broken job never stops the queue
+            _update(queue, os.path.basename(driver), state = "failed", end = time.time(), message = str(error))
+            print("{}: failed ({})".format(os.path.basename(driver), error))
+            states.append("failed")
+    print("{}: {} jobs, {} done ({} already complete), {} failed, {} timed out".format(batch_FileName,
+          len(states), states.count("done"), skipped, states.count("failed"), states.count("timeout")))
+    return queue['ledger']
+#------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Run the drivers of FLAC batch files on a pool of workers")
+    parser.add_argument("batch_files", nargs = "+", help = "batch files with call lines")
+    parser.add_argument("--command", required = True, help = "worker command, {driver} is the driver file name")
+    parser.add_argument("--workers", default = os.cpu_count(), type = int)
+    parser.add_argument("--timeout", default = None, type = float, help = "wall-clock limit per attempt (s)")
+    parser.add_argument("--retries", default = 1, type = int)
+    args = parser.parse_args()
+
+    for batch_FileName in args.batch_files:
+        run_queue(batch_FileName, args.command, args.workers, args.timeout, args.retries)
+''' EoF'''
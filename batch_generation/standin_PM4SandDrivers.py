@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+- Local stand-in for FLAC 8.1: "runs" generated PM4Sand drivers without a FLAC licence
+  so that the generate -> run -> post-process chain can be exercised and benchmarked
+  on any machine
+- the $var_inputs block of the driver gives the parameters (Dr, confinement, static
+  bias, Ko, Ncycles, strain_count, drained) and the test body gives the outputs: every
+  $file = $basefile + '...' of the driver is written with the header line the driver
+  writes, so names and columns are exactly those FLAC produces and decode_name expects
+  (_1.._5.txt, _csrN.txt, _MRD.txt, _peakPhi.txt, _evol.txt)
+- values are synthetic but shaped like the real responses (CSR-N power law with Ksigma
+  and Kalpha trends, ru build-up, strain growth, hyperbolic G/Gmax and damping, peak
+  friction angles), so post-processing and plotting scripts run on them unchanged
+- stress-controlled cycles reverse at every half cycle as in FLAC ($Cyc_Num), and the
+  _csrN.txt counts are taken from the histories as written, the way $Liq_1 ... $Liq_3 count
+  them, so the histories and their summaries agree
+- sizes and timings are configurable: rows_per_cycle / mono_rows (or a fixed rows) set
+  the history length, seconds and seconds_per_row emulate the solve time
+- usage: python standin_PM4SandDrivers.py [options] driver.fis | batch_*.fis ...
+  (batch files are followed through their call lines)
+- CAUTION: the numbers are NOT PM4Sand results - use only for testing the pipeline
+"""
+import argparse
+import math
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+Pa           = 101300.0                          # atmospheric pressure (Pa) as in the drivers
+element_sigv = np.array([0.25, 1.0, 4.0, 16.0, 64.0])   # $sigv(1..5) of the drained and monotonic drivers
+history_fmt  = "%.6g"                            # string() of FLAC
+summary_fmt  = "%.3g"                            # fstring(..., 3) of FLAC
+
+#------------------------------------------------------------
+# Text of a driver; the shared test body called by thin drivers (call X.fis, relative to
+# the driver folder) is read in place of the call line
+def read_driver(FileName):
+    folder = os.path.dirname(os.path.abspath(FileName))
+    with open(FileName, "r") as driver_file:
+        driver_text = driver_file.read()
+
+    def expand(match):
+        shared = os.path.join(folder, match.group(1))
+        if not os.path.exists(shared):
+            return match.group(0)
+        with open(shared, "r") as shared_file:
+            return shared_file.read()
+    return re.sub(r"^[ \t]*call[ \t]+(\S+\.fis)[ \t]*$", expand, driver_text, flags = re.M | re.I)
+
+# Parameters of the $var_inputs block: {'$Dr': 0.35, '$basefile': 'uDSS_cyc_...', ...}
+def read_var_inputs(driver_text):
+    block = re.search(r"def\s+\$var_inputs\s*\n(.*?)\n\s*end\b", driver_text, re.S)
+    if block is None:
+        raise ValueError("driver has no $var_inputs block")
+    inputs = {}
+    for name, value in re.findall(r"^\s*(\$\w+)\s*=\s*(.+?)\s*$", block.group(1), re.M):
+        try:
+            inputs[name] = float(value)
+        except ValueError:
+            inputs[name] = value.strip("'")
+    return inputs
+
+# Numeric literals assigned in the driver ($maxCycles = 150, $Strain_stop(2) = 0.01, ...),
+# the last assignment wins as when FLAC executes the file top to bottom
+def read_constants(driver_text):
+    constants = {}
+    number    = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+    for name, value in re.findall(r"^[ \t]*(\$\w+(?:\(\d+\))?)\s*=\s*(" + number + r")[ \t]*(?:;.*)?$",
+                                  driver_text, re.M):
+        constants[name] = float(value)
+    return constants
+
+# Outputs of the driver in the order FLAC writes them: [(suffix, header), ...]; the five
+# element histories ($basefile + '_' + string($n) + '.txt') come back as suffix '_N'
+def read_output_specs(driver_text):
+    specs = []
+    for match in re.finditer(r"^[ \t]*\$file\s*=\s*\$basefile\s*\+\s*'([^']*)'(.*)$", driver_text, re.M):
+        header = re.compile(r"\$data\(1,1\)\s*=\s*'([^']*)'").search(driver_text, match.end())
+        suffix = "_N" if "string($n)" in match.group(2) else match.group(1)
+        specs.append((suffix, header.group(1)))
+    return specs
+#------------------------------------------------------------
+# Clean sand CRR at N = 15 cycles: Idriss & Boulanger (2008) CSRmid of the drivers with
+# Ksigma, a Kalpha that weakens loose and strengthens dense sand, and a mild Ko effect
+def crr15(Dr, sig_vc = 1.0, alpha = 0.0, Ko = 0.5):
+    N160    = min(46.0, max(2.0, 46.0 * Dr**2))
+    CSRmid  = math.exp(N160/14.1 + (N160/126)**2 - (N160/23.6)**3 + (N160/25.4)**4 - 2.8)
+    C_sigma = min(0.3, 1.0 / (18.9 - 2.55 * math.sqrt(N160)))
+    K_sigma = min(1.1, 1.0 - C_sigma * math.log(sig_vc))
+    K_alpha = max(0.5, 1.0 + alpha * (4.0 * Dr - 2.0))
+    K_o     = ((1.0 + 2.0 * Ko) / 2.0)**0.25
+    return CSRmid * K_sigma * K_alpha * K_o
+
+# $CSRmid of the drivers (times $CSR_scale when given) and the CSR of each element
+# ($CSR_limit(n) = $CSRmid [*/] factor)
+def element_csr(driver_text, Dr, scale = 0.0):
+    N160   = min(46.0, max(2.0, 46.0 * Dr**2))
+    CSRmid = math.exp(N160/14.1 + (N160/126)**2 - (N160/23.6)**3 + (N160/25.4)**4 - 2.8)
+    if scale > 0.0:
+        CSRmid = CSRmid * scale
+    csr    = [CSRmid] * 5
+    for n, op, factor in re.findall(r"\$CSR_limit\((\d)\)\s*=\s*\$CSRmid\s*(?:([*/])\s*([\d.]+))?", driver_text):
+        csr[int(n) - 1] = CSRmid * float(factor) if op == "*" else CSRmid / float(factor) if op else CSRmid
+    return np.array(csr)
+
+# Hold the values of an element once it stopped (zero velocity in FLAC)
+def hold_after(values, stop_index):
+    if stop_index is not None:
+        values[stop_index:] = values[stop_index]
+    return values
+#------------------------------------------------------------
+# Undrained cyclic DSS (and cyclic phase of reconsolidation): number of cycles of each
+# element to ru = 98%, from a power law CSR/CRR = (N/15)^-b, and strain envelopes through
+# 0.5%, 1% and 3% shear strain after it
+def cyclic_run(driver_text, inputs, constants, rng, noise):
+    Dr        = inputs['$Dr']
+    sig_vc    = inputs.get('$confinement', 1.0)
+    alpha     = inputs.get('$static_bias', 0.0)
+    Ko        = inputs.get('$Ko', 0.5)
+    csr       = element_csr(driver_text, Dr, inputs.get('$CSR_scale', 0.0))
+    N_ru      = 15.0 * (csr / crr15(Dr, sig_vc, alpha, Ko))**(-1.0 / 0.34)
+    N_ru      = N_ru * np.exp(noise * rng.standard_normal(5))
+    # peak shear strain (%) grows log-linearly through 0.5% at ru = 98%, 1% and 3%
+    N_1       = 1.1 * N_ru + 0.5
+    N_3       = 1.25 * N_ru + 1.0
+    knots     = np.column_stack([np.zeros(5), N_ru, N_1, N_3, N_3 + (N_3 - N_1) * math.log(10.0 / 3.0) / math.log(3.0)])
+    levels    = np.log10([0.02, 0.5, 1.0, 3.0, 10.0])
+    at_strain = lambda n, gamma: np.interp(math.log10(gamma * 100.0), levels, knots[n])
+    stop      = np.array([constants.get('$Strain_stop({})'.format(n), constants.get('$maxStrain', 0.075))
+                          for n in range(1, 6)])
+    N_stop    = np.array([at_strain(n, stop[n]) for n in range(5)])   # element n stops at stop(n)
+    N_end     = max(min(constants.get('$maxCycles', 150.0), float(N_stop.max())), 0.5)
+    return {'csr': csr, 'alpha': alpha, 'N_ru': N_ru, 'knots': knots, 'levels': levels,
+            'stop': stop, 'N_stop': N_stop, 'N_end': N_end, 'Dr': Dr, 'sigvo': -Pa * sig_vc}
+
+# Peak shear strain (%) of element n after N cycles
+def peak_strain(run, n, N):
+    return np.minimum(10.0**np.interp(N, run['knots'][n], run['levels']), run['stop'][n] * 100.0)
+
+# Values of a table as written with history_fmt and read back
+def as_written(table):
+    return np.array(list(map(history_fmt.__mod__, table.ravel().tolist())), dtype = "float64").reshape(table.shape)
+
+# Loading phase of the stress-controlled cycles: 0 -> +1 over the first half cycle, then a
+# reversal at every half cycle (N = 0.5, 1.0, ...), where $Cyc_Num of FLAC steps by 0.5 and
+# $N_gama, interpolating $Cyc_Num between its steps, reaches the half cycles
+def loading_phase(N):
+    return np.where(N < 0.5, np.sin(math.pi * N), np.cos(2.0 * math.pi * (N - 0.5)))
+
+# Liq_i of FLAC from a written history: half-cycle count ($Cyc_Num, 0.5 per reversal of the
+# stress ratio) at the last row before the criterion is met plus 0.5, or at the last row plus
+# 0.5 when the criterion is never met
+def cycles_to(table, met):
+    steps  = np.sign(np.diff(table[:, 1]))
+    moving = np.flatnonzero(steps)
+    count  = np.zeros(len(table))
+    count[moving[1:][steps[moving[1:]] != steps[moving[:-1]]]] = 0.5
+    count  = np.cumsum(count)
+    rows   = np.flatnonzero(met)
+    last   = rows[0] - 1 if rows.size else len(table) - 1
+    return (count[last] if last >= 0 else 0.0) + 0.5
+
+# 'Ncyc CSR shear_strain sigv/sigvc ru'
+def cyclic_histories(run, rows):
+    N       = np.linspace(0.0, run['N_end'], rows)
+    phase   = loading_phase(N)
+    columns = []
+    for n in range(5):
+        N_ru   = run['N_ru'][n]
+        gamma  = peak_strain(run, n, N)
+        bias   = run['alpha'] / (run['alpha'] + run['csr'][n])   # ratcheting under static bias
+        strain = gamma * (bias + (1.0 - bias) * phase)
+        ru     = np.minimum(0.98 * (N / N_ru)**0.6, 0.98) + 0.015 * np.abs(phase) * (N >= N_ru)
+        ratio  = run['alpha'] + run['csr'][n] * phase
+        stop   = np.flatnonzero(N >= run['N_stop'][n])
+        stop   = stop[0] if stop.size else None
+        Ncyc   = hold_after(N.copy(), stop)
+        columns.append(np.column_stack([Ncyc, hold_after(ratio, stop), hold_after(strain, stop),
+                                        hold_after(1.0 - ru, stop), hold_after(ru, stop)]))
+    return columns
+
+# 'CSR  N_to_98%_ru  N_to_1%_strain  N_to_3%_strain' or 'CSR N_to_1%_strain N_to_3%_strain N_to_5%_strain'
+# from the histories as written, as FLAC counts them ($Liq_1 ... $Liq_3)
+def csrN_table(run, header, histories):
+    met   = {'98%_ru':    lambda table: table[:, 4] >= 0.98,
+             '1%_strain': lambda table: np.abs(table[:, 2]) >= 1.0,
+             '3%_strain': lambda table: np.abs(table[:, 2]) >= 3.0,
+             '5%_strain': lambda table: np.abs(table[:, 2]) >= 5.0}
+    table = [run['csr']] + [[cycles_to(history, met[name[5:]](history)) for history in histories]
+                            for name in header.split()[1:]]
+    return np.column_stack(table)
+
+# 'Dr sigvc gamma_max(%) vol_strain(%)' after a zero row: reconsolidation strains of
+# each element after shearing to gamma_max
+def evol_table(run):
+    gamma_max = np.array([peak_strain(run, n, min(run['N_end'], run['N_stop'][n])) for n in range(5)])
+    vol       = 1.5 * (1.2 - run['Dr']) * gamma_max**0.6
+    table     = np.column_stack([np.full(5, run['Dr']), np.full(5, run['sigvo']), gamma_max, vol])
+    return np.vstack([np.zeros(4), table])
+#------------------------------------------------------------
+# Small-strain shear modulus (Pa) of each element (Vs1 from N160 as in the drivers)
+def element_gmax(Dr):
+    N160 = min(46.0, max(2.0, 46.0 * Dr**2))
+    Vs1  = 85.0 * (N160 + 2.5)**0.25
+    return 1900.0 * Vs1**2 * np.sqrt(element_sigv)
+
+# Hyperbolic backbone and reference strain (%) of each element
+def backbone(gamma, Gmax, gamma_ref):
+    return Gmax * gamma / 100.0 / (1.0 + np.abs(gamma) / gamma_ref)
+
+# Drained strain-controlled cycles: Ncycles at each $Strain_limit (first strain_count limits)
+def strain_limits(driver_text, inputs):
+    count  = int(inputs.get('$strain_count', 1))
+    limits = {}
+    for n, value in re.findall(r"\$Strain_limit\((\d+)\)\s*=\s*(\S+)", driver_text):
+        if value == "$1st_strain":
+            limits[int(n)] = 0.01 if count == 1 else 0.000003
+        elif value.startswith("$gamma_"):
+            if inputs.get('$strain_user', 0) == 1:   # levels of an adaptive MRD follow-up
+                limits[int(n)] = inputs[value]
+        else:
+            limits[int(n)] = float(value)
+    return [limits[n] for n in sorted(limits)][:count]
+
+# 'eps_xy(%) eps_yy(%) tauxy tauxy/sigvc sigv sigv/sigvc' under cyclic strain control
+# (Masing loops on a hyperbolic backbone, contraction with accumulated strain)
+def drained_histories(driver_text, inputs, rows_per_cycle, rows):
+    Dr        = inputs['$Dr']
+    Ncycles   = int(inputs.get('$Ncycles', 1))
+    limits    = strain_limits(driver_text, inputs)
+    rows      = rows or len(limits) * Ncycles * rows_per_cycle
+    t         = np.linspace(0.0, len(limits) * Ncycles, rows)
+    level     = np.minimum(t // Ncycles, len(limits) - 1).astype(int)
+    amplitude = np.array(limits)[level] * 100.0
+    tri       = 2.0 / math.pi * np.arcsin(np.sin(2.0 * math.pi * t))   # triangle wave -1..1
+    gamma     = amplitude * tri
+    loading   = np.gradient(gamma) >= 0.0
+    Gmax      = element_gmax(Dr)
+    columns   = []
+    for n in range(5):
+        gamma_ref = 0.03 * math.sqrt(element_sigv[n]) * (1.0 + Dr)
+        tau_amp   = backbone(amplitude, Gmax[n], gamma_ref)
+        tau       = np.where(loading, -tau_amp + 2.0 * backbone((gamma + amplitude) / 2.0, Gmax[n], gamma_ref),
+                                       tau_amp - 2.0 * backbone((amplitude - gamma) / 2.0, Gmax[n], gamma_ref))
+        first     = t < 0.25
+        tau[first] = backbone(gamma[first], Gmax[n], gamma_ref)
+        sigv      = Pa * element_sigv[n]
+        travel    = np.concatenate([[0.0], np.cumsum(np.abs(np.diff(gamma)))])
+        eps_yy    = 0.05 * (1.2 - Dr) * travel / (1.0 + 0.02 * travel) / math.sqrt(element_sigv[n])
+        columns.append(np.column_stack([gamma, eps_yy, tau, tau / sigv, np.full(rows, sigv), np.ones(rows)]))
+    return columns
+
+# 'eps_xy G1 G/Gmax1 Damp1 ... G5 G/Gmax5 Damp5': one row per cycle at each strain limit,
+# secant modulus in kPa and damping ratio in %
+def MRD_table(driver_text, inputs):
+    Dr      = inputs['$Dr']
+    Ncycles = int(inputs.get('$Ncycles', 1))
+    Gmax    = element_gmax(Dr)
+    table   = []
+    for limit in strain_limits(driver_text, inputs):
+        for cyc in range(1, Ncycles + 1):
+            row = [limit * 100.0]
+            for n in range(5):
+                gamma_ref = 0.03 * math.sqrt(element_sigv[n]) * (1.0 + Dr)
+                G_Gmax    = 1.0 / (1.0 + limit * 100.0 / gamma_ref) * (1.0 - 0.01 * math.log(cyc))
+                row      += [Gmax[n] * G_Gmax / 1000.0, G_Gmax, 1.0 + 30.0 * (1.0 - G_Gmax)**1.2]
+            table.append(row)
+    return np.array(table)
+#------------------------------------------------------------
+# Peak friction angle (deg) of each element: dense and low-stress elements dilate more
+def peak_phi(Dr):
+    return 30.0 + 12.0 * Dr - 2.5 * np.log(element_sigv) * Dr
+
+# Monotonic DSS 'eps_xy(%) eps_yy(%) tauxy tauxy/sigvc sigv sigv/sigvc' or
+# PSC 'e_vol(%) eps_yy(%) q p s1/s3 p/po' to the peak and on to critical state
+def monotonic_histories(header, inputs, rows):
+    Dr      = inputs['$Dr']
+    drained = inputs.get('$drained', 1.0) == 1
+    strain  = np.linspace(0.0, 10.0, rows)
+    phi_cs  = 30.0
+    columns = []
+    for n, phi_peak in enumerate(peak_phi(Dr)):
+        mobilised = np.radians(phi_cs + (phi_peak - phi_cs) * np.exp(-strain / (2.0 + 4.0 * Dr)))
+        hardening = strain / (strain + 0.05 * math.sqrt(element_sigv[n]))
+        dilation  = (Dr - 0.45) * 2.0 * np.maximum(strain - 0.5, 0.0)**0.8 - 0.2 * hardening
+        po        = Pa * element_sigv[n]
+        scale     = np.ones(rows) if drained else np.clip(1.0 + 0.3 * dilation, 0.05, None)   # undrained: stress path
+        if header.startswith("e_vol"):
+            ratio = np.tan(np.pi / 4.0 + mobilised / 2.0)**2 * hardening + (1.0 - hardening)
+            s3    = po * scale
+            p     = s3 * (ratio + 2.0) / 3.0
+            q     = s3 * (ratio - 1.0)
+            e_vol = dilation if drained else np.zeros(rows)
+            columns.append(np.column_stack([e_vol, strain, q, p, ratio, p / po]))
+        else:
+            sigv  = po * scale
+            tau   = sigv * np.tan(mobilised) * hardening
+            eps   = -dilation if drained else np.zeros(rows)
+            columns.append(np.column_stack([strain, eps, tau, tau / po, sigv, sigv / po]))
+    return columns
+
+# 'Dr sigvc peakStressRatio peakPhi': tau/sigv (DSS) or s1/s3 (PSC) at the peak
+def peakPhi_table(inputs, plane_strain):
+    Dr  = inputs['$Dr']
+    phi = peak_phi(Dr)
+    if plane_strain:
+        ratio = np.tan(np.radians(45.0 + phi / 2.0))**2
+        phi   = (np.degrees(np.arctan(np.sqrt(ratio))) - 45.0) * 2.0
+    else:
+        ratio = np.tan(np.radians(phi))
+        phi   = np.degrees(np.arctan(ratio))
+    return np.column_stack([np.full(5, Dr), element_sigv, ratio, phi])
+#------------------------------------------------------------
+def write_table(FileName, header, table, fmt):
+    np.savetxt(FileName, table, fmt = fmt, delimiter = "  ", header = header, comments = "")
+
+# Run one driver: write every output it declares next to it (or in results_dir).
+# rows_per_cycle = history rows per loading cycle, mono_rows = rows of monotonic histories,
+# rows = fixed history length overriding both, seconds + seconds_per_row x rows = time
+# spent "solving" before the outputs are written, noise = scatter of cycles to failure
+# returns the number of history rows per element
+def run_driver(FileName, results_dir = None, rows_per_cycle = 100, mono_rows = 1000, rows = None,
+               seconds = 0.0, seconds_per_row = 0.0, noise = 0.05):
+    driver_text = read_driver(FileName)
+    inputs      = read_var_inputs(driver_text)
+    constants   = read_constants(driver_text)
+    specs       = read_output_specs(driver_text)
+    BaseFile    = inputs['$basefile']
+    if results_dir is None:
+        results_dir = os.path.dirname(os.path.abspath(FileName))
+    rng         = np.random.default_rng(zlib.crc32(BaseFile.encode()))
+    suffixes    = [suffix for suffix, header in specs]
+
+    if '_MRD.txt' in suffixes:
+        histories = drained_histories(driver_text, inputs, rows_per_cycle, rows)
+    elif '_peakPhi.txt' in suffixes:
+        histories = monotonic_histories(dict(specs)['_N'], inputs, rows or mono_rows)
+    else:
+        run       = cyclic_run(driver_text, inputs, constants, rng, noise)
+        histories = cyclic_histories(run, rows or max(int(run['N_end'] * rows_per_cycle), 2))
+        histories = [as_written(table) for table in histories]
+    time.sleep(seconds + seconds_per_row * len(histories[0]))
+
+    for suffix, header in specs:
+        path = os.path.join(results_dir, BaseFile)
+        if suffix == "_N":
+            if header.startswith("Ncyc ") and inputs.get('$skip_N_gama', 0.0) == 1.0:
+                # $N_gama skipped: FLAC writes its half-cycle counts in an Nhalf column
+                header    = "Nhalf" + header[4:]
+                histories = [np.column_stack([np.floor(table[:, 0] * 2.0) / 2.0, table[:, 1:]])
+                             for table in histories]
+            for n, table in enumerate(histories):
+                write_table(path + "_" + str(n + 1) + ".txt", header, table, history_fmt)
+        elif suffix == "_csrN.txt":
+            write_table(path + suffix, header, csrN_table(run, header, histories), history_fmt)
+        elif suffix == "_evol.txt":
+            write_table(path + suffix, header, evol_table(run), history_fmt)
+        elif suffix == "_MRD.txt":
+            write_table(path + suffix, header, MRD_table(driver_text, inputs), summary_fmt)
+        elif suffix == "_peakPhi.txt":
+            write_table(path + suffix, header, peakPhi_table(inputs, dict(specs)['_N'].startswith("e_vol")),
+                        history_fmt)
+    return len(histories[0])
+
+# Drivers called by a batch file (call X.fis lines), relative to the batch file folder
+def batch_drivers(batch_FileName):
+    folder = os.path.dirname(os.path.abspath(batch_FileName))
+    with open(batch_FileName, "r") as batch_file:
+        return [os.path.join(folder, line.split()[1]) for line in batch_file
+                if line.strip().lower().startswith("call ")]
+#------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Write synthetic FLAC outputs for PM4Sand drivers")
+    parser.add_argument("files", nargs = "+", help = "drivers (*.fis) or batch files with call lines")
+    parser.add_argument("--results-dir",     default = None,  help = "output folder (default: next to each driver)")
+    parser.add_argument("--rows-per-cycle",  default = 100,   type = int)
+    parser.add_argument("--mono-rows",       default = 1000,  type = int)
+    parser.add_argument("--rows",            default = None,  type = int, help = "fixed history length")
+    parser.add_argument("--seconds",         default = 0.0,   type = float, help = "solve time per driver")
+    parser.add_argument("--seconds-per-row", default = 0.0,   type = float, help = "extra solve time per history row")
+    parser.add_argument("--noise",           default = 0.05,  type = float)
+    args = parser.parse_args()
+
+    start = time.time()
+    count = 0
+    for FileName in args.files:
+        with open(FileName, "r") as fis_file:
+            is_driver = "$var_inputs" in fis_file.read()
+        for driver in [FileName] if is_driver else batch_drivers(FileName):
+            rows  = run_driver(driver, args.results_dir, args.rows_per_cycle, args.mono_rows, args.rows,
+                               args.seconds, args.seconds_per_row, args.noise)
+            count = count + 1
+            print("{}: {} rows".format(os.path.basename(driver), rows))
+    print("{} drivers in {:.1f} s".format(count, time.time() - start))
+''' EoF'''
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+- Shared generation engine for the create_*_batch_files.py scripts in the PM4Sand* folders
+- A sweep is a dictionary of named dimensions (e.g. Dr, sig_vc, alpha, Ko, Ncyc, gamma_count)
+  each holding 1 or more array values; every combination of them produces one driver
+- Template_File and Test_File are read once per sweep, the Cartesian product is built
+  lazily and every driver is written with a single write call
+- Each generator supplies two functions: one that creates the base file name from the
+  parameters of a combination and one that lists the FISH variables of the $var_inputs block
+- Drivers can be written into a dedicated sweep folder and spread over a pool of processes;
+  every file is written to a temporary name and renamed when complete, and the batch file
+  is written last, so an interrupted generation never leaves truncated drivers to be called
+- The call lines can instead be split into several shard batch files (one per FLAC instance),
+  balanced by the estimated cost of each driver rather than by the number of drivers
+- Call lines are ordered longest job first, using run costs learned from completed runs
+  (cost_PM4SandDrivers.py), and a dry run reports the plan before anything is written
+- Thin drivers (thin = True) hold only the template header, the $var_inputs block and a
+  call to one shared copy of the test body instead of a full copy each
+- Generation is incremental: a manifest keeps a content hash (template, test body and
+  parameters) of every driver so that only changed drivers are rewritten, and the batch
+  files only call drivers whose txt outputs are missing, stale or truncated, so that an
+  interrupted batch resumes where it stopped
+- CAUTION: file naming conventions intimately related to post-processing & plotting protocols
+"""
+import glob
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+
+from   cost_PM4SandDrivers import (read_timing, learn_driver_cost, learn_output_bytes,
+                                  format_seconds, format_bytes)
+
+call_line = 'call #\n'
+footer    = (";-------------Footer-------------------\n"
+             ";save @$savefile\n"
+             ";--------------------------------------\n")
+
+#------------------------------------------------------------
+# Lazily yield one dictionary of parameter values per combination of the sweep
+# dimensions. The first dimension varies slowest, as in the original nested loops.
+# A list of parameter dictionaries (e.g. an adaptive design) is taken as it is.
+def sweep_product(dimensions):
+    if isinstance(dimensions, list):
+        for params in dimensions:
+            yield dict(params)
+        return
+    names = list(dimensions)
+    for combo in itertools.product(*[dimensions[name] for name in names]):
+        yield dict(zip(names, combo))
+#------------------------------------------------------------
+# Read template (header line info) and test body once and return the fixed text
+# placed before and after the $var_inputs block of every driver
+def read_driver_parts(Template_File, Test_File):
+    with open(Template_File, "r") as Template_fileId:
+        header = Template_fileId.read() + "\n\n"
+    with open(Test_File, "r") as Test_fileId:
+        body = Test_fileId.read()
+    return header, body + footer
+
+# Thin drivers: the test body is written once per sweep (DSS_cyclic_undrained.fis ->
+# DSS_cyclic_undrained_<8 hex digits of its hash>.fis) and each driver only calls it after
+# its $var_inputs block. Editing the body gives a new shared file name, so every driver
+# is rewritten (a few hundred bytes each) and its earlier outputs count as stale.
+# returns the shared file name, its text and the text following the $var_inputs block
+def thin_driver_parts(Test_File):
+    with open(Test_File, "r") as Test_fileId:
+        body = Test_fileId.read()
+    root   = os.path.splitext(os.path.basename(Test_File))[0]
+    shared = root + "_" + hashlib.sha256(body.encode()).hexdigest()[:8] + ".fis"
+    return shared, body, call_line.replace("#", shared) + footer
+#------------------------------------------------------------
+# fish_inputs: list of (FISH variable, value) pairs, e.g. [('$Dr', 0.35), ('$Ko', 0.5)]
+# $basefile is always appended last so that FLAC names the txt outputs after the driver
+# width = width of the variable names (None: the longest name); each line is written as
+# the generators always wrote it: tab, padded name, " = ", str(value), " "
+def inputs_block(fish_inputs, BaseFile, width = None):
+    fish_inputs = list(fish_inputs) + [('$basefile', "'" + BaseFile + "'")]
+    width = width or max(len(name) for name, value in fish_inputs)
+    lines = [";------------GENERAL INPUT CONDITIONS------------\n", "def $var_inputs\n"]
+    for name, value in fish_inputs:
+        lines.append("\t" + name.ljust(width) + " = " + str(value) + " \n")
+    lines.append("end \n")
+    lines.append("$var_inputs\n\n")
+    return "".join(lines)
+#------------------------------------------------------------
+# Write to a temporary file in the same folder and rename it once complete, so that
+# the file under its final name is either the previous version or the full new one
+# (process id in the temporary name keeps concurrent generations apart)
+def write_atomic(FileName, text):
+    tmp_name = FileName + "." + str(os.getpid()) + ".tmp"
+    try:
+        with open(tmp_name, "w") as fileID:
+            fileID.write(text)
+        os.replace(tmp_name, FileName)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+#------------------------------------------------------------
+def write_batch_file(batch_FileName, batch_lines):
+    lines = [";-----------------------------------------------------------------------\n",
+             ";                     FLAC batch calling of input files                 \n",
+             ";-----------------------------------------------------------------------\n",
+             "\n"]
+    write_atomic(batch_FileName, "".join(lines + list(batch_lines)))
+#------------------------------------------------------------
+# batch_undrainedDSS_cyc.fis -> batch_undrainedDSS_cyc_shard1.fis, ... (shard counts from 1)
+def shard_name(batch_FileName, shard):
+    root, ext = os.path.splitext(batch_FileName)
+    return root + "_shard" + str(shard + 1) + ext
+
+# Batch files of a generation: the batch file itself, or its shards (never both, which
+# would call every driver twice); those of earlier generations not among them are removed
+def replace_batch_files(sweep_dir, batch_FileName, shard_lines):
+    names = [batch_FileName] if len(shard_lines) == 1 else [shard_name(batch_FileName, shard)
+                                                            for shard in range(len(shard_lines))]
+    root, ext = os.path.splitext(os.path.join(sweep_dir, batch_FileName))
+    for FileName in [root + ext] + glob.glob(glob.escape(root) + "_shard*" + ext):
+        if os.path.basename(FileName) not in names and os.path.exists(FileName):
+            os.remove(FileName)
+    for FileName, lines in zip(names, shard_lines):
+        write_batch_file(os.path.join(sweep_dir, FileName), lines)
+    return names
+#------------------------------------------------------------
+# Split the call lines in n_shards groups of similar total cost: drivers are taken from
+# the most to the least expensive and each goes to the shard with the smallest load so
+# far (longest processing time first). Within a shard the longest jobs come first.
+# returns the list of shards (lists of call lines) and the estimated cost of each shard
+def balance_shards(batch_lines, costs, n_shards):
+    shards = [[] for shard in range(n_shards)]
+    loads  = [0.0] * n_shards
+    heap   = [(0.0, shard) for shard in range(n_shards)]
+    for i in sorted(range(len(batch_lines)), key = lambda i: -costs[i]):
+        load, shard = heapq.heappop(heap)
+        shards[shard].append(i)
+        loads[shard] = load + costs[i]
+        heapq.heappush(heap, (loads[shard], shard))
+    return [[batch_lines[i] for i in shard] for shard in shards], loads
+#------------------------------------------------------------
+# Header and body are handed once to every worker process (pool initializer) so that
+# only the short $var_inputs blocks travel with each chunk of drivers
+_driver_parts = None
+
+def _init_worker(header, body):
+    global _driver_parts
+    _driver_parts = (header, body)
+
+def _write_chunk(chunk):
+    header, body = _driver_parts
+    for FileName, block in chunk:
+        write_atomic(FileName, header + block + body)
+    return len(chunk)
+#------------------------------------------------------------
+# Manifest of a sweep: {FileName: {'hash': content hash, 'params': parameter values}},
+# stored next to its batch file (batch_undrainedDSS_cyc.fis -> batch_undrainedDSS_cyc_manifest.json)
+def manifest_name(batch_FileName):
+    return os.path.splitext(batch_FileName)[0] + "_manifest.json"
+
+def read_manifest(manifest_FileName):
+    try:
+        with open(manifest_FileName, "r") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+def write_manifest(manifest_FileName, manifest):
+    write_atomic(manifest_FileName, json.dumps(manifest, indent = 1, sort_keys = True))
+#------------------------------------------------------------
+# Hash covering template, test body and parameters of one driver. The fixed parts are
+# digested once per sweep (parts_digest) and only the $var_inputs block per driver.
+def parts_digest(header, body):
+    return hashlib.sha256((header + "\0" + body).encode()).hexdigest()
+
+def driver_hash(digest, block):
+    return hashlib.sha256((digest + "\0" + block).encode()).hexdigest()
+#------------------------------------------------------------
+# Number of lines of a txt file (a last line without newline counts as well)
+def count_lines(txt_FileName):
+    lines = 0
+    last  = b"\n"
+    with open(txt_FileName, "rb") as txt_file:
+        for block in iter(lambda: txt_file.read(1 << 20), b""):
+            lines = lines + block.count(b"\n")
+            last  = block[-1:]
+    return lines + (last != b"\n")
+
+# All drivers export five element histories of the same table size
+element_outputs = ['_1.txt', '_2.txt', '_3.txt', '_4.txt', '_5.txt']
+
+# outputs = {'_1.txt': 1, ..., '_csrN.txt': 5}: suffix of each txt file FLAC writes for a
+# driver and the minimum number of data rows below its header line. The outputs of a
+# driver are complete when they all exist, none is older than the driver, each holds
+# its minimum rows and the element histories have equal lengths (no truncated file).
+# Returns None for incomplete outputs, otherwise a record of the completed run for the
+# cost model (see cost_PM4SandDrivers.py)
+def scan_outputs(results_dir, BaseFile, driver_mtime, outputs):
+    history_lines = set()
+    size = 0
+    end  = driver_mtime
+    for suffix, min_rows in outputs.items():
+        txt_FileName = os.path.join(results_dir, BaseFile + suffix)
+        try:
+            stat = os.stat(txt_FileName)
+            if stat.st_mtime < driver_mtime:
+                return None                                   # stale: driver changed since
+            lines = count_lines(txt_FileName)
+        except OSError:
+            return None                                       # missing
+        if lines < 1 + min_rows:
+            return None                                       # truncated
+        if suffix in element_outputs:
+            history_lines.add(lines)
+        size = size + stat.st_size
+        end  = max(end, stat.st_mtime)
+    if len(history_lines) > 1:
+        return None
+    rows = max(history_lines) - 1 if history_lines else 1
+    return {'rows': rows, 'bytes': size, 'start': driver_mtime, 'end': end,
+            'seconds': read_timing(results_dir, BaseFile)}
+#------------------------------------------------------------
+# Build the drivers lazily, record (FileName, BaseFile, params, hash, size, changed) of each
+# one in drivers and yield chunks of (path, $var_inputs block) for those that must be
+# written (changed: new, edited or deleted since the manifest was saved)
+def _driver_chunks(dimensions, base_name, fish_inputs, inputs_width, sweep_dir, header, body,
+                   manifest, drivers, chunk_size):
+    digest = parts_digest(header, body)
+    chunk  = []
+    for params in sweep_product(dimensions):
+        BaseFile = base_name(params)
+        FileName = BaseFile + ".fis"
+        block    = inputs_block(fish_inputs(params), BaseFile, inputs_width)
+        content  = driver_hash(digest, block)
+        path     = os.path.join(sweep_dir, FileName)
+        changed  = manifest.get(FileName, {}).get('hash') != content or not os.path.exists(path)
+        drivers.append((FileName, BaseFile, params, content, len(header) + len(block) + len(body), changed))
+        if changed:
+            chunk.append((path, block))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+#------------------------------------------------------------
+# Completed runs of the drivers in the sweep and of earlier drivers still listed in the
+# manifest, used to learn run costs. Returns (completed runs, set of completed FileNames).
+def completed_runs(drivers, manifest, outputs, sweep_dir, results_dir):
+    known = [(FileName, BaseFile, params) for FileName, BaseFile, params, content, size, changed
+             in drivers if not changed]
+    names = set(driver[0] for driver in drivers)
+    known = known + [(FileName, FileName[:-4], entry['params']) for FileName, entry in manifest.items()
+                     if FileName not in names and 'params' in entry]
+    completed = []
+    done      = set()
+    for FileName, BaseFile, params in known:
+        expected = outputs(params) if callable(outputs) else outputs
+        try:
+            driver_mtime = os.path.getmtime(os.path.join(sweep_dir, FileName))
+        except OSError:
+            continue
+        run = scan_outputs(results_dir, BaseFile, driver_mtime, expected)
+        if run is not None:
+            run['params'] = params
+            completed.append(run)
+            done.add(FileName)
+    return completed, done
+#------------------------------------------------------------
+# Template_File  = header template (e.g. templ_uDSScyc.fis)
+# Test_File      = test body (e.g. DSS_cyclic_undrained.fis)
+# batch_FileName = batch file populated by call commands for each driver
+# dimensions     = {'Dr': [0.35, 0.55], 'sig_vc': [1, 4], ...} or a list of parameter dictionaries
+# base_name      = function(params) -> BaseFile (driver name without .fis)
+# fish_inputs    = function(params) -> [('$Dr', 0.35), ...]
+# sweep_dir      = folder receiving drivers and batch file ("" for the current folder)
+# processes      = number of worker processes writing drivers (1 writes them serially)
+# shards         = number of shard batch files (one per FLAC instance) written instead of
+#                  batch_FileName, 1 for none
+# driver_cost    = function(params) -> prior estimate of the run cost (None counts every
+#                  driver as equally expensive); scaled by what completed runs show
+# outputs        = {suffix: minimum data rows} of the txt files FLAC writes per driver (or a
+#                  function(params) returning it), looked for in results_dir (defaults
+#                  to sweep_dir); needed to learn run costs and to resume
+# resume         = leave drivers whose outputs are already complete out of the batch files
+# dry_run        = only report the plan (drivers, expected wall time, disk footprint)
+# thin           = write thin drivers calling one shared copy of Test_File in sweep_dir
+# inputs_width   = width of the variable names in the $var_inputs block (None: the longest)
+# Call lines are ordered longest job first in the batch file and in every shard.
+# returns the list of call lines of the drivers to run
+# CAUTION: with processes > 1 the calling script must guard its call with
+#          if __name__ == "__main__": (required by multiprocessing on Windows)
+
+def generate_drivers(Template_File, Test_File, batch_FileName, dimensions, base_name, fish_inputs,
+                     sweep_dir = "", processes = 1, shards = 1, driver_cost = None,
+                     outputs = None, results_dir = None, resume = True, dry_run = False,
+                     thin = False, inputs_width = None, chunk_size = 256):
+    header, body = read_driver_parts(Template_File, Test_File)
+    if sweep_dir and not dry_run:
+        os.makedirs(sweep_dir, exist_ok = True)
+    if thin:
+        shared_FileName, shared_body, body = thin_driver_parts(Test_File)
+        if not dry_run and not os.path.exists(os.path.join(sweep_dir, shared_FileName)):
+            write_atomic(os.path.join(sweep_dir, shared_FileName), shared_body)
+    if results_dir is None:
+        results_dir = sweep_dir
+
+    # Only drivers whose content hash changed since the last generation are rewritten
+    manifest_FileName = os.path.join(sweep_dir, manifest_name(batch_FileName))
+    manifest = read_manifest(manifest_FileName)
+    drivers  = []
+    chunks   = _driver_chunks(dimensions, base_name, fish_inputs, inputs_width, sweep_dir, header,
+                              body, manifest, drivers, chunk_size)
+    if dry_run:
+        for chunk in chunks:
+            pass
+    elif processes > 1:
+        with multiprocessing.Pool(processes, _init_worker, (header, body)) as pool:
+            for n in pool.imap_unordered(_write_chunk, chunks):
+                pass
+    else:
+        _init_worker(header, body)
+        for chunk in chunks:
+            _write_chunk(chunk)
+    if not dry_run:
+        write_manifest(manifest_FileName, {FileName: {'hash': content, 'params': params}
+                       for FileName, BaseFile, params, content, size, changed in drivers})
+
+    # Costs learned from completed runs (falling back to the prior estimate)
+    completed, done = [], set()
+    if outputs:
+        completed, done = completed_runs(drivers, manifest, outputs, sweep_dir, results_dir)
+    learned_cost = learn_driver_cost(completed, driver_cost)
+    cost = learned_cost or driver_cost or (lambda params: 1.0)
+
+    # Drivers still to be run, longest job first: all of them, or those without complete
+    # and fresh outputs (changed drivers always run again)
+    pending = [(call_line.replace("#", FileName), cost(params), params)
+               for FileName, BaseFile, params, content, size, changed in drivers
+               if not (resume and FileName in done)]
+    pending.sort(key = lambda job: -job[1])
+    batch_lines = [line for line, job_cost, params in pending]
+    costs       = [job_cost for line, job_cost, params in pending]
+    shard_lines, loads = balance_shards(batch_lines, costs, max(shards, 1))
+
+    if dry_run:
+        report_plan(batch_FileName, drivers, pending, loads, learned_cost, learn_output_bytes(completed))
+        return batch_lines
+    print("{}: {} drivers in sweep, {} written, {} to run".format(batch_FileName, len(drivers),
+          sum(changed for *driver, changed in drivers), len(batch_lines)))
+
+    # Batch files go last: they only ever call drivers that are completely written
+    names = replace_batch_files(sweep_dir, batch_FileName, shard_lines)
+    if shards > 1:
+        for shard_FileName, lines, load in zip(names, shard_lines, loads):
+            print("{}: {} drivers, estimated cost {}".format(shard_FileName, len(lines),
+                  format_seconds(load) if learned_cost else "{:.1f}".format(load)))
+    return batch_lines
+#------------------------------------------------------------
+# Dry-run planner: what a generation would write and how long the FLAC runs should take
+def report_plan(batch_FileName, drivers, pending, loads, learned_cost, learned_bytes):
+    to_write = [size for FileName, BaseFile, params, content, size, changed in drivers if changed]
+    print("Plan for {} (dry run - nothing written)".format(batch_FileName))
+    print("  drivers in sweep   : {}".format(len(drivers)))
+    print("  drivers to write   : {} ({})".format(len(to_write), format_bytes(sum(to_write))))
+    print("  drivers to run     : {}".format(len(pending)))
+    if learned_cost:
+        total = sum(job_cost for line, job_cost, params in pending)
+        print("  expected wall time : {} in one FLAC session".format(format_seconds(total)))
+        if len(loads) > 1:
+            print("                       {} over {} shards".format(format_seconds(max(loads)), len(loads)))
+    else:
+        print("  expected wall time : unknown (no completed runs to learn from)")
+    if learned_bytes:
+        total = sum(learned_bytes(params) for line, job_cost, params in pending)
+        print("  expected outputs   : {}".format(format_bytes(total)))
+    else:
+        print("  expected outputs   : unknown (no completed runs to learn from)")
+''' EoF'''
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+- processing_plotting as an importable package: the post-processing functions of the
+  *_PM4SandDrivers.py modules are attributes of the package, e.g.
+    import processing_plotting as pp
+    pp.refresh_catalog(pp.open_catalog(results_dir, refresh = False), results_dir)
+    pp.csrN_table(results_dir)
+- importing the package loads nothing else: each function imports its module on first
+  access, and the modules import numpy, pandas and scipy only where they need them, so
+  headless jobs (catalog refresh, CSR - N tables) never import matplotlib
+- the figures of the plotting_all_*.py scripts are functions of the results folder returning
+  the figure (pp.fig4_6(results_dir), ...); matplotlib is imported when the first one is
+  accessed. Build and save them inside plt.style.context(pp.figure_style)
+- the modules import each other by file name (as when the scripts run from this folder),
+  so the folder is put on sys.path once
+- python -m processing_plotting runs the headless jobs from a shell (--help for the list)
+"""
+import importlib
+import os
+import sys
+
+_folder = os.path.dirname(os.path.abspath(__file__))
+if _folder not in sys.path:
+    sys.path.append(_folder)
+
+_functions = {'decode_PM4SandDrivers':  ['power_fit', 'decode_file', 'decode_name', 'file_index', 'create_file_list',
+                                         'figure_style'],
+              'catalog_PM4SandDrivers': ['open_catalog', 'refresh_catalog', 'catalog_files', 'results_index'],
+              'cache_PM4SandDrivers':   ['read_txt', 'load_txt', 'clear_loaded'],
+              'history_PM4SandDrivers': ['parse_history', 'read_history', 'decimate', 'iter_history',
+                                         'first_crossing', 'read_to_cycle'],
+              'dataset_PM4SandDrivers': ['sweep_dataset', 'select', 'histories', 'csrN_table'],
+              'triggering_PM4SandDrivers': ['power_fits', 'fit_curve', 'triggering_table'],
+              'loops_PM4SandDrivers':   ['cycle_loops', 'loop_table', 'mrd_table'],
+              'failure_PM4SandDrivers': ['first_crossings', 'failure_table'],
+              'plotting_all_undrained_cyclic_DSS': ['fig4_2', 'fig4_3', 'fig4_4', 'fig4_5', 'fig4_6', 'fig4_7',
+                                                    'fig4_8', 'fig4_9', 'fig4_10', 'fig4_11'],
+              'plotting_all_monotonic':            ['fig4_12', 'fig4_13', 'fig4_14', 'fig4_15', 'fig4_16'],
+              'plotting_all_drained_cyclic_DSS':   ['fig4_17', 'fig4_18', 'fig4_19', 'fig4_20'],
+              'plotting_all_reconsolidation':      ['fig4_21']}
+_modules   = {name: module for module, names in _functions.items() for name in names}
+
+#------------------------------------------------------------
+# Function of the package, its module imported on first access
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError("module 'processing_plotting' has no attribute " + repr(name))
+    return getattr(importlib.import_module(_modules[name]), name)
+
+def __dir__():
+    return sorted(list(globals()) + list(_modules))
+
+__all__ = sorted(_modules)
+''' EoF'''
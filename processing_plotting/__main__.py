@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+- headless post-processing jobs, no figure rendered:
+    python -m processing_plotting refresh ./PM4Sand_Cyclic_DSS_undrained_batch [--full]
+    python -m processing_plotting csrN ./PM4Sand_Cyclic_DSS_undrained_batch [--sweep s] [--out table.csv]
+    python -m processing_plotting triggering ./PM4Sand_Cyclic_DSS_undrained_batch [--sweep s] [--out table.csv]
+    python -m processing_plotting failure ./PM4Sand_Cyclic_DSS_undrained_batch --criterion N_to_90%_ru ru ">=" 0.9
+        [--criterion N_to_5%_DA "DA(shear_strain)" ">=" 5] [--half-cycles] [--triggering] [--sweep s] [--out table.csv]
+- figures of the plotting_all_*.py scripts saved (not shown) as Fig4-6.png, ... in --out-dir:
+    python -m processing_plotting figure fig4_6 fig4_7 ./PM4Sand_Cyclic_DSS_undrained_batch [--sweep s] [--out-dir .]
+"""
+import argparse
+import os
+
+import processing_plotting as pp   # functions (and their modules) loaded on first use
+
+#------------------------------------------------------------
+if __name__ == "__main__":
+    parser   = argparse.ArgumentParser(prog = "python -m processing_plotting",
+                                       description = "Headless post-processing of PM4Sand driver results")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    refresh  = commands.add_parser("refresh", help = "refresh the results catalog of folders")
+    refresh.add_argument("results_dirs", nargs = "+")
+    refresh.add_argument("--full", action = "store_true", help = "re-read every file")
+    for command, text in [("csrN", "CSR - N points of a sweep as one table"),
+                          ("triggering", "CRR at 15 cycles, K_sigma, K_alpha and K_o of a sweep")]:
+        table = commands.add_parser(command, help = text)
+        table.add_argument("results_dir")
+        table.add_argument("--sweep", default = "")
+        table.add_argument("--out", default = None, help = "csv file (printed if not given)")
+    failure  = commands.add_parser("failure", help = "CSR - N points of a sweep for user-defined criteria")
+    failure.add_argument("results_dir")
+    failure.add_argument("--criterion", nargs = 4, action = "append", metavar = ("NAME", "MEASURE", "OPERATOR", "LEVEL"),
+                         help = "e.g. N_to_90%%_ru ru '>=' 0.9 (repeat for more; the FLAC criteria if not given)")
+    failure.add_argument("--half-cycles", action = "store_true", help = "count half cycles as FLAC does")
+    failure.add_argument("--triggering", action = "store_true", help = "CRR, K_sigma, K_alpha and K_o instead of the points")
+    failure.add_argument("--sweep", default = "")
+    failure.add_argument("--out", default = None, help = "csv file (printed if not given)")
+    figure   = commands.add_parser("figure", help = "save figures of the PM4Sand manual from a results folder")
+    figure.add_argument("figures", nargs = "+", choices = [name for name in pp.__all__ if name.startswith("fig")],
+                        metavar = "figure", help = "fig4_2 ... fig4_21")
+    figure.add_argument("results_dir")
+    figure.add_argument("--sweep", default = "")
+    figure.add_argument("--out-dir", default = ".")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        for results_dir in args.results_dirs:
+            connection = pp.open_catalog(results_dir, refresh = False)
+            print("{}: {} folders scanned, {} drivers changed".format(
+                  results_dir, *pp.refresh_catalog(connection, results_dir, args.full)))
+            connection.close()
+    if args.command in ["csrN", "triggering"]:
+        table = pp.csrN_table(args.results_dir, args.sweep)
+        if args.command == "triggering":
+            table = pp.triggering_table(table)
+    if args.command == "failure":
+        criteria = {name: (measure, operator, float(level)) for name, measure, operator, level in args.criterion or []}
+        options  = {'criteria': criteria} if criteria else {}   # the FLAC criteria by default
+        table    = pp.failure_table(args.results_dir, sweep = args.sweep, half_cycles = args.half_cycles, **options)
+        if args.triggering:
+            table = pp.triggering_table(table, criteria = [column for column in table.columns if column != 'CSR'])
+    if args.command in ["csrN", "triggering", "failure"]:
+        if args.out:
+            table.to_csv(args.out)
+        else:
+            print(table.to_string())
+    if args.command == "figure":
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        # the style is read when the figure is drawn too, so it wraps the savefig
+        for name in args.figures:
+            with plt.style.context(pp.figure_style):
+                fig = getattr(pp, name)(args.results_dir, sweep = args.sweep)
+                fig.savefig(os.path.join(args.out_dir, "Fig" + name[3:].replace("_", "-") + ".png"),
+                            dpi = 600, bbox_inches = 'tight')
+            plt.close(fig)
+''' EoF'''
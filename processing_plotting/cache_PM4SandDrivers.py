@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+- Columnar binary cache of the FLAC-produced txt files: the first read of a txt file
+  parses it once and stores its columns as one .npy array (a row per column, so that
+  every column is contiguous on disk) in a __npycache__ folder next to it, with the
+  column names and the size and mtime of the source in a .json sidecar
+- later reads memory-map the .npy file and only touch the columns asked for; an entry is
+  rebuilt when the size or mtime of its txt file changed (driver rerun), so a figure
+  script rerun after a styling tweak no longer reparses the text of every history
+- read_txt stands in for pd.read_table(file, header = 0, delim_whitespace = True,
+  usecols = ...) and returns the same DataFrame (columns in file order); entries are built
+  with the vectorized parser of history_PM4SandDrivers.py and decimation (stride, first)
+  slices the memory-mapped columns
+- files holding non-numeric values are read from the text every time (nothing cached)
+- the cache only mirrors the txt files: deleting __npycache__ folders is always safe
+- load_txt adds a session-wide memo in front of read_txt: the DataFrames read in a Python
+  session are kept, most recently used first, up to load_budget bytes and keyed by path,
+  size and mtime of the file and the requested columns and decimation, so the figures of
+  one script (or of all plotting scripts run in one process) parse each file once; each
+  call returns a copy, so figures may modify their DataFrame
+"""
+import json
+import os
+from   collections import OrderedDict
+import numpy  as np
+import pandas as pd
+
+from   history_PM4SandDrivers import (parse_history, stride_rows)
+
+load_budget = 512 * 2**20   # bytes of DataFrames kept by load_txt
+_loaded     = OrderedDict() # key -> (DataFrame, bytes), least recently used first
+_paths      = {}            # path -> keys of _loaded for that path
+_used       = 0             # bytes of the DataFrames in _loaded
+
+#------------------------------------------------------------
+# results/uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_3.txt -> results/__npycache__/uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_3.npy
+def cache_name(txt_FileName):
+    folder, name = os.path.split(txt_FileName)
+    return os.path.join(folder, "__npycache__", os.path.splitext(name)[0] + ".npy")
+
+# Write through a temporary file renamed once complete (concurrent scripts never see
+# half-written entries)
+def _save_atomic(FileName, save):
+    temp_FileName = FileName + "." + str(os.getpid()) + ".tmp"
+    with open(temp_FileName, "wb") as temp_file:
+        save(temp_file)
+    os.replace(temp_FileName, FileName)
+#------------------------------------------------------------
+# Column names and memory-mapped (columns x rows) array of a txt file, built on first
+# access and whenever the source size or mtime no longer matches the cached entry
+def cached_columns(txt_FileName):
+    stat          = os.stat(txt_FileName)
+    source        = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    npy_FileName  = cache_name(txt_FileName)
+    json_FileName = os.path.splitext(npy_FileName)[0] + ".json"
+    try:
+        with open(json_FileName, "r") as json_file:
+            entry = json.load(json_file)
+        if entry['source'] == source:
+            return entry['columns'], np.load(npy_FileName, mmap_mode = "r")
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        columns, data = parse_history(txt_FileName)
+    except ValueError:
+        return None, None   # not numeric: not cached
+    data = np.ascontiguousarray(data.T)
+    os.makedirs(os.path.dirname(npy_FileName), exist_ok = True)
+    _save_atomic(npy_FileName, lambda npy_file: np.save(npy_file, data))
+    _save_atomic(json_FileName, lambda json_file: json_file.write(
+                 json.dumps({'source': source, 'columns': columns}).encode()))
+    return columns, np.load(npy_FileName, mmap_mode = "r")
+
+# txt_FileName = FLAC-produced txt file (header line of column names, whitespace separated)
+# usecols      = columns to return (None for all), in the order of the file
+# stride       = keep every stride-th row after the first ones (1 keeps all rows):
+#                stride = skip for skiprows=lambda x: x > 3 and x % skip, and stride = numCyc,
+#                first = 0 for skiprows=lambda x: x % numCyc
+# first        = number of leading rows always kept
+def read_txt(txt_FileName, usecols = None, stride = 1, first = 3):
+    columns, data = cached_columns(txt_FileName)
+    if data is None:
+        df = pd.read_csv(txt_FileName, sep = r"\s+", header = 0, usecols = usecols)
+        return df.iloc[stride_rows(len(df), stride, first)]
+    rows = stride_rows(data.shape[1], stride, first)
+    return pd.DataFrame({name: data[i][rows] for i, name in enumerate(columns)
+                         if usecols is None or name in usecols})
+#------------------------------------------------------------
+# Memoized read_txt (same arguments): a DataFrame read before in the session is returned
+# from memory unless its file changed on disk; the least recently used ones are dropped
+# once the kept DataFrames exceed load_budget bytes (a running total, so a call costs the
+# same however many DataFrames are kept)
+def load_txt(txt_FileName, usecols = None, stride = 1, first = 3):
+    global _used
+    stat = os.stat(txt_FileName)
+    key  = (os.path.abspath(txt_FileName), stat.st_size, stat.st_mtime_ns,
+            None if usecols is None else tuple(usecols), stride, first)
+    if key in _loaded:
+        _loaded.move_to_end(key)
+        return _loaded[key][0].copy()
+    df = read_txt(txt_FileName, usecols, stride, first)
+    for old in [old for old in _paths.get(key[0], ()) if old[1:3] != key[1:3]]:
+        _forget(old)   # file rewritten since
+    _loaded[key] = (df, int(df.memory_usage(index = False).sum()))
+    _paths.setdefault(key[0], set()).add(key)
+    _used = _used + _loaded[key][1]
+    while _used > load_budget and len(_loaded) > 1:
+        _forget(next(iter(_loaded)))
+    return df.copy()
+
+# Drop one DataFrame from the memo of load_txt
+def _forget(key):
+    global _used
+    _used = _used - _loaded.pop(key)[1]
+    _paths[key[0]].discard(key)
+    if not _paths[key[0]]:
+        del _paths[key[0]]
+
+# Empty the memo of load_txt
+def clear_loaded():
+    global _used
+    _loaded.clear()
+    _paths.clear()
+    _used = 0
+''' EoF'''
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+- Persistent catalog of the FLAC-produced txt files of a results folder, kept in an SQLite
+  file inside it (results_catalog.sqlite): one row per result file with the parameters
+  decoded from its name (decode_file), size, mtime, number of data rows and completion
+- sub-folders (sweep folders of the generators, sweep_dir) are catalogued as well, each
+  row carrying the sweep it belongs to ("" for the results folder itself); folders named
+  __*__ (e.g. __npycache__ of cache_PM4SandDrivers.py) are left out
+- refresh is incremental: a folder whose mtime did not change since the last refresh is
+  not listed again (one stat per folder), and in changed folders only files with a new
+  size or mtime are re-read. Files rewritten in place without any file being added,
+  removed or renamed in their folder (FLAC rerunning a driver outside the queue) are
+  picked up with full = 1
+- the catalog keeps its rollback journal in memory (no journal file appears next to the
+  results, which would change the folder mtime); it only caches what the files hold and
+  is rebuilt by deleting it
+- a file counts as complete when it has data rows and, for the element histories
+  (_1.txt ... _5.txt), as many rows as the longest history of its driver
+- catalog_files returns the paths matching an SQL condition over the columns of the
+  catalog, over one or several results folders; open_catalog gives the connection itself
+  for ad-hoc queries, e.g.
+    SELECT sweep, Dr, sig, COUNT(*) FROM files WHERE goal = 'cyc' AND output = 'csrN' GROUP BY sweep, Dr, sig
+- results_index gives the file_index of the files of one sweep of a folder, the index the
+  figure functions query with create_file_list; it is built once per (results_dir, sweep)
+  and rebuilt only when the catalog lists other files
+"""
+import os
+import sqlite3
+
+from   decode_PM4SandDrivers import (decode_file, file_index)
+
+_columns = ['sweep', 'file', 'name', 'driver', 'soil', 'goal', 'drainage', 'Dr', 'sig', 'alpha', 'Ko',
+            'Ncyc', 'max_strain', 'CSR_scale', 'refine', 'output', 'size', 'mtime', 'rows', 'complete']
+
+_schema = """
+CREATE TABLE IF NOT EXISTS files (sweep TEXT, file TEXT, name TEXT, driver TEXT, soil TEXT, goal TEXT,
+    drainage TEXT, Dr INTEGER, sig REAL, alpha REAL, Ko REAL, Ncyc INTEGER, max_strain REAL,
+    CSR_scale REAL, refine INTEGER, output TEXT, size INTEGER, mtime INTEGER, rows INTEGER,
+    complete INTEGER, PRIMARY KEY (sweep, file));
+CREATE INDEX IF NOT EXISTS files_params ON files (goal, Dr, output);
+CREATE INDEX IF NOT EXISTS files_driver ON files (sweep, name);
+CREATE TABLE IF NOT EXISTS folders (sweep TEXT PRIMARY KEY, parent TEXT, mtime INTEGER);
+"""
+
+#------------------------------------------------------------
+# results_dir -> results_dir/results_catalog.sqlite
+def catalog_name(results_dir):
+    return os.path.join(results_dir, "results_catalog.sqlite")
+
+# Number of data rows below the header line (a last line without newline counts as well)
+def _count_rows(txt_FileName):
+    lines = 0
+    last  = b"\n"
+    with open(txt_FileName, "rb") as txt_file:
+        for block in iter(lambda: txt_file.read(1 << 20), b""):
+            lines = lines + block.count(b"\n")
+            last  = block[-1:]
+    return max(0, lines + (last != b"\n") - 1)
+#------------------------------------------------------------
+# Re-read the changed txt files of one folder, drop the rows of removed ones and return
+# the sub-folders found in it and the drivers (BaseFiles) whose files changed
+def _scan_folder(connection, results_dir, sweep, full):
+    known   = {file: (size, mtime) for file, size, mtime in
+               connection.execute("SELECT file, size, mtime FROM files WHERE sweep = ?", (sweep,))}
+    folders = []
+    names   = set()
+    with os.scandir(os.path.join(results_dir, sweep)) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.name.startswith("__"):   # __npycache__, __pycache__
+                    folders.append(os.path.join(sweep, entry.name))
+                continue
+            if not entry.name.endswith(".txt"):
+                continue
+            info = decode_file(entry.name)
+            if info is None:
+                continue
+            stat  = entry.stat()
+            state = known.pop(entry.name, None)
+            if state == (stat.st_size, stat.st_mtime_ns) and not full:
+                continue
+            try:
+                rows = _count_rows(entry.path)
+            except OSError:
+                continue
+            connection.execute("INSERT OR REPLACE INTO files VALUES (" + ", ".join("?" * len(_columns)) + ")",
+                               (sweep, entry.name) + tuple(info)[1:] + (stat.st_size, stat.st_mtime_ns, rows, 0))
+            names.add(info.name)
+    for file in known:   # removed since the last refresh
+        connection.execute("DELETE FROM files WHERE sweep = ? AND file = ?", (sweep, file))
+        names.add(decode_file(file).name)
+    return folders, [(sweep, name) for name in names]
+
+# Completion of the files of the changed drivers
+def _update_complete(connection, drivers):
+    for sweep, name in drivers:
+        connection.execute("UPDATE files SET complete = (rows > 0) WHERE sweep = ? AND name = ?", (sweep, name))
+        connection.execute("""UPDATE files SET complete = 0 WHERE sweep = ? AND name = ?
+                              AND output IN ('1', '2', '3', '4', '5') AND rows < (SELECT MAX(rows) FROM files
+                              WHERE sweep = ? AND name = ? AND output IN ('1', '2', '3', '4', '5'))""",
+                           (sweep, name, sweep, name))
+#------------------------------------------------------------
+# Walk the results folder from the catalogued folder mtimes: unchanged folders are skipped
+# (their known sub-folders are still visited), changed ones are scanned
+# full = 1 re-reads every file of every folder
+# returns the number of folders scanned and of drivers whose files changed
+def refresh_catalog(connection, results_dir, full = False):
+    folders = {sweep: (parent, mtime) for sweep, parent, mtime in
+               connection.execute("SELECT sweep, parent, mtime FROM folders")}
+    visit   = [("", None)]
+    seen    = set()
+    drivers = []
+    scanned = 0
+    while visit:
+        sweep, parent = visit.pop()
+        try:
+            mtime = os.stat(os.path.join(results_dir, sweep)).st_mtime_ns
+        except OSError:
+            continue
+        seen.add(sweep)
+        if not full and sweep in folders and folders[sweep][1] == mtime:
+            visit += [(child, sweep) for child, (up, _) in folders.items() if up == sweep]
+            continue
+        children, changed = _scan_folder(connection, results_dir, sweep, full)
+        connection.execute("INSERT OR REPLACE INTO folders VALUES (?, ?, ?)", (sweep, parent, mtime))
+        visit   += [(child, sweep) for child in children]
+        drivers += changed
+        scanned  = scanned + 1
+    for sweep in set(folders) - seen:   # folders removed since the last refresh
+        connection.execute("DELETE FROM folders WHERE sweep = ?", (sweep,))
+        connection.execute("DELETE FROM files WHERE sweep = ?", (sweep,))
+    _update_complete(connection, drivers)
+    connection.commit()
+    return scanned, len(drivers)
+
+# Connection to the catalog of a results folder (created if missing), refreshed first
+def open_catalog(results_dir, refresh = True, full = False):
+    connection = sqlite3.connect(catalog_name(results_dir))
+    connection.execute("PRAGMA journal_mode = MEMORY")
+    connection.executescript(_schema)
+    if refresh:
+        refresh_catalog(connection, results_dir, full)
+    return connection
+#------------------------------------------------------------
+# results_dirs = one results folder or a list of them (e.g. the folders of several groups)
+# where        = SQL condition over the columns of the catalog, with ? for params, e.g.
+#                "goal = 'cyc' AND Dr = ? AND output = 'csrN' AND complete", (35,)
+# returns the paths of the matching files (sorted by folder, sweep and name), relative as
+# results_dirs are given, so that they can be handed to file_index / create_file_list
+def catalog_files(results_dirs, where = "1", params = ()):
+    if isinstance(results_dirs, str):
+        results_dirs = [results_dirs]
+    paths = []
+    for results_dir in results_dirs:
+        connection = open_catalog(results_dir)
+        rows       = connection.execute("SELECT sweep, file FROM files WHERE " + where +
+                                        " ORDER BY sweep, file", params).fetchall()
+        connection.close()
+        paths += [os.path.join(results_dir, sweep, file) for sweep, file in rows]
+    return paths
+
+# Index of the txt files of one sweep of a results folder ("" for the folder itself), kept
+# for the session: the catalog is refreshed on every call, the index only rebuilt when the
+# list of files changed
+_indexes = {}
+
+def results_index(results_dir, sweep = ""):
+    files = catalog_files(results_dir, "sweep = ?", (sweep,))
+    key   = (os.path.abspath(results_dir), sweep)
+    if key not in _indexes or _indexes[key]['files'] != files:
+        _indexes[key] = file_index(files)
+    return _indexes[key]
+''' EoF'''
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+- Labelled dataset of a sweep of undrained cyclic DSS drivers (uDSS_cyc_..._1.txt ... _5.txt):
+  dimensions Dr, sig_vc, alpha, Ko, CSR_scale (1 for the first round, the $CSR_scale of the
+  _CSRx<scale> follow-ups of adaptive_PM4SandDrivers.py), element (the five FLAC elements,
+  one per CSR) and step (row of the history), variables Ncyc, CSR, shear_strain, sigv/sigvc and ru
+- sweep_dataset lists the histories of a sweep from the catalog (catalog_PM4SandDrivers.py)
+  as a DataFrame indexed by (Dr, sig_vc, alpha, Ko, CSR_scale, element) holding only the
+  paths: nothing is read until select is called
+- select keeps the histories matching the labels asked for (vectorized over the index) and
+  loads only those, and only the variables asked for (load_txt, so each file is parsed once
+  per session), into one DataFrame indexed by (Dr, sig_vc, alpha, Ko, element, step);
+  aggregation is then plain pandas over the index levels, e.g. the peak shear strain of
+  every history of Dr = 35%:
+    data = select(dataset, ['shear_strain'], Dr = 35)
+    data['shear_strain'].abs().groupby(level = ['sig_vc', 'alpha', 'Ko', 'CSR_scale', 'element']).max()
+- every CSR scale of a parameter set is listed (CSR_scale = None), or only one when given
+- csrN_table gathers the triggering summaries (_csrN.txt: CSR and cycles to 98% r_u, 1%
+  and 3% shear strain) of a sweep in one table indexed by (Dr, sig_vc, alpha, Ko, point):
+  the points of all CSR scales of a parameter set are pooled (point = 0, 1, ... over the
+  first round then the follow-ups), so the power-law fits and the CRR use every run, and
+  column CSR_scale tells which driver each point comes from
+"""
+import numpy  as np
+import pandas as pd
+
+from   decode_PM4SandDrivers  import (decode_file)
+from   catalog_PM4SandDrivers import (catalog_files)
+from   cache_PM4SandDrivers   import (load_txt)
+from   history_PM4SandDrivers import (stride_rows)
+
+dimensions = ['Dr', 'sig_vc', 'alpha', 'Ko', 'CSR_scale', 'element', 'step']
+variables  = ['Ncyc', 'CSR', 'shear_strain', 'sigv/sigvc', 'ru']
+
+#------------------------------------------------------------
+# results_dir = results folder of the undrained cyclic DSS drivers
+# sweep       = sweep folder within it ("" for the results folder itself)
+# CSR_scale   = CSR scale of the drivers kept (1 for the drivers without _CSRx, None for all)
+# returns the paths of the element histories indexed by (Dr, sig_vc, alpha, Ko, CSR_scale, element)
+def sweep_dataset(results_dir, sweep = "", CSR_scale = None):
+    paths = catalog_files(results_dir, "goal = 'cyc' AND drainage = 'u' AND sweep = ? AND "
+                          + _scale_condition(CSR_scale) + " AND output IN ('1', '2', '3', '4', '5') AND rows > 0",
+                          (sweep, CSR_scale))
+    infos = [decode_file(path) for path in paths]
+    index = pd.MultiIndex.from_tuples([(info.Dr, info.sig, info.alpha, info.Ko, info.CSR_scale, int(info.output))
+                                       for info in infos], names = dimensions[:-1])
+    return pd.DataFrame({'path': paths}, index = index).sort_index()
+
+# dataset = sweep_dataset(...)
+# names   = variables to load (None for all)
+# stride  = keep every stride-th step after the first ones (steps keep their row numbers)
+# steps   = steps kept (list of row numbers, or slice with both ends included; None for all)
+# labels  = dimension = value or list of values, e.g. Dr = 35, alpha = [0.0, 0.1], element = 3,
+#           CSR_scale = 1.0 (first round only)
+def select(dataset, names = None, stride = 1, steps = None, **labels):
+    keep = np.ones(len(dataset), dtype = bool)
+    for dimension, wanted in labels.items():
+        keep &= dataset.index.get_level_values(dimension).isin(np.atleast_1d(wanted))
+    files  = dataset[keep]
+    frames = []
+    for path in files['path']:
+        df = load_txt(path, usecols = names)
+        df.index.name = 'step'
+        df = df.iloc[stride_rows(len(df), stride)]
+        frames.append(df if steps is None else df.loc[steps])
+    if not frames:
+        return pd.DataFrame(columns = names if names is not None else variables,
+                            index = pd.MultiIndex.from_tuples([], names = dimensions))
+    return pd.concat(frames, keys = list(files.index), names = dimensions[:-1])
+
+# Histories of a selection one at a time: ((Dr, sig_vc, alpha, Ko, CSR_scale, element), DataFrame by step)
+def histories(data):
+    for key, df in data.groupby(level = dimensions[:-1], sort = False):
+        yield key, df.droplevel(dimensions[:-1])
+#------------------------------------------------------------
+# CSR - N points of all drivers of a sweep (one row per CSR of each driver), every CSR scale
+# of a parameter set pooled unless CSR_scale is given
+def csrN_table(results_dir, sweep = "", CSR_scale = None):
+    paths  = catalog_files(results_dir, "goal = 'cyc' AND drainage = 'u' AND sweep = ? AND "
+                           + _scale_condition(CSR_scale) + " AND output = 'csrN' AND rows > 0", (sweep, CSR_scale))
+    infos  = [decode_file(path) for path in paths]
+    frames = [load_txt(path) for path in paths]
+    if not frames:
+        return pd.DataFrame(columns = ['CSR_scale'], index = pd.MultiIndex.from_tuples([], names = dimensions[:4] + ['point']))
+    table  = pd.concat(frames, keys = [(info.Dr, info.sig, info.alpha, info.Ko, info.CSR_scale) for info in infos],
+                       names = dimensions[:5] + ['row'])
+    return pool_points(table)
+
+# Points of a table indexed by (Dr, sig_vc, alpha, Ko, CSR_scale, one more level) pooled per
+# parameter set: index (Dr, sig_vc, alpha, Ko, point), point = 0, 1, ... over the first round
+# (CSR_scale = 1) then the follow-ups by scale, CSR_scale kept as a column
+def pool_points(table):
+    keys  = list(table.index.names)
+    frame = table.reset_index()
+    frame['_follow_up'] = frame['CSR_scale'] != 1.0
+    frame = frame.sort_values(keys[:4] + ['_follow_up', 'CSR_scale', keys[5]], kind = "stable")
+    frame['point'] = frame.groupby(keys[:4], sort = False).cumcount()
+    return frame.drop(columns = ['_follow_up', keys[5]]).set_index(keys[:4] + ['point'])
+
+# SQL condition on the CSR scale (bound to CSR_scale; None keeps every scale)
+def _scale_condition(CSR_scale):
+    return "? IS NULL" if CSR_scale is None else "CSR_scale = ?"
+''' EoF'''
@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
-import numpy as np
-import scipy.optimize as sciopt
+import os
+import re
+import warnings
+from   collections import namedtuple
+from   functools   import lru_cache
+
+# matplotlib style of the figures (ucdavis.mplstyle next to this file): the plotting scripts
+# run with plt.style.use(figure_style); a figure built elsewhere is built and saved inside
+# plt.style.context(figure_style) (tick labels take the style when the figure is drawn)
+figure_style = ['default', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ucdavis.mplstyle')]
 
 #------------------------------------------------------------
+# numpy and scipy imported on the first fit only: decoding names (catalog refresh, file
+# lists) does not load them
 def power_fit(df, df_x_name, df_y_name, pts):
+    import numpy as np
+    import scipy.optimize as sciopt
     df_nonzero = df[df[df_x_name]>0]
     #create x values from minimum to maximum numCycles in dataframe
     x    = np.linspace(df_nonzero[df_x_name].min(), df_nonzero[df_x_name].max(), pts)
@@ -22,192 +34,120 @@ def power_fit(df, df_x_name, df_y_name, pts):
     return [index, amp, x, y]  
 #------------------------------------------------------------
 # decode file names used during runs for ability to retrieve loading paths, drainage, d_r, etc.
-# function create here / used later
-def decode_name(filework,start_loc):
-    # function receives a name
-    infoList = filework[start_loc:-4].split("_")
-    
-    water    = infoList[0][0]   # will be 'u' or 'd'
-    driver   = infoList[0][1:]  # will be 'DSS' or 'PSC'
-    goal     = infoList[1]      # will be 'mono','MRD','vol','cyc','rec'
-    density  = infoList[2][2:]  # will be '35','55','75'
-    output   = infoList[-1]     # will be '1'-'5' or peakPhi, csrN etc.
-    
-    if infoList[1]   == "cyc":
-        # Cyclic Undrained DSS drivers have 3 extra pieces of info
-        # all others have 2 extra pieces of info
-        # monotonics have none
-        extra = infoList[-4:-1]
-    elif infoList[1] == "MRD":
-        extra = infoList[-3:-1]
-    elif infoList[1] == "vol":
-        extra = infoList[-3:-1]
-    elif infoList[1] == "rec":
-        extra = infoList[-3:-1]
-    else:
-        extra = 0
-    return([driver, goal, water, density, extra, output])
+# Names are built by the create_*_batch_files.py scripts as
+#   uDSS_cyc_Dr35[_CSRx0.62]_sig1_a0.0_Ko0.5_3.txt    dDSS_MRD_Dr35[_ref1]_Ncyc3[_max1%]_MRD.txt
+#   uDSS_rec_Dr35_sig1_a0.0_evol.txt                    dPSC_mono_Dr35_peakPhi.txt
+# and are decoded from the file name alone (any folder), every field read by its prefix
+DriverFile = namedtuple('DriverFile', ['path', 'name', 'driver', 'soil', 'goal', 'drainage', 'Dr', 'sig',
+                                       'alpha', 'Ko', 'Ncyc', 'max_strain', 'CSR_scale', 'refine', 'output'])
+
+_driver_token = re.compile(r"^([ud])(DSS|PSC)(.*)$")
+_field_token  = re.compile(r"^(Dr|CSRx|ref|sig|a|Ko|Ncyc|max)(\d+(?:\.\d*)?(?:e[-+]?\d+)?)%?$")
+_field_types  = {'Dr': ('Dr', int), 'CSRx': ('CSR_scale', float), 'ref': ('refine', int),
+                 'sig': ('sig', float), 'a': ('alpha', float), 'Ko': ('Ko', float),
+                 'Ncyc': ('Ncyc', int), 'max': ('max_strain', float)}
+
+# filework = path of a FLAC-produced txt file (or driver)
+# returns a DriverFile record (None for names not following the convention): driver 'DSS' or
+# 'PSC', goal 'mono','MRD','vol','cyc','rec', drainage 'u' or 'd', Dr in %, sig in atm,
+# max_strain in %, output '1'-'5' or summary file (peakPhi, csrN etc.), missing fields None.
+# Records are cached, so every file is decoded once per session
+@lru_cache(maxsize = None)
+def decode_file(filework):
+    name     = os.path.splitext(os.path.basename(filework))[0]
+    infoList = name.split("_")
+    water    = _driver_token.match(infoList[0])
+    if water is None or len(infoList) < 4:
+        return None
+    fields = {'CSR_scale': 1.0, 'refine': 0}
+    for token in infoList[2:-1]:
+        field = _field_token.match(token)
+        if field is None:
+            return None
+        key, cast = _field_types[field.group(1)]
+        fields[key] = cast(float(field.group(2)))
+    if 'Dr' not in fields:
+        return None
+    return DriverFile(path = filework, name = name[:-len(infoList[-1]) - 1], driver = water.group(2),
+                      soil = water.group(3), goal = infoList[1], drainage = water.group(1),
+                      Dr = fields['Dr'], sig = fields.get('sig'), alpha = fields.get('alpha'),
+                      Ko = fields.get('Ko'), Ncyc = fields.get('Ncyc'), max_strain = fields.get('max_strain'),
+                      CSR_scale = fields['CSR_scale'], refine = fields['refine'], output = infoList[-1])
+
+# Former interface: [driver, goal, water, density, extra, output] with the extra name
+# pieces (3 for cyc, 2 for MRD, vol and rec, 0 for mono). The name is taken from the path,
+# so start_loc is ignored (with a warning); names not following the convention raise
+def decode_name(filework, start_loc = None):
+    if start_loc is not None:
+        warnings.warn("decode_name: start_loc is ignored, the file name is taken from the path",
+                      DeprecationWarning, stacklevel = 2)
+    info     = decode_file(filework)
+    if info is None:
+        raise ValueError("decode_name: " + str(filework) + " does not follow the driver naming convention")
+    infoList = os.path.splitext(os.path.basename(filework))[0].split("_")
+    extra    = {'cyc': infoList[-4:-1], 'MRD': infoList[-3:-1], 'vol': infoList[-3:-1],
+                'rec': infoList[-3:-1]}.get(info.goal, 0)
+    return([info.driver, info.goal, info.drainage, str(info.Dr), extra, info.output])
 #------------------------------------------------------------
+# Inverted index of decoded result files: for every field, each value maps to the set of
+# positions (in fileList) of the files carrying it, so that queries are set intersections
+# and cost about as much as their result; names not following the convention are left out
+_index_fields = ['driver', 'goal', 'drainage', 'Dr', 'sig', 'alpha', 'Ko', 'Ncyc', 'max_strain', 'output']
+_text_fields  = ['driver', 'goal', 'drainage', 'output']
+
+def file_index(fileList):
+    index = {'files': list(fileList)}
+    for field in _index_fields:
+        index[field] = {}
+    for position, file in enumerate(index['files']):
+        info = decode_file(file)
+        if info is None:
+            continue
+        for field in _index_fields:
+            value = getattr(info, field)
+            if value is not None:
+                index[field].setdefault(value, set()).add(position)
+    return index
+
+# Positions of the files whose field takes any of the wanted values (strings for numbers
+# compare as numbers: '1' matches sig1 and max1%, '10' matches max10%); the sets of the
+# index are only read, never copied or changed
+def _lookup(index, field, wanted):
+    sets = [index[field].get(item if field in _text_fields else float(item), set()) for item in wanted]
+    return sets[0] if len(sets) == 1 else set().union(*sets)
+
 # driverType = 'DSS' or 'PSC'
 # testType   = 'mono','MRD','vol','cyc','rec'
 # drainType  = 'u' or 'd'
 # density    = '35','55','75' or [] for all
+# extraInfo  = [sigvc, alpha, Ko] for cyc, [sigvc, alpha] for rec, [Ncyc, max strain (%)] for
+#              MRD and vol, each [] for all (e.g. [['1'],['0.0','0.1'],[]]), or [] for all
 # output     = single element number or summary file (e.g. peakPhi, csrN)
+# fileList is the index of file_index (build it once and query it for every figure) or a
+# plain list of files, indexed on the fly. start_loc is kept in its former place so that
+# positional calls line up, and ignored (with a warning when given)
+_extra_fields = {'cyc': ['sig', 'alpha', 'Ko'], 'rec': ['sig', 'alpha'],
+                 'MRD': ['Ncyc', 'max_strain'], 'vol': ['Ncyc', 'max_strain']}
 
-def create_file_list(fileList,start_loc, driverType = [], testType  = [], drainType = [], 
-                                         density    = [], extraInfo = [], output    = []):
-    file_list = [] # reset list
-    for file in fileList:
-        match = 0  # use to check matches all parameters provided    
-        file_info = decode_name(file, start_loc)
-        if not driverType:
-            match = match + 1
-        else:         
-            for value in driverType:      # if user selects multiple types
-                if file_info[0] == value: # check driver types: mnotonic, cyclic, mod-red
-                    match = match + 1
-                    break
-        
-        if not testType:
-            match = match + 1
-        else:                 
-            for value in testType:
-                if file_info[1] == value:
-                    match = match + 1
-                    break
-
-        if not drainType:
-            match = match + 1
-        else: 
-            for value in drainType:
-                if file_info[2] == value:
-                    match = match + 1
-                    break
-                    
-        if not density:
-            match = match + 1
-        else:                      
-            for value in density:         # if user selects multiple types
-                if file_info[3] == value: # check density (decimal)
-                    match = match + 1
-                    break
-        
-        if not output:
-            match = match + 1
-        else:                      
-            for value in output:          # if user selects multiple types
-                if file_info[5] == value: # check density (decimal)
-                    match = match + 1
-                    break
-        #===================================================================
-        if not extraInfo:
-            match = match + 1
-        #===================================================================
-        elif file_info[1] == ('cyc'):               
-            submatch = 0
-            sigvc = extraInfo[0]
-            alpha = extraInfo[1]
-            Ko    = extraInfo[2]
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not sigvc:
-                submatch = submatch + 1   # any stress okay
-            else:
-                for value in sigvc:       # check each item in value[1]
-                    if file_info[4][0][3:] == value:
-                        submatch = submatch + 1
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not alpha:
-                submatch = submatch + 1   # any static stress ratio okay
-            else:                         # alpha exists, could be giving multiple alpha
-                for value in alpha:       # check each item in alpha
-                    if file_info[4][1][1:] == value:
-                        submatch = submatch + 1 
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not Ko:
-                submatch = submatch + 1   # any Ko value okay
-            else:                         # Ko exists, could be giving multiple Ko values
-                for value in Ko:          # check each item in Ko
-                    if file_info[4][2][2:] == value:
-                        submatch = submatch + 1 
-                        break  
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if submatch == 3:
-                match = match + 1             
-        #===================================================================
-        elif file_info[1] == 'MRD':
-            submatch = 0
-            Ncyc  = extraInfo[0]
-            maxg  = extraInfo[1]
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not Ncyc:
-                submatch = submatch + 1   # any number of cycles okay
-            else:
-                for value in Ncyc:        # check each item in value
-                    if file_info[4][0][4:] == value:
-                        submatch = submatch + 1
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not maxg:
-                submatch = submatch + 1   # any static stress ratio okay
-            else:                         # alpha exists, could be giving multiple alpha
-                for value in maxg:        # check each item in alpha
-                    if file_info[4][1][3] == value:  # assumes single digit shear strain (need to do 3:4 for double)
-                        submatch = submatch + 1 
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if submatch == 2:
-                match = match + 1
-        #===================================================================
-        elif file_info[1] == 'vol':
-            submatch = 0
-            Ncyc  = extraInfo[0]
-            maxg  = extraInfo[1]
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not Ncyc:
-                submatch = submatch + 1   # any number of cycles okay
-            else:
-                for value in Ncyc:        # check each item in value
-                    if file_info[4][0][4:] == value:
-                        submatch = submatch + 1
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not maxg:
-                submatch = submatch + 1   # any static stress ratio okay
-            else:                         # alpha exists, could be giving multiple alpha
-                for value in maxg:        # check each item in alpha
-                    if file_info[4][1][3] == value:  # assumes single digit shear strain (need to do 3:4 for double)
-                        submatch = submatch + 1 
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if submatch == 2:
-                match = match + 1
-        #===================================================================
-        elif file_info[1] == 'rec':
-            submatch = 0
-            sigvc = extraInfo[0]
-            alpha = extraInfo[1]
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not sigvc:
-                submatch = submatch + 1   # any number of cycles okay
-            else:
-                for value in sigvc:        # check each item in value
-                    if file_info[4][0][3:] == value:
-                        submatch = submatch + 1
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if not alpha:
-                submatch = submatch + 1   # any static stress ratio okay
-            else:                         # alpha exists, could be giving multiple alpha
-                for value in alpha:       # check each item in alpha
-                    if file_info[4][1][1:] == value:  # assumes single digit shear strain (need to do 3:4 for double)
-                        submatch = submatch + 1 
-                        break
-            #--**--**--**--**--**--**--**--**--**--**--**--**--**--**--**--*
-            if submatch == 2:
-                match = match + 1
-                    
-        if match == 6:
-            file_list.append(file)
-    return file_list
\ No newline at end of file
+def create_file_list(fileList, start_loc = None, driverType = [], testType  = [], drainType = [],
+                                                 density    = [], extraInfo = [], output    = []):
+    if start_loc is not None:
+        warnings.warn("create_file_list: start_loc is ignored, the file name is taken from the path",
+                      DeprecationWarning, stacklevel = 2)
+    index    = fileList if isinstance(fileList, dict) else file_index(fileList)
+    criteria = [_lookup(index, field, wanted) for field, wanted in
+                zip(['driver', 'goal', 'drainage', 'Dr', 'output'], [driverType, testType, drainType, density, output])
+                if wanted]
+    if extraInfo:
+        # monotonic drivers have no extra info to match
+        extra = set()
+        for goal, fields in _extra_fields.items():
+            subsets = [_lookup(index, 'goal', [goal])]
+            subsets = subsets + [_lookup(index, field, wanted) for field, wanted in zip(fields, extraInfo) if wanted]
+            extra  |= set.intersection(*sorted(subsets, key = len))
+        criteria.append(extra)
+    if criteria:
+        positions = set.intersection(*sorted(criteria, key = len))
+    else:
+        positions = set().union(*index['goal'].values())
+    return [index['files'][position] for position in sorted(positions)]
\ No newline at end of file
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+- Triggering criteria of the undrained cyclic DSS drivers applied to their stored element
+  histories (uDSS_cyc_..._1.txt ... _5.txt) instead of $Liq_1 ... $Liq_3 of
+  DSS_cyclic_undrained.fis: any criterion, no FLAC rerun
+- a criterion is name: (measure, operator, level), the name becoming the column of cycles
+  of the table, e.g.
+    {'N_to_90%_ru':     ('ru',                '>=', 0.90),
+     'N_to_5%_DA':      ('DA(shear_strain)',  '>=', 5.0),
+     'N_to_sigv<0.2':   ('sigv/sigvc',        '<=', 0.2)}
+  the measure being a variable of the histories (Ncyc, CSR, shear_strain, sigv/sigvc, ru),
+  its absolute value |variable|, its double amplitude DA(variable) (largest minus smallest
+  value reached so far in the history) or any function of the histories returning one value
+  per row (e.g. lambda data: data['ru'] - data['sigv/sigvc'])
+- every criterion is evaluated over the rows of all histories of a sweep at once and its
+  first crossing in each history found with one vectorized search (no loop over files or rows)
+- the number of cycles of a criterion is the continuous cycle count (Ncyc) at its first
+  crossing; half_cycles = True counts as $Liq_1 ... $Liq_3 of FLAC instead: the reversals
+  of the CSR of the history ($Cyc_Num, 0.5 each) up to the row before the crossing, + 0.5;
+  histories never crossing give NaN (FLAC writes its last count + 0.5), left out of the
+  power-law fits
+- the CSR of an element is half the range of the CSR of its history (the CSR limit without
+  the static bias alpha)
+- failure_table returns the CSR - N points in the layout of csrN_table
+  (dataset_PM4SandDrivers.py), the points of every CSR scale of a parameter set pooled
+  (unless CSR_scale is given), so power_fits and triggering_table
+  (triggering_PM4SandDrivers.py) take them as they are, e.g.
+    triggering_table(failure_table(results_dir, criteria), criteria = list(criteria))
+"""
+import numpy  as np
+import pandas as pd
+
+from   dataset_PM4SandDrivers import (sweep_dataset, select, pool_points)
+
+criteria  = {'N_to_98%_ru':    ('ru',             '>=', 0.98),
+             'N_to_1%_strain': ('|shear_strain|', '>=', 1.0),
+             'N_to_3%_strain': ('|shear_strain|', '>=', 3.0)}
+operators = {'>=': np.greater_equal, '>': np.greater, '<=': np.less_equal, '<': np.less}
+
+#------------------------------------------------------------
+# Variable of the histories a measure needs (None for functions of the histories)
+def measure_variable(measure):
+    if callable(measure):
+        return None
+    if measure.startswith('|') and measure.endswith('|'):
+        return measure[1:-1]
+    if measure.startswith('DA(') and measure.endswith(')'):
+        return measure[3:-1]
+    return measure
+
+# Values of a measure for every row of data (select of dataset_PM4SandDrivers.py), history =
+# number of the history of each row
+def measure_values(data, measure, history):
+    if callable(measure):
+        return np.asarray(measure(data), dtype = "float64")
+    values = data[measure_variable(measure)]
+    if measure.startswith('|'):
+        return values.abs().to_numpy()
+    if measure.startswith('DA('):
+        grouped = values.groupby(history, sort = False)
+        return (grouped.cummax() - grouped.cummin()).to_numpy()
+    return values.to_numpy()
+
+# Half cycles completed before every row, counted as $Cyc_Num of FLAC: 0.5 at each reversal
+# of the CSR of its history. csr = CSR of all histories one after the other, history =
+# number of the history of each row, heads = first row of each history
+def half_cycles_before(csr, history, heads):
+    steps    = np.sign(np.diff(csr))
+    steps[history[1:] != history[:-1]] = 0.0
+    moving   = np.flatnonzero(steps)
+    turn     = (steps[moving[1:]] != steps[moving[:-1]]) & (history[moving[1:]] == history[moving[:-1]])
+    count    = np.zeros(csr.size)
+    count[moving[1:][turn]] = 0.5
+    count    = np.cumsum(count)
+    before   = np.zeros(csr.size)
+    before[1:]     = count[:-1] - count[heads][history[1:]]
+    before[heads]  = 0.0
+    return before
+
+# data        = histories of elements (select of dataset_PM4SandDrivers.py, with Ncyc and CSR)
+# criteria    = name: (measure, operator, level)
+# half_cycles = count as $Liq_1 ... $Liq_3 (half cycles before the crossing + 0.5) instead of
+#               the continuous Ncyc
+# returns one row per history with its CSR and the number of cycles to each criterion
+def first_crossings(data, criteria = criteria, half_cycles = False):
+    # histories are contiguous in data: a new one starts where a label (but step) changes
+    codes   = np.array([data.index.codes[level] for level in range(data.index.nlevels - 1)])
+    heads   = np.flatnonzero(np.append(True, (codes[:, 1:] != codes[:, :-1]).any(axis = 0)))[:len(data)]
+    history = np.zeros(len(data), dtype = int)
+    history[heads[1:]] = 1
+    history = np.cumsum(history)
+    count   = heads.size
+    csr     = data['CSR'].to_numpy(dtype = "float64")
+    cycles  = data['Ncyc'].to_numpy(dtype = "float64")
+    if half_cycles:
+        cycles = half_cycles_before(csr, history, heads) + 0.5
+
+    # CSR limit of each history: half the range of its CSR
+    table   = pd.DataFrame({'CSR': 0.5 * (np.maximum.reduceat(csr, heads) - np.minimum.reduceat(csr, heads))
+                                   if count else []},
+                           index = data.index.droplevel('step')[heads])
+    for name, (measure, operator, level) in criteria.items():
+        hit              = operators[operator](measure_values(data, measure, history), level)
+        rows             = np.flatnonzero(hit)
+        found, first     = np.unique(history[rows], return_index = True)
+        N                = np.full(count, np.nan)
+        N[found]         = cycles[rows[first]]
+        table[name]      = N
+    return table
+
+# results_dir, sweep, CSR_scale = sweep of undrained cyclic DSS drivers (as sweep_dataset)
+# criteria, half_cycles         = as first_crossings
+# returns the CSR - N points of the sweep indexed by (Dr, sig_vc, alpha, Ko, point), with
+# columns CSR, one per criterion and CSR_scale (the layout of csrN_table)
+def failure_table(results_dir, criteria = criteria, sweep = "", CSR_scale = None, half_cycles = False):
+    dataset   = sweep_dataset(results_dir, sweep, CSR_scale)
+    names     = ['Ncyc', 'CSR'] + [measure_variable(measure) for measure, _, _ in criteria.values()]
+    names     = [name for name in dict.fromkeys(names) if name is not None]
+    if any(callable(measure) for measure, _, _ in criteria.values()):
+        names = None
+    return pool_points(first_crossings(select(dataset, names), criteria, half_cycles))
+''' EoF'''
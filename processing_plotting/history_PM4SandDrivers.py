@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+- Reader of the whitespace tables FLAC writes for each driver: one header line of column
+  names and rows of numbers, e.g. the element histories
+    Ncyc CSR shear_strain sigv/sigvc ru                       (undrained and reconsolidation)
+    eps_xy(%) eps_yy(%) tauxy tauxy/sigvc sigv sigv/sigvc     (drained cyclic, DSS monotonic)
+    e_vol(%) eps_yy(%) q p s1/s3 p/po                         (PSC monotonic)
+  and the summary files (csrN, MRD, peakPhi, evol)
+- the numbers are parsed in one vectorized NumPy pass (no Python call per line) into a
+  float array with the column names of the header, so DataFrames keep the names the
+  plotting code uses
+- a last line cut short (driver still running or killed) is dropped instead of failing
+- decimation is array striding after the load: the first rows are kept and then every
+  stride-th row, the same rows as pd.read_table(..., skiprows=lambda x: x > 3 and x % skip)
+  with first = 3 and stride = skip, or skiprows=lambda x: x % numCyc with first = 0
+- striding drops rows blindly; decimate keeps the shape of a trace within a budget of
+  points: the trace is cut in equal buckets and the rows holding the minimum and maximum
+  of every plotted series in each bucket are kept (min/max bucketing), together with every
+  reversal of the loading series and the first rows reaching each criterion level (e.g.
+  |shear_strain| = 1% and 3%), so loop peaks and failure points survive decimation
+- iter_history streams a history in blocks of chunk_rows rows (a generator), so one pass
+  over a long history at small $his_steps holds one block in memory; first_crossing and
+  read_to_cycle answer threshold questions from it and stop reading as soon as the answer
+  is known (e.g. cycNumStop of Fig. 4-5, the first Ncyc with |shear_strain| >= 2%)
+- drivers run with $skip_N_gama = 1 leave the continuous cycle count of $N_gama to Python:
+  their element histories hold the half-cycle counts of FLAC in a column named Nhalf, which
+  every reader here turns into the continuous Ncyc of $N_gama (continuous_cycles, same
+  values as the FISH loops), so the plotting code sees the same columns either way
+"""
+import io
+import itertools
+import warnings
+import numpy  as np
+import pandas as pd
+
+#------------------------------------------------------------
+# $N_gama of DSS_cyclic_undrained.fis: each half cycle, from the row where the half-cycle
+# count reaches one multiple of 0.5 to the row where it reaches the next, adds 0.5 spread
+# over its rows (0.5 / (rows + 0.01) per row strictly inside it, none on the end rows), and
+# the rows after the last one follow at the rate of the last complete half cycle
+# blocks    = successive blocks of half-cycle counts (nondecreasing) of the rows of an _N.txt
+#             file, the rows first_row, first_row + 1, ... of the FLAC table
+# yields the continuous counts of the rows in order, in blocks ending with the last row whose
+# half cycle is complete (the rows after it wait for the next block or the end)
+def continuous_blocks(blocks, first_row = 3):
+    done    = 0           # half cycles whose end row is known
+    start   = 0           # table row where the current half cycle started
+    rate    = 0.0         # increment per row of the last complete half cycle
+    total   = 0.0         # continuous count of the last row yielded
+    row     = first_row   # table row of pending[0]
+    pending = np.zeros(0)
+    for block in blocks:
+        pending = np.concatenate([pending, np.asarray(block, dtype = "float64")])
+        reached = np.maximum.accumulate(np.floor(pending * 2.0)) if pending.size else pending
+        if not reached.size or reached[-1] <= done:
+            continue
+        ends    = row + np.searchsorted(reached, np.arange(done + 1, reached[-1] + 1))
+        rates   = 0.5 / (np.diff(np.concatenate([[start], ends])) + 0.01)
+        rows    = np.arange(row, ends[-1] + 1)
+        steps   = np.where(np.isin(rows, ends), 0.0, rates[np.searchsorted(ends, rows)])
+        counts  = total + np.cumsum(steps)
+        yield counts
+        done    = int(reached[-1])
+        start   = ends[-1]
+        rate    = rates[-1]
+        total   = counts[-1]
+        pending = pending[rows.size:]
+        row     = ends[-1] + 1
+    if pending.size:
+        steps     = np.full(pending.size, rate)
+        steps[-1] = 0.0   # last row of the table
+        yield total + np.cumsum(steps)
+
+# Continuous cycle count of a whole column of half-cycle counts
+def continuous_cycles(half_cycles, first_row = 3):
+    return np.concatenate([np.zeros(0)] + list(continuous_blocks([half_cycles], first_row)))
+
+# Column names as the readers return them (Nhalf comes back as the continuous Ncyc)
+def _column_names(names):
+    return ['Ncyc' if name == 'Nhalf' else name for name in names]
+#------------------------------------------------------------
+# Column names and (rows x columns) float array of a FLAC txt file; usecols keeps only
+# the named columns (in the order of the file). Raises ValueError for non-numeric tables
+def parse_history(txt_FileName, usecols = None):
+    with open(txt_FileName, "r") as txt_file:
+        names = txt_file.readline().split()
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")   # header only: no rows yet
+                data = np.loadtxt(txt_file, dtype = "float64", ndmin = 2)
+        except ValueError:
+            # row cut short: parse the complete ones (non-numeric tables fail again)
+            txt_file.seek(0)
+            body = txt_file.read().split("\n", 1)[1]
+            rows = sum(1 for line in body.splitlines() if line.strip()) - 1
+            data = np.loadtxt(io.StringIO(body), dtype = "float64", ndmin = 2, max_rows = rows)
+    data = data.reshape(-1, len(names))
+    if 'Nhalf' in names:
+        data[:, names.index('Nhalf')] = continuous_cycles(data[:, names.index('Nhalf')])
+        names = _column_names(names)
+    if usecols is not None:
+        keep  = [i for i, name in enumerate(names) if name in usecols]
+        names = [names[i] for i in keep]
+        data  = data[:, keep]
+    return names, data
+
+# Rows kept by decimation: the first rows, then the last row of every stride (rows
+# stride-1, 2*stride-1, ...); a slice of all rows for stride = 1
+def stride_rows(n_rows, stride = 1, first = 3):
+    if stride <= 1:
+        return slice(None)
+    return np.union1d(np.arange(min(first, n_rows)), np.arange(stride - 1, n_rows, stride))
+
+# Rows kept by peak-preserving decimation to about points rows (all rows when the trace
+# is shorter or points <= 0)
+# series    = arrays plotted (e.g. shear strain and CSR): min and max of each per bucket
+# reversals = arrays whose every reversal (local extremum, plateaus at their start) is kept
+# crossings = (array, level) pairs: the first row where |array| >= level and the one before
+def decimate_rows(series, points, reversals = (), crossings = ()):
+    n_rows = len(series[0])
+    if points <= 0 or n_rows <= points:
+        return np.arange(n_rows)
+    buckets = max(1, points // (2 * len(series)))
+    size    = -(-n_rows // buckets)
+    offsets = np.arange(buckets) * size
+    keep    = [np.array([0, n_rows - 1])]
+    for values in series:
+        values = np.asarray(values, dtype = "float64")
+        padded = np.concatenate([values, np.full(size * buckets - n_rows, values[-1])]).reshape(buckets, size)
+        keep  += [np.minimum(offsets + padded.argmin(axis = 1), n_rows - 1),
+                  np.minimum(offsets + padded.argmax(axis = 1), n_rows - 1)]
+    for values in reversals:
+        steps  = np.diff(np.asarray(values, dtype = "float64"))
+        moves  = np.nonzero(steps)[0]   # rows followed by a change
+        slopes = np.sign(steps[moves])
+        keep  += [moves[:-1][slopes[1:] != slopes[:-1]] + 1]
+    for values, level in crossings:
+        hits  = np.nonzero(np.abs(np.asarray(values)) >= level)[0]
+        keep += [np.array([max(hits[0] - 1, 0), hits[0]])] if hits.size else []
+    return np.unique(np.concatenate(keep))
+
+# DataFrame version: columns, reversals and crossings given by column name, e.g.
+# decimate(df, ['shear_strain', 'CSR'], 5000, ['CSR'], [('shear_strain', 1.0), ('shear_strain', 3.0)])
+def decimate(df, columns, points, reversals = (), crossings = ()):
+    rows = decimate_rows([df[name].to_numpy() for name in columns], points,
+                         [df[name].to_numpy() for name in reversals],
+                         [(df[name].to_numpy(), level) for name, level in crossings])
+    return df.iloc[rows]
+#------------------------------------------------------------
+# Float array of a block of text lines (a last line cut short is dropped)
+def _parse_lines(lines, n_columns):
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")   # blank lines only
+            data = np.loadtxt(lines, dtype = "float64", ndmin = 2)
+    except ValueError:
+        data = np.loadtxt(lines[:-1], dtype = "float64", ndmin = 2)
+    return data.reshape(-1, n_columns)
+
+# Generator of (first row, block) pairs of a FLAC txt file read chunk_rows lines at a time,
+# block being a (rows x columns) float array of the usecols columns; the column names are
+# given by history_columns. Closing the generator (break, return) stops the reading
+# (a file with half-cycle counts yields its rows once their half cycle is complete)
+def iter_history(txt_FileName, usecols = None, chunk_rows = 100000):
+    with open(txt_FileName, "r") as txt_file:
+        names  = txt_file.readline().split()
+        keep   = [i for i, name in enumerate(_column_names(names)) if usecols is None or name in usecols]
+        chunks = (_parse_lines(lines, len(names)) for lines in
+                  iter(lambda: list(itertools.islice(txt_file, chunk_rows)), []))
+        row    = 0
+        if 'Nhalf' not in names:
+            for data in chunks:
+                yield row, data[:, keep]
+                row = row + data.shape[0]
+            return
+
+        column = names.index('Nhalf')
+        held   = []   # rows read and not yet yielded
+        def half_cycles():
+            for data in chunks:
+                held.append(data)
+                yield data[:, column]
+        for counts in continuous_blocks(half_cycles()):
+            data = np.concatenate(held)
+            held[:] = [data[counts.size:]]
+            data = data[:counts.size]
+            data[:, column] = counts
+            yield row, data[:, keep]
+            row = row + counts.size
+
+# Column names returned by iter_history for usecols (file order)
+def history_columns(txt_FileName, usecols = None):
+    with open(txt_FileName, "r") as txt_file:
+        names = _column_names(txt_file.readline().split())
+    return [name for name in names if usecols is None or name in usecols]
+
+# Row number and values (dict) of the first row where |column| >= level, reading only up
+# to it; None when the level is never reached
+def first_crossing(txt_FileName, column, level, chunk_rows = 100000):
+    names = history_columns(txt_FileName)
+    for row, data in iter_history(txt_FileName, chunk_rows = chunk_rows):
+        hits = np.nonzero(np.abs(data[:, names.index(column)]) >= level)[0]
+        if hits.size:
+            return row + hits[0], dict(zip(names, data[hits[0]]))
+    return None
+
+# Rows up to the cycle (Ncyc, increasing) at which |column| first reaches level (e.g.
+# shear_strain, 2.0 for Fig. 4-5), reading only up to the first row past it
+# returns the cycle of the crossing (cycNumStop) and a DataFrame of the usecols columns,
+# decimated as read_history (stride, first); (None, None) when the level is never reached
+def read_to_cycle(txt_FileName, column, level, usecols = None, cycle = 'Ncyc', stride = 1, first = 3,
+                  chunk_rows = 100000):
+    names  = history_columns(txt_FileName)
+    kept   = [name for name in names if usecols is None or name in usecols]
+    blocks = []
+    stop   = None
+    for row, data in iter_history(txt_FileName, chunk_rows = chunk_rows):
+        if stop is None:
+            hits = np.nonzero(np.abs(data[:, names.index(column)]) >= level)[0]
+            if hits.size:
+                stop = data[hits[0], names.index(cycle)]
+        end = data.shape[0]
+        if stop is not None:
+            past = np.nonzero(data[:, names.index(cycle)] > stop)[0]
+            end  = past[0] if past.size else end
+        rows = np.arange(row, row + end)
+        rows = rows[(rows < first) | ((rows + 1) % stride == 0)] if stride > 1 else rows
+        blocks.append(data[rows - row][:, [names.index(name) for name in kept]])
+        if end < data.shape[0]:
+            break
+    if stop is None:
+        return None, None
+    return stop, pd.DataFrame(np.concatenate(blocks), columns = kept)
+#------------------------------------------------------------
+# txt_FileName = FLAC-produced txt file
+# usecols      = columns to return (None for all)
+# stride       = keep every stride-th row after the first ones (1 keeps all rows)
+# first        = number of leading rows always kept
+# frame        = True returns a DataFrame, False the column names and the float array
+def read_history(txt_FileName, usecols = None, stride = 1, first = 3, frame = True):
+    names, data = parse_history(txt_FileName, usecols)
+    data = data[stride_rows(data.shape[0], stride, first)]
+    if frame:
+        return pd.DataFrame(data, columns = names)
+    return names, data
+''' EoF'''
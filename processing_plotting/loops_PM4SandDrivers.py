@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+- Hysteresis-loop analysis of the drained cyclic DSS histories (dDSS_MRD_..._1.txt ... _5.txt:
+  eps_xy(%) and tauxy): secant shear modulus, G/Gmax and damping ratio of every loading
+  cycle of every element, recomputed from the histories at full precision instead of
+  read from the 3-digit _MRD.txt (which FLAC writes from its $GSecant, $G_Gmax and
+  $dampRatio arrays)
+- cycles are cut as in $strain_control of DSS_cyclic_drained.fis: a cycle starts where the
+  shear strain turns positive (0 -> +limit -> -limit -> 0) and ends where the next one starts
+  (the last one at the end of the history); its strain reversals are the rows of maximum
+  and minimum strain
+    G       = (tau at max strain - tau at min strain) / (max strain - min strain)   (kPa)
+    G/Gmax  = G / G of the first cycle of the element
+    Damp    = 100 x loop area / (4 pi W), W = 1/2 tau amplitude x strain amplitude  (%)
+  the loop area summing tau d(gamma) over the rows of the cycle (trapezoids), like $work
+- all histories are analysed in one vectorized pass (concatenated, with their first rows
+  as boundaries): no Python loop over files, cycles or rows
+- mrd_table lays the cycles of one driver out as its _MRD.txt (eps_xy G1 G/Gmax1 Damp1 ...),
+  with the measured strain amplitude as eps_xy and one row for every cycle
+"""
+import numpy  as np
+import pandas as pd
+
+from   decode_PM4SandDrivers import (decode_file)
+from   cache_PM4SandDrivers  import (load_txt)
+
+#------------------------------------------------------------
+# strain = shear strain (%) of all histories one after the other, tau = shear stress (Pa)
+# starts = first row of each history (starts[0] = 0)
+# returns a DataFrame with one row per cycle: history (position in starts), cycle (1, 2, ...
+# within its history), eps_xy (strain amplitude, %), G (kPa), G/Gmax and Damp (%)
+def cycle_loops(strain, tau, starts):
+    strain  = np.asarray(strain, dtype = "float64")
+    tau     = np.asarray(tau, dtype = "float64")
+    starts  = np.asarray(starts)
+    ends    = np.append(starts[1:], strain.size) - 1                # last row of each history
+    history = np.searchsorted(starts, np.arange(strain.size), side = "right") - 1
+
+    # cycle boundaries: last row at or below zero strain before it turns positive
+    first   = np.flatnonzero((strain[:-1] <= 0.0) & (strain[1:] > 0.0) & (history[:-1] == history[1:]))
+    owner   = history[first]
+    same    = np.append(owner[1:] == owner[:-1], False)
+    last    = np.where(same, np.append(first[1:], 0), ends[owner])
+
+    # rows of each cycle: from its boundary row up to the row before the next boundary (the
+    # boundary row goes to the later cycle; the earlier one reaches it only through the
+    # trapezoid i -> i + 1 of its last row below)
+    rows    = np.arange(strain.size)
+    cycle   = np.searchsorted(first, rows, side = "right") - 1
+    inside  = (cycle >= 0) & (rows <= last[np.maximum(cycle, 0)])
+    rows    = rows[inside]
+    cycle   = cycle[inside]
+
+    # strain reversals: rows of maximum and minimum strain of each cycle
+    order   = rows[np.lexsort((strain[rows], cycle))]
+    counts  = np.bincount(cycle, minlength = first.size)
+    top     = order[np.cumsum(counts) - 1]
+    bottom  = order[np.cumsum(counts) - counts]
+    dgamma  = (strain[top] - strain[bottom]) / 100.0
+    dtau    = tau[top] - tau[bottom]
+
+    # loop area: trapezoids between successive rows of the cycle
+    steps   = rows < last[cycle]
+    i       = rows[steps]
+    area    = np.bincount(cycle[steps], weights = 0.5 * (tau[i] + tau[i + 1]) * (strain[i + 1] - strain[i]) / 100.0,
+                          minlength = first.size)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        loops = pd.DataFrame({'history': owner,
+                              'cycle':   np.arange(first.size) - np.searchsorted(owner, owner) + 1,
+                              'eps_xy':  dgamma * 50.0,
+                              'G':       dtau / dgamma / 1000.0,
+                              'Damp':    100.0 * area / (4.0 * np.pi * 0.125 * dtau * dgamma)})
+    loops['G/Gmax'] = loops['G'] / loops.groupby('history')['G'].transform('first')
+    return loops[['history', 'cycle', 'eps_xy', 'G', 'G/Gmax', 'Damp']]
+
+# paths = element histories (_1.txt ... _5.txt) of drained cyclic drivers, any number of drivers
+# returns one row per cycle indexed by (name, element, cycle) with columns Dr, level (strain
+# level of the cycle, Ncyc cycles per level), eps_xy, G, G/Gmax and Damp
+def loop_table(paths):
+    paths  = list(paths)
+    frames = [load_txt(path, usecols = ['eps_xy(%)', 'tauxy']) for path in paths]
+    starts = np.cumsum([0] + [len(df) for df in frames[:-1]])
+    if not frames:
+        return pd.DataFrame(columns = ['Dr', 'level', 'eps_xy', 'G', 'G/Gmax', 'Damp'],
+                            index = pd.MultiIndex.from_tuples([], names = ['name', 'element', 'cycle']))
+    loops  = cycle_loops(np.concatenate([df['eps_xy(%)'].to_numpy() for df in frames]),
+                         np.concatenate([df['tauxy'].to_numpy() for df in frames]), starts)
+    infos  = [decode_file(path) for path in paths]
+    loops['name']    = [infos[h].name for h in loops['history']]
+    loops['element'] = [int(infos[h].output) for h in loops['history']]
+    loops['Dr']      = [infos[h].Dr for h in loops['history']]
+    loops['level']   = (loops['cycle'] - 1) // np.array([infos[h].Ncyc or 1 for h in loops['history']]) + 1
+    return loops.set_index(['name', 'element', 'cycle'])[['Dr', 'level', 'eps_xy', 'G', 'G/Gmax', 'Damp']]
+
+# Cycles of one driver (BaseFile name) as the columns of its _MRD.txt: eps_xy (mean strain
+# amplitude of the elements, %) and G<n>, G/Gmax<n>, Damp<n> of each element n, one row per cycle
+def mrd_table(loops, name):
+    driver = loops.xs(name, level = 'name')[['eps_xy', 'G', 'G/Gmax', 'Damp']].unstack('element')
+    table  = pd.DataFrame({'eps_xy': driver['eps_xy'].mean(axis = 1)})
+    for element in driver['G'].columns:
+        for column in ['G', 'G/Gmax', 'Damp']:
+            table[column + str(element)] = driver[column][element]
+    return table.reset_index(drop = True)
+''' EoF'''
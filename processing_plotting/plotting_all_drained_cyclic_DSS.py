@@ -12,30 +12,31 @@ Created on Wed Jun 22 23:15:13 2022
     multiple loading paths especially when secondary parameters are altered
 - Code assumes that drivers and their results are placed one level up from code
     location & each group in their own folder
-- decode_name function extracts information from each FLAC-produced txt file
+- decode_file function extracts information from the name of each FLAC-produced txt file
+    (any folder; each name decoded once and cached)
 - create_file_list function synthesizes list of all files that satisfy criteria
+    from an index of the decoded names (results_index) built once per folder
     examples are provided at each location where it is used. If no files found 
     to meet criteria then plots will come out empty (this could mean the files
     are not there or the filter criteria where not setup appropriately)
+- each figure is built by a function of the results folder (e.g. fig4_17(results_dir))
+    returning the figure; run as a script the figures are saved and shown, from
+    the package they are reached as processing_plotting.fig4_17 or with
+    python -m processing_plotting figure
 """
 
 import numpy as np
-import scipy.optimize as sciopt
 
-import glob
 import pandas as pd
 import numpy  as np
 import matplotlib.pyplot as plt
 from   matplotlib.ticker     import (AutoMinorLocator, MultipleLocator)
-from   decode_PM4SandDrivers import (decode_name, create_file_list)
+from   decode_PM4SandDrivers import (decode_file, create_file_list, figure_style)
+from   catalog_PM4SandDrivers import (results_index)
+from   cache_PM4SandDrivers   import (load_txt)
+from   history_PM4SandDrivers import (decimate)
+from   loops_PM4SandDrivers   import (loop_table, mrd_table)
 
-plt.style.use('default')
-plt.style.use('ucdavis.mplstyle')
-
-search_string    = "./../PM4Sand_Cyclic_DSS_drained_batch/*.txt"
-# The start location takes you to the beginning of the file string (goes past the folder)
-start_loc        = 38
-all_files  = glob.glob(search_string)
 
 #== ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** 
 # Dictionaries for ... styling plots
@@ -68,79 +69,109 @@ EPRI_0_6_m = np.array([[0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1, 3
 EPRI_36_76_m = np.array([[0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1, 3, 10],
                          [1,1,1,0.98, 0.9, 0.75, 0.5, 0.28, 0.12, 0.066, 0.037],
                          [0.2, 0.3, 0.65, 1.2, 2.3, 4.2, 8.2, 14, 21, 25.2, 28.8]])
-#-----------------------------------------------------------------------------------------
-# Inputs for create_file_list 
-
-skip   = 1   # 1 implies skipping no rows - can increase if slow
 ylimtop = {'35': 80, '55': 100, '75': 120} #axes limits
 ylimbot = {'35': 250, '55': 300, '75': 400} #axes limits
 
+# MRD points of a coarse pass and its refinements (_ref<n>, adaptive_PM4SandDrivers.py) as one
+# curve: last cycle at each strain level of every driver, by strain. FLAC divides G by the G of
+# the first cycle of each driver, so the G/Gmax of the refinements is taken against the coarse pass
+# (mrd_loops = loop_table of the drivers, None to read the FLAC _MRD.txt)
+def mrd_points(files, mrd_loops = None):
+    frames = []
+    for file in sorted(files, key = lambda file: decode_file(file).refine):
+        info = decode_file(file)
+        df   = mrd_table(mrd_loops, info.name) if mrd_loops is not None else load_txt(file)
+        if info.refine == 0:
+            Gmax = df.iloc[0]
+        else:
+            for column in [column for column in df.columns if column.startswith('G/Gmax')]:
+                df[column] = df['G' + column[6:]] / Gmax['G' + column[6:]]
+        frames.append(df.iloc[info.Ncyc-1::info.Ncyc])   # last cycle at each strain
+    return pd.concat(frames).sort_values('eps_xy')
+#-----------------------------------------------------------------------------------------
+# Figures 4.17 to 4.19 (density '35', '55' and '75'): stress-strain loops of elements 2 and 3
+# and MRD curves against EPRI (1993)
+# results_dir = folder of the drained cyclic drivers; sweep = sub-folder (sweep_dir of the
+# generator) to plot, "" for the folder itself
+# skip        = 1 implies skipping no rows - can increase if slow
+# points      = points per trace kept by peak-preserving decimation (0 keeps all rows)
+# loops       = 1: G/Gmax and damping recomputed from the element histories (_1.txt ... _5.txt)
+#               at full precision, 0: read from the FLAC _MRD.txt (3 significant digits)
+def mrd_figure(results_dir, density, sweep = "", skip = 1, points = 5000, loops = 1):
+    all_files = results_index(results_dir, sweep)
+    # cycles of all MRD drivers of the density analysed at once (loops_PM4SandDrivers.py)
+    mrd_loops = None
+    if loops:
+        mrd_loops = loop_table(create_file_list(all_files, None, [],['MRD'],[],[density],[],['1','2','3','4','5']))
 
-for k,density in enumerate(['35', '55', '75']):
     # create_file_list receives all txt files in the folder, and filters those that are for MRD curves,
     # selects only outputs 2 and 3 (elements under 100 and 400 kPa respectively)
     # other entries are left empty (no filter applied)
-    fig_files_left    = create_file_list(all_files,start_loc, [],['MRD'],[],[density],[],['2','3'])
-    
+    fig_files_left    = create_file_list(all_files, None, [],['MRD'],[],[density],[],['2','3'])
+
     # selects only outputs _MRD.txt that are the FLAC post-processed for the MRD curves
-    fig_files_right   = create_file_list(all_files,start_loc, [],['MRD'],[],[density],[],['MRD'])
+    fig_files_right   = create_file_list(all_files, None, [],['MRD'],[],[density],[],['MRD'])
+
 
-       
-    # Create empty plot 
+    # Create empty plot
     fig, axs = plt.subplots(nrows = 2, ncols = 2, figsize=(6.25,5), squeeze = False)
-    
+
     # Add traces to corresponding plots
     filelist = fig_files_left
     for file in filelist:
-        [driver, goal, water, density, extra, output] = decode_name(file,start_loc)
-        
-        df = pd.read_table(file, header = 0, 
-                    usecols = ['eps_xy(%)', 'tauxy'],
-                    delim_whitespace=True, skiprows=lambda x: x > 3 and x % skip)
-        
+        info    = decode_file(file)
+        density = str(info.Dr)
+        output  = info.output
+
+        df = load_txt(file, usecols = ['eps_xy(%)', 'tauxy'],
+                      stride = skip)
+        df = decimate(df, ['eps_xy(%)', 'tauxy'], points, ['eps_xy(%)'])
+
         df['tauxy'] = df['tauxy'].div(1000) # Pascal to kPa
         axs_row = stress_dict[output]
         if axs_row == 0:
             df.plot(ax=axs[axs_row,0], x = 'eps_xy(%)', y = 'tauxy',
-                    xlim  = (-4,4), 
-                    ylim  = (-ylimtop[density], ylimtop[density]),     
+                    xlim  = (-4,4),
+                    ylim  = (-ylimtop[density], ylimtop[density]),
                     style = color_dict[output],
-                    linewidth = 1, 
+                    linewidth = 1,
                     alpha  = 1,
                     legend = False)
         if axs_row == 1:
             df.plot(ax=axs[axs_row,0], x = 'eps_xy(%)', y = 'tauxy',
-                    xlim  = (-4,4), 
-                    ylim  = (-ylimbot[density], ylimbot[density]),     
+                    xlim  = (-4,4),
+                    ylim  = (-ylimbot[density], ylimbot[density]),
                     style = color_dict[output],
-                    linewidth = 1, 
+                    linewidth = 1,
                     alpha  = 1,
                     legend = False)
-        
+
     filelist = fig_files_right
     for file in filelist:
-        [driver, goal, water, density, extra, output] = decode_name(file,start_loc)
-        numCyc = int(extra[0][4:])   # number of cycles at each stress! required to avoid multiple points
-        
-        df = pd.read_table(file, header = 0, 
-                            delim_whitespace=True, skiprows=lambda x: x % numCyc)
-        
+        info   = decode_file(file)
+        if info.refine:   # refinements are drawn with their coarse pass (mrd_points)
+            continue
+        # refinements carry no _max: they go with the coarse pass of their Dr and Ncyc
+        family = [other for other in filelist if (decode_file(other).Dr, decode_file(other).Ncyc) == (info.Dr, info.Ncyc)
+                  and (decode_file(other).refine or decode_file(other).max_strain == info.max_strain)]
+        df     = mrd_points(family, mrd_loops)
+
         columns = [['G/Gmax2', 'G/Gmax3','G/Gmax4'],['Damp2','Damp3','Damp4']]
         for r in range(2):
             axs[r,1].plot(EPRI_0_6_m[0],   EPRI_0_6_m[r+1],   ls = "--", c = 'black', marker = "None")
             axs[r,1].plot(EPRI_36_76_m[0], EPRI_36_76_m[r+1], ls = "--", c = 'black', marker = "None")
-            
+
             for i,col in enumerate(columns[r]):
                 df.plot(ax=axs[r,1], x = 'eps_xy', y = col,
                         xlim = (0.0001,10), logx = True,
                         marker = 'o',
                         style = color_dict[i+2], #element
-                        linewidth = 1, 
+                        linewidth = 1,
                         alpha = 1,
                         legend = False)
-        
+
     for row,axes in enumerate(axs):
-        for col, axis in enumerate(axes):   
+        for col, axis in enumerate(axes):
             axis.set_xlabel("Shear strain γ (%)")
             axis.yaxis.set_minor_locator(AutoMinorLocator(n = 2))
             if col == 0:
@@ -152,17 +183,17 @@ for k,density in enumerate(['35', '55', '75']):
                 if row == 0:
                     text1 = text1 + "100 kPa"
                 if row == 1:
-                    text1 = text1 + "400 kPa" 
-                # text1 = text1 + element_dict[output]                        
-                axis.text(0.95, 0.05, text1,color=row_stress_color_dict[row], transform=axis.transAxes, ha = "right", 
+                    text1 = text1 + "400 kPa"
+                # text1 = text1 + element_dict[output]
+                axis.text(0.95, 0.05, text1,color=row_stress_color_dict[row], transform=axis.transAxes, ha = "right",
                           bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad = 2))
-                
+
             if col == 1:
                 if row == 0:
                     axis.set_ylabel('G / $G_{max}$')
                     axis.set_ylim(0,1.2)
                     text2 = "Dashed lines:\nEPRI (1993)\nfor depths of\n0-6m & 36-76m"
-                    axis.annotate(text2, xy=(0.034, 0.52), xytext=(0.00015, 0.07), 
+                    axis.annotate(text2, xy=(0.034, 0.52), xytext=(0.00015, 0.07),
                                   arrowprops=dict(arrowstyle="->"),
                                   bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad = 0))
                 if row == 1:
@@ -170,69 +201,93 @@ for k,density in enumerate(['35', '55', '75']):
                     axis.set_ylabel('ξ (%)')
                     axis.set_ylim(-10,60)
                     text3 = "Solid lines:\nSimulations for\nσ$'_{vc}$ = 100, 400, & 1600 kPa"
-                    axis.annotate(text3, xy=(0.3, 24), xytext=(0.00015, 44), 
+                    axis.annotate(text3, xy=(0.3, 24), xytext=(0.00015, 44),
                                   arrowprops=dict(arrowstyle="->"),
                                   bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad = 0))
-    
-    plt.subplots_adjust()
-    list181920 = ['17','18','19']
-    savefigname = "Fig4-" + list181920[k] + ".png"
-    plt.savefig(savefigname, dpi = 600, bbox_inches = 'tight')
-    plt.show()
-    plt.close()
-
-#%%
+
+    fig.subplots_adjust()
+    return fig
+
+def fig4_17(results_dir, sweep = "", skip = 1, points = 5000, loops = 1):
+    return mrd_figure(results_dir, '35', sweep, skip, points, loops)
+
+def fig4_18(results_dir, sweep = "", skip = 1, points = 5000, loops = 1):
+    return mrd_figure(results_dir, '55', sweep, skip, points, loops)
+
+def fig4_19(results_dir, sweep = "", skip = 1, points = 5000, loops = 1):
+    return mrd_figure(results_dir, '75', sweep, skip, points, loops)
 #-----------------------------------------------------------------------------------------
-# Function here keeps the _vol outputs (so DSS strain controlled drivers ran at the same strain for multiple
-# cycles). Fifth entry can be left either empty to keep all files OR received two entries: one for the 
-# Number of cycles applied and one for the strain at which the elements were exercised
-# Element 2 is kept for 100 kPa (can be changed, colors and annotations will be updated)
-
-fig_420_files = create_file_list(all_files,start_loc,[],['vol'],[],[],[['20'],['1']],['2'])
-
-# Create empty plot 
-fig, axs = plt.subplots(nrows = 1, ncols = 3, figsize=(8,4), squeeze = False)
-    
-for file in fig_420_files:
-    [driver, goal, water, density, extra, output] = decode_name(file,start_loc)
-    
-    df = pd.read_table(file, header = 0, 
-               usecols = ['eps_xy(%)', 'eps_yy(%)'],
-               delim_whitespace=True, skiprows=lambda x: x > 3 and x % skip)
-    
-    axs_col = dens_dict[density]
-    df.plot(ax=axs[0,axs_col], x = 'eps_xy(%)', y = 'eps_yy(%)',
-            xlim = (-2,2), 
-            ylim = (-0.5, 5),     
-            style = color_dict[output],
-            linewidth = 1, 
-            alpha = 1,
-            legend = False)
-    axs[0,axs_col].scatter(x = [0], y = [0],
-               color = "lightgrey",
-               edgecolors = "dimgrey",
-               s = 150,
-               zorder = 3)
- 
-for row,axes in enumerate(axs):
-    for col, axis in enumerate(axes):  
-        axis.xaxis.set_minor_locator(AutoMinorLocator(n = 2))
-        axis.yaxis.set_minor_locator(AutoMinorLocator(n = 2))
-        axis.invert_yaxis()
-        axis.set_xlabel("Shear strain γ (%)")
-        axis.set_ylabel('Vertical strain, $ε_v$ (%)')
-        text1 = "Drained Simple Shear\n"
-        text1 = text1 + "$D_{Ro}$ = "
-        text1 = text1 + "{:.0f}%, ".format(location_dens_dict[col])
-        text1 = text1 + "σ$'_{vc}$ = " +  element_dict[output]
-        axis.text(0.95, 0.05, text1, transform=axis.transAxes, ha = "right",
-                  bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad = 2))
-                
-plt.subplots_adjust()
-savefigname = "Fig4-20.png"
-plt.savefig(savefigname, dpi = 600, bbox_inches = 'tight')
-plt.show()
-plt.close()
+# Figure 4.20: vertical strain against shear strain of the _vol drivers
+def fig4_20(results_dir, sweep = "", skip = 1, points = 5000):
+    all_files = results_index(results_dir, sweep)
+
+    # Function here keeps the _vol outputs (so DSS strain controlled drivers ran at the same strain for multiple
+    # cycles). Fifth entry can be left either empty to keep all files OR received two entries: one for the
+    # Number of cycles applied and one for the strain at which the elements were exercised
+    # Element 2 is kept for 100 kPa (can be changed, colors and annotations will be updated)
+
+    fig_420_files = create_file_list(all_files, None, [],['vol'],[],[],[['20'],['1']],['2'])
+
+    # Create empty plot
+    fig, axs = plt.subplots(nrows = 1, ncols = 3, figsize=(8,4), squeeze = False)
+
+    for file in fig_420_files:
+        info    = decode_file(file)
+        density = str(info.Dr)
+        output  = info.output
+
+        df = load_txt(file, usecols = ['eps_xy(%)', 'eps_yy(%)'],
+                      stride = skip)
+        df = decimate(df, ['eps_xy(%)', 'eps_yy(%)'], points, ['eps_xy(%)'])
 
+        axs_col = dens_dict[density]
+        df.plot(ax=axs[0,axs_col], x = 'eps_xy(%)', y = 'eps_yy(%)',
+                xlim = (-2,2),
+                ylim = (-0.5, 5),
+                style = color_dict[output],
+                linewidth = 1,
+                alpha = 1,
+                legend = False)
+        axs[0,axs_col].scatter(x = [0], y = [0],
+                   color = "lightgrey",
+                   edgecolors = "dimgrey",
+                   s = 150,
+                   zorder = 3)
+
+    for row,axes in enumerate(axs):
+        for col, axis in enumerate(axes):
+            axis.xaxis.set_minor_locator(AutoMinorLocator(n = 2))
+            axis.yaxis.set_minor_locator(AutoMinorLocator(n = 2))
+            axis.invert_yaxis()
+            axis.set_xlabel("Shear strain γ (%)")
+            axis.set_ylabel('Vertical strain, $ε_v$ (%)')
+            text1 = "Drained Simple Shear\n"
+            text1 = text1 + "$D_{Ro}$ = "
+            text1 = text1 + "{:.0f}%, ".format(location_dens_dict[col])
+            text1 = text1 + "σ$'_{vc}$ = " +  element_dict[output]
+            axis.text(0.95, 0.05, text1, transform=axis.transAxes, ha = "right",
+                      bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad = 2))
+
+    fig.subplots_adjust()
+    return fig
+
+#-----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    plt.style.use(figure_style)
 
+    results_dir = "./../PM4Sand_Cyclic_DSS_drained_batch"
+    sweep       = ""   # sub-folder (sweep_dir of the generator) to plot, "" for the folder itself
+    skip        = 1    # 1 implies skipping no rows - can increase if slow
+    points      = 5000 # points per trace kept by peak-preserving decimation (0 keeps all rows)
+    loops       = 1    # 1: G/Gmax and damping recomputed from the element histories (_1.txt ... _5.txt)
+                       # at full precision, 0: read from the FLAC _MRD.txt (3 significant digits)
 
+    figures = [("Fig4-17.png", lambda: fig4_17(results_dir, sweep, skip, points, loops)),
+               ("Fig4-18.png", lambda: fig4_18(results_dir, sweep, skip, points, loops)),
+               ("Fig4-19.png", lambda: fig4_19(results_dir, sweep, skip, points, loops)),
+               ("Fig4-20.png", lambda: fig4_20(results_dir, sweep, skip, points))]
+    for savefigname, figure in figures:
+        fig = figure()
+        fig.savefig(savefigname, dpi = 600, bbox_inches = 'tight')
+        plt.show()
+        plt.close(fig)
\ No newline at end of file
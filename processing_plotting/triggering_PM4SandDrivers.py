@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+- Power-law fits of the CSR - N points of the undrained cyclic DSS drivers (_csrN.txt),
+  CSR = amp * N**-b, for every (driver, criterion) pair at once: the fit is the closed-form
+  least squares line of log10(CSR) on log10(N), so the sums it needs are accumulated over
+  all drivers with one groupby instead of one scipy.optimize.leastsq call per file and
+  criterion (power_fit of decode_PM4SandDrivers.py gives the same line)
+- criteria are the columns of cycles of the csrN files: 98% r_u, 1% and 3% shear strain
+- points with N <= 0 (criterion not reached) are left out of the fits, as in power_fit
+- the table of fits holds b, amp, the CSR at N cycles (CRR for N = 15), the number of
+  points fitted, R2 of the fit in log-log space and the range of N fitted; fits with fewer
+  than two distinct N come out as NaN
+- triggering_table is the triggering-correlation engine shared by the figures and exports:
+  the CRR (CSR at 15 cycles) of every driver and criterion from one pass over the csrN
+  points of a sweep, with the ratios to the CRR of the matching reference state
+    K_sigma = CRR / CRR at sig_vc = 1 atm    (same Dr, alpha, Ko)
+    K_alpha = CRR / CRR at alpha  = 0        (same Dr, sig_vc, Ko)
+    K_o     = CRR / CRR at Ko     = 0.5      (same Dr, sig_vc, alpha)
+  for any number of drivers: CRRs fitted from fewer than min_points points, and ratios
+  without a reference driver in the sweep, are NaN
+"""
+import numpy  as np
+import pandas as pd
+
+criteria   = ['N_to_98%_ru', 'N_to_1%_strain', 'N_to_3%_strain']
+references = {'K_sigma': ('sig_vc', 1.0), 'K_alpha': ('alpha', 0.0), 'K_o': ('Ko', 0.5)}
+
+#------------------------------------------------------------
+# table    = CSR - N points, e.g. csrN_table of dataset_PM4SandDrivers.py (column CSR and a
+#            column of cycles per criterion, one row per point)
+# criteria = columns of cycles fitted
+# N        = number of cycles at which the fitted CSR is returned (column CSR_N)
+# keys     = index levels identifying a driver (all levels but the last, point, if None)
+# returns one row per (driver, criterion) with columns b, amp, CSR_N, points, R2, N_min, N_max
+def power_fits(table, criteria = criteria, N = 15, keys = None):
+    keys    = list(table.index.names[:-1]) if keys is None else keys
+    cycles  = table[criteria].to_numpy(dtype = "float64")
+    csr     = table['CSR'].to_numpy(dtype = "float64")[:, None]
+    valid   = (cycles > 0) & (csr > 0)
+    x       = np.where(valid, np.log10(np.where(valid, cycles, 1.0)), 0.0)
+    y       = np.where(valid, np.log10(np.where(valid, csr, 1.0)), 0.0)
+    parts   = pd.DataFrame(np.hstack([valid, x, y, x * x, x * y, y * y]), index = table.index)
+    sums    = parts.groupby(level = keys).sum()
+    ranges  = pd.DataFrame(np.where(valid, cycles, np.nan), index = table.index).groupby(level = keys)
+    n, Sx, Sy, Sxx, Sxy, Syy = sums.to_numpy().reshape(len(sums), 6, len(criteria)).transpose(1, 0, 2)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        dxx   = n * Sxx - Sx * Sx
+        dxy   = n * Sxy - Sx * Sy
+        dyy   = n * Syy - Sy * Sy
+        slope = np.where(dxx > 0, dxy / dxx, np.nan)
+        amp   = 10.0**((Sy - slope * Sx) / n)
+        R2    = np.where(dyy > 0, dxy * dxy / (dxx * dyy), 1.0)
+    fits = {'b': -slope, 'amp': amp, 'CSR_N': amp * float(N)**slope, 'points': n.astype(int),
+            'R2': np.where(np.isnan(slope), np.nan, R2),
+            'N_min': ranges.min().to_numpy(), 'N_max': ranges.max().to_numpy()}
+    index = pd.MultiIndex.from_tuples([(key if isinstance(key, tuple) else (key,)) + (criterion,)
+                                       for key in sums.index for criterion in criteria],
+                                      names = keys + ['criterion'])
+    return pd.DataFrame({name: np.ravel(values) for name, values in fits.items()}, index = index)
+
+# Points of the fitted curve of one row of power_fits between the N fitted (for plotting)
+def fit_curve(fit, pts):
+    x = np.linspace(fit['N_min'], fit['N_max'], pts)
+    return x, fit['amp'] * x**-fit['b']
+#------------------------------------------------------------
+# table      = CSR - N points of a sweep (csrN_table), index (Dr, sig_vc, alpha, Ko, point)
+# N          = number of cycles of the CRR
+# min_points = fewest points of a fit giving a CRR
+# references = ratio name: (dimension, reference value)
+# criteria   = columns of cycles fitted (e.g. those of failure_table)
+# returns one row per (Dr, sig_vc, alpha, Ko, criterion) with columns CRR, b, points, R2
+# and one column per ratio
+def triggering_table(table, N = 15, min_points = 3, references = references, criteria = criteria):
+    fits     = power_fits(table, criteria, N = N)
+    triggers = pd.DataFrame({'CRR': fits['CSR_N'].where(fits['points'] >= min_points),
+                             'b': fits['b'], 'points': fits['points'], 'R2': fits['R2']})
+    for ratio, (dimension, value) in references.items():
+        reference = triggers['CRR'][triggers.index.get_level_values(dimension) == value].droplevel(dimension)
+        triggers[ratio] = triggers['CRR'].to_numpy() / reference.reindex(
+                          triggers.index.droplevel(dimension)).to_numpy()
+    return triggers
+''' EoF'''
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+- shared fixtures of the tests: the batch_generation and processing_plotting folders on
+  sys.path (their modules import each other by file name) and small sweeps generated with
+  the repo templates and "run" with the FLAC stand-in, so the post-processing engines are
+  tested on histories with the names and columns FLAC writes
+- small txt tables written directly (write) and mtimes moved on (later) for the tests of
+  the readers, the cache and the catalog
+"""
+import os
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ["batch_generation", "processing_plotting"]:
+    if os.path.join(repo, folder) not in sys.path:
+        sys.path.insert(0, os.path.join(repo, folder))
+
+#------------------------------------------------------------
+# Rows of an undrained element history (strain growing with the square of the row) and of
+# a drained one (loops of constant amplitude)
+cyclic_header  = "Ncyc CSR shear_strain sigv/sigvc ru"
+drained_header = "eps_xy(%) eps_yy(%) tauxy tauxy/sigvc sigv sigv/sigvc"
+
+def cyclic_row(row, scale = 1.0):
+    return [0.01 * row, 0.2 * np.sin(row), scale * 0.001 * row**2, 1.0 - 0.005 * row, 0.005 * row]
+
+def drained_row(row):
+    return [np.sin(0.1 * row), -0.01 * row, 3.0e4 * np.cos(0.1 * row), 0.3 * np.cos(0.1 * row), -1.0e5, 1.0]
+
+# Table of rows rows under a header line of column names, row(n) giving the values of row n,
+# followed by tail (e.g. a line cut short); returns the path as a string
+def write(path, rows, header = cyclic_header, row = cyclic_row, tail = ""):
+    with open(path, "w") as txt_file:
+        txt_file.write(header + "\n")
+        for n in range(rows):
+            txt_file.write(" ".join("{:.6e}".format(value) for value in row(n)) + "\n")
+        txt_file.write(tail)
+    return str(path)
+
+# Move the mtime of a file or folder one second on (file system clocks are coarse)
+def later(path):
+    stat = os.stat(path)
+    os.utime(path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+#------------------------------------------------------------
+# Undrained cyclic DSS sweep: drivers of two densities and two static biases (plus a CSR x 0.8
+# follow-up) generated and run with the stand-in; returns the results folder
+@pytest.fixture(scope = "session")
+def undrained_dir(tmp_path_factory):
+    from sweep_PM4SandDrivers  import generate_drivers
+    from standin_PM4SandDrivers import run_driver
+
+    source  = os.path.join(repo, "PM4Sand_Cyclic_DSS_undrained_batch")
+    folder  = str(tmp_path_factory.mktemp("undrained"))
+    for FileName in ["templ_uDSScyc.fis", "DSS_cyclic_undrained.fis"]:
+        shutil.copy(os.path.join(source, FileName), folder)
+
+    def base_name(p):
+        scale = "_CSRx" + str(p['CSR_scale']) if p.get('CSR_scale', 1.0) != 1.0 else ""
+        return "uDSS_cyc_Dr" + str(int(p['Dr']*100)) + scale + "_sig" + str(p['sig_vc']) + "_a" + str(p['alpha']) + "_Ko" + str(p['Ko'])
+
+    def fish_inputs(p):
+        scale = p.get('CSR_scale', 1.0)
+        return ([('$Dr', p['Dr']), ('$static_bias', p['alpha']), ('$confinement', p['sig_vc']), ('$Ko', p['Ko'])]
+                + ([('$CSR_scale', scale)] if scale != 1.0 else []))
+
+    design  = [{'Dr': Dr, 'sig_vc': 1, 'alpha': alpha, 'Ko': 0.5} for Dr in [0.35, 0.55] for alpha in [0.0, 0.1]]
+    design += [{'Dr': 0.35, 'sig_vc': 1, 'alpha': 0.0, 'Ko': 0.5, 'CSR_scale': 0.8}]
+    generate_drivers(os.path.join(folder, "templ_uDSScyc.fis"), os.path.join(folder, "DSS_cyclic_undrained.fis"),
+                     "batch_undrainedDSS_cyc.fis", design, base_name, fish_inputs, sweep_dir = folder)
+    for p in design:
+        run_driver(os.path.join(folder, base_name(p) + ".fis"))
+    return folder
+''' EoF'''
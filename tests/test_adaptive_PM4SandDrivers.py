@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+- adaptive_PM4SandDrivers.py: rounds of the adaptive CSR and MRD designs generated and run
+  with the stand-in until nothing new is planned; N = 15 bracketed within max_drivers, and
+  MRD follow-ups only between the strain levels where the curves change by more than tol
+"""
+import math
+import os
+import shutil
+
+from   conftest                import (repo)
+from   sweep_PM4SandDrivers    import (generate_drivers)
+from   standin_PM4SandDrivers  import (run_driver)
+from   adaptive_PM4SandDrivers import (adaptive_csr_design, adaptive_mrd_design, read_csrN, mrd_curves)
+
+#------------------------------------------------------------
+def csr_name(p):
+    scale = "_CSRx" + str(p['CSR_scale']) if p.get('CSR_scale', 1.0) != 1.0 else ""
+    return "uDSS_cyc_Dr" + str(int(p['Dr']*100)) + scale + "_sig" + str(p['sig_vc']) + "_a0.0_Ko0.5"
+
+def csr_inputs(p):
+    scale = p.get('CSR_scale', 1.0)
+    return ([('$Dr', p['Dr']), ('$static_bias', 0.0), ('$confinement', p['sig_vc']), ('$Ko', 0.5)]
+            + ([('$CSR_scale', scale)] if scale != 1.0 else []))
+
+def mrd_name(p):
+    refine = "_ref" + str(p['refine']) if p.get('refine', 0) else ""
+    return "dDSS_MRD_Dr" + str(int(p['Dr']*100)) + refine + "_Ncyc" + str(p['Ncyc'])
+
+def mrd_inputs(p):
+    if 'levels' not in p:
+        return [('$Dr', p['Dr']), ('$Ncycles', p['Ncyc']), ('$strain_count', p['gamma_count'])]
+    gammas = p['levels'] + [0.0] * (10 - len(p['levels']))
+    return ([('$Dr', p['Dr']), ('$Ncycles', p['Ncyc']), ('$strain_count', len(p['levels'])),
+             ('$strain_user', 1)] + [('$gamma_' + str(n + 1), gamma) for n, gamma in enumerate(gammas)])
+
+# Plan, generate and run the new drivers of each round until a round plans nothing new;
+# returns the designs of every round
+def rounds(folder, group, parts, plan, base_name, fish_inputs, output):
+    for name in parts:
+        shutil.copy(os.path.join(repo, group, name), folder)
+    designs = []
+    for _ in range(6):
+        design = plan()
+        generate_drivers(os.path.join(folder, parts[0]), os.path.join(folder, parts[1]), "batch_test.fis",
+                         design, base_name, fish_inputs, sweep_dir = folder)
+        designs.append(design)
+        new    = [p for p in design if not os.path.exists(os.path.join(folder, base_name(p) + output))]
+        if not new:
+            return designs
+        for p in new:
+            run_driver(os.path.join(folder, base_name(p) + ".fis"), rows_per_cycle = 20)
+    raise AssertionError("adaptive design still planning after 6 rounds")
+
+# Usable points (N_min < N < N_cap) of every parameter set, all its rounds pooled
+def usable(folder, design, N_min, N_cap):
+    points = {}
+    for p in design:
+        table = read_csrN(os.path.join(folder, csr_name(p) + "_csrN.txt"))
+        points.setdefault((p['Dr'], p['sig_vc']), []).extend(N for N in table['N_to_3%_strain'] if N_min < N < N_cap)
+    return points
+
+#------------------------------------------------------------
+# The first round misses N = 15 at 64 atm (the CSRs ignore K_sigma); a follow-up brings it in
+def test_csr_bracketed(tmp_path):
+    dims    = {'Dr': [0.35, 0.75], 'sig_vc': [1, 64]}
+    plan    = lambda: adaptive_csr_design(dims, csr_name, "batch_test.fis", str(tmp_path), max_drivers = 4)
+    designs = rounds(str(tmp_path), "PM4Sand_Cyclic_DSS_undrained_batch", ["templ_uDSScyc.fis", "DSS_cyclic_undrained.fis"],
+                     plan, csr_name, csr_inputs, "_csrN.txt")
+    assert len(designs[-1]) > len(designs[0])
+    for key, N in usable(str(tmp_path), designs[-1], 2.5, 150.0).items():
+        assert len(N) >= 3 and min(N) <= 15.0 <= max(N), key
+    for key in [(Dr, sig) for Dr in dims['Dr'] for sig in dims['sig_vc']]:
+        assert sum((p['Dr'], p['sig_vc']) == key for p in designs[-1]) <= 4
+
+# With a window of usable N too narrow to bracket, planning stops at max_drivers
+def test_csr_max_drivers(tmp_path):
+    dims    = {'Dr': [0.35], 'sig_vc': [1]}
+    plan    = lambda: adaptive_csr_design(dims, csr_name, "batch_test.fis", str(tmp_path), N_cap = 18.0, max_drivers = 2)
+    designs = rounds(str(tmp_path), "PM4Sand_Cyclic_DSS_undrained_batch", ["templ_uDSScyc.fis", "DSS_cyclic_undrained.fis"],
+                     plan, csr_name, csr_inputs, "_csrN.txt")
+    assert len(designs[-1]) == 2
+    N = usable(str(tmp_path), designs[-1], 2.5, 18.0)[(0.35, 1)]
+    assert not (len(N) >= 3 and min(N) <= 15.0 <= max(N))
+
+# Each follow-up level is the geometric mean of two neighbouring levels already run whose
+# G/Gmax or Damp / max Damp differ by more than tol, and every such pair gets one
+def test_mrd_refined_where_curves_change(tmp_path):
+    dims    = {'Dr': [0.35, 0.75], 'Ncyc': [3], 'gamma_count': [8]}
+    tol     = 0.1
+    plan    = lambda: adaptive_mrd_design(dims, mrd_name, "batch_test.fis", str(tmp_path), tol = tol, max_rounds = 2)
+    designs = rounds(str(tmp_path), "PM4Sand_Cyclic_DSS_drained_batch", ["templ_drDSScyc.fis", "DSS_cyclic_drained.fis"],
+                     plan, mrd_name, mrd_inputs, "_MRD.txt")
+    for Dr in dims['Dr']:
+        runs   = sorted((p for p in designs[-1] if p['Dr'] == Dr), key = lambda p: p.get('refine', 0))
+        assert [p.get('refine', 0) for p in runs] == [0, 1, 2]
+        curves = {}
+        for p in runs:
+            if p.get('refine', 0):
+                levels = sorted(curves)
+                damp   = max(max(curves[level][5:]) for level in levels)
+                split  = []
+                for low, high in zip(levels[:-1], levels[1:]):
+                    change = max([abs(b - a) for a, b in zip(curves[low][:5], curves[high][:5])] +
+                                 [abs(b - a) / damp for a, b in zip(curves[low][5:], curves[high][5:])])
+                    if change > tol and high / low > 1.5:
+                        split.append(math.sqrt(low * high))
+                assert 0 < len(split) < len(levels) - 1   # some pairs change less than tol
+                assert len(p['levels']) == len(split)
+                for level, expected in zip(p['levels'], split):
+                    assert math.isclose(level, expected, rel_tol = 5e-3)
+            curves.update(mrd_curves(read_csrN(os.path.join(str(tmp_path), mrd_name(p) + "_MRD.txt"))))
+''' EoF'''
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+- cache_PM4SandDrivers.py: .npy entries built, reused and rebuilt with their txt file, and
+  the session memo of load_txt
+"""
+import os
+import numpy  as np
+import pandas as pd
+import pytest
+
+import cache_PM4SandDrivers
+from   cache_PM4SandDrivers import (cache_name, cached_columns, read_txt, load_txt, clear_loaded)
+from   history_PM4SandDrivers import (parse_history)
+from   conftest import (write, later, cyclic_row)
+
+#------------------------------------------------------------
+@pytest.fixture(autouse = True)
+def empty_memo():
+    clear_loaded()
+    yield
+    clear_loaded()
+
+# The DataFrame of pd.read_csv, whole, by columns and decimated as the skiprows lambdas
+def test_read_txt_as_pandas(tmp_path):
+    txt_FileName = write(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.txt", 50)
+    for _ in range(2):   # parsed, then memory-mapped
+        df = read_txt(txt_FileName)
+        pd.testing.assert_frame_equal(df, pd.read_csv(txt_FileName, sep = r"\s+", header = 0))
+        df = read_txt(txt_FileName, usecols = ['ru', 'Ncyc'])
+        pd.testing.assert_frame_equal(df, pd.read_csv(txt_FileName, sep = r"\s+", header = 0, usecols = ['ru', 'Ncyc']))
+        df = read_txt(txt_FileName, stride = 4)
+        np.testing.assert_array_equal(df.to_numpy(), pd.read_csv(txt_FileName, sep = r"\s+", header = 0,
+                                      skiprows = lambda x: x > 3 and x % 4).to_numpy())
+        df = read_txt(txt_FileName, stride = 7, first = 0)
+        np.testing.assert_array_equal(df.to_numpy(), pd.read_csv(txt_FileName, sep = r"\s+", header = 0,
+                                      skiprows = lambda x: x % 7).to_numpy())
+
+# The entry is written next to the file, reused while the file is unchanged and rebuilt
+# once its size or mtime changes
+def test_entry_reused_and_rebuilt(tmp_path, monkeypatch):
+    txt_FileName = write(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.txt", 20)
+    columns, data = cached_columns(txt_FileName)
+    assert cache_name(txt_FileName) == str(tmp_path / "__npycache__" / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.npy")
+    assert os.path.isfile(cache_name(txt_FileName))
+    assert os.path.isfile(str(tmp_path / "__npycache__" / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.json"))
+    assert columns == ['Ncyc', 'CSR', 'shear_strain', 'sigv/sigvc', 'ru'] and data.shape == (5, 20)
+
+    parsed = []
+    def parse(txt_FileName, usecols = None):
+        parsed.append(txt_FileName)
+        return parse_history(txt_FileName, usecols)
+    monkeypatch.setattr(cache_PM4SandDrivers, "parse_history", parse)
+    assert isinstance(cached_columns(txt_FileName)[1], np.memmap) and parsed == []
+
+    write(txt_FileName, 25)                       # size changed
+    assert cached_columns(txt_FileName)[1].shape == (5, 25) and len(parsed) == 1
+    write(txt_FileName, 25, row = lambda n: cyclic_row(n, 2.0))          # same size, later mtime
+    later(txt_FileName)
+    assert cached_columns(txt_FileName)[1][2, -1] == pytest.approx(2.0 * 0.001 * 24**2) and len(parsed) == 2
+
+# Tables holding text are read from the txt file and leave no entry
+def test_non_numeric_not_cached(tmp_path):
+    txt_FileName = str(tmp_path / "uPSC_mono_Dr75_peakPhi.txt")
+    with open(txt_FileName, "w") as txt_file:
+        txt_file.write("Dr peak_phi mode\n35 32.1 drained\n55 36.4 drained\n")
+    assert cached_columns(txt_FileName) == (None, None)
+    assert not os.path.exists(str(tmp_path / "__npycache__" / "uPSC_mono_Dr75_peakPhi.npy"))
+    assert read_txt(txt_FileName)['mode'].tolist() == ['drained', 'drained']
+
+# The memo returns copies, drops a file rewritten since and keeps to load_budget, its
+# running total always the bytes of the DataFrames it holds
+def test_load_txt_memo(tmp_path, monkeypatch):
+    names = [write(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_{}.txt".format(n), 100) for n in range(1, 4)]
+    df = load_txt(names[0])
+    df['ru'] = -1.0
+    assert (load_txt(names[0])['ru'] >= 0.0).all()
+    assert len(cache_PM4SandDrivers._loaded) == 1
+
+    write(names[0], 100, row = lambda n: cyclic_row(n, 2.0))
+    later(names[0])
+    assert load_txt(names[0])['shear_strain'].iloc[-1] == pytest.approx(2.0 * 0.001 * 99**2)
+    assert len(cache_PM4SandDrivers._loaded) == 1   # the former entry of the file is dropped
+
+    size = load_txt(names[0]).memory_usage(index = False).sum()
+    monkeypatch.setattr(cache_PM4SandDrivers, "load_budget", 2 * size)
+    load_txt(names[1])
+    load_txt(names[0])   # most recently used
+    load_txt(names[2])
+    assert [key[0] for key in cache_PM4SandDrivers._loaded] == [os.path.abspath(names[0]), os.path.abspath(names[2])]
+    assert cache_PM4SandDrivers._used == 2 * size
+    load_txt(names[1], usecols = ['ru'])
+    assert cache_PM4SandDrivers._used == sum(df.memory_usage(index = False).sum()
+                                             for df, nbytes in cache_PM4SandDrivers._loaded.values())
+    clear_loaded()
+    assert not cache_PM4SandDrivers._loaded and cache_PM4SandDrivers._used == 0
+''' EoF'''
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+- catalog_PM4SandDrivers.py: catalog of a results folder with a sweep sub-folder, refreshed
+  incrementally as files are added, removed and rewritten
+"""
+import os
+
+from   catalog_PM4SandDrivers import (open_catalog, refresh_catalog, catalog_files, results_index)
+from   decode_PM4SandDrivers  import (create_file_list)
+from   cost_PM4SandDrivers    import (timing_name)
+from   conftest               import (write, later)
+
+#------------------------------------------------------------
+def results(tmp_path):
+    os.makedirs(tmp_path / "sweep_a" / "__npycache__")
+    for n in range(1, 6):
+        write(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_{}.txt".format(n), 10)
+        write(tmp_path / "sweep_a" / "uDSS_cyc_Dr55_sig4_a0.1_Ko0.5_{}.txt".format(n), 10 if n < 5 else 7)
+    write(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_csrN.txt", 5, "CSR N_to_98%_ru", lambda n: [0.1, 10.0 + n])
+    write(tmp_path / "notes.txt", 3)
+    write(tmp_path / "sweep_a" / "__npycache__" / "uDSS_cyc_Dr75_sig1_a0.0_Ko0.5_1.txt", 3)
+    return str(tmp_path)
+
+# Decoded fields, sweeps and completion (a truncated history is incomplete)
+def test_catalog_contents(tmp_path):
+    results_dir = results(tmp_path)
+    files = catalog_files(results_dir, "goal = 'cyc' AND output IN ('1', '2', '3', '4', '5')")
+    assert len(files) == 10
+    assert catalog_files(results_dir, "Dr = ? AND sig = ? AND alpha = ?", (55, 4, 0.1)) == \
+           [os.path.join(results_dir, "sweep_a", "uDSS_cyc_Dr55_sig4_a0.1_Ko0.5_{}.txt".format(n)) for n in range(1, 6)]
+    assert catalog_files(results_dir, "NOT complete") == [os.path.join(results_dir, "sweep_a", "uDSS_cyc_Dr55_sig4_a0.1_Ko0.5_5.txt")]
+    assert catalog_files(results_dir, "output = 'csrN' AND rows = 5") == [os.path.join(results_dir, "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_csrN.txt")]
+    assert not catalog_files(results_dir, "Dr = 75")   # __npycache__ left out
+    assert len(catalog_files(results_dir)) == 11        # notes.txt left out
+
+# Unchanged folders are not scanned again; added, removed and rewritten files are picked up
+def test_incremental_refresh(tmp_path):
+    results_dir = results(tmp_path)
+    connection  = open_catalog(results_dir)
+    assert refresh_catalog(connection, results_dir) == (0, 0)
+
+    write(tmp_path / "sweep_a" / "uDSS_cyc_Dr55_sig4_a0.1_Ko0.5_5.txt", 10)
+    os.remove(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_csrN.txt")
+    later(tmp_path / "sweep_a" / "uDSS_cyc_Dr55_sig4_a0.1_Ko0.5_5.txt")
+    later(tmp_path)
+    assert refresh_catalog(connection, results_dir) == (1, 1)   # root only: sweep_a kept its mtime
+    assert connection.execute("SELECT COUNT(*) FROM files WHERE output = 'csrN'").fetchone() == (0,)
+
+    later(tmp_path / "sweep_a")
+    assert refresh_catalog(connection, results_dir) == (1, 1)
+    assert connection.execute("SELECT MIN(complete), MAX(rows) FROM files WHERE sweep = 'sweep_a'").fetchone() == (1, 10)
+
+    write(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.txt", 12)       # rewritten in place
+    later(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.txt")
+    assert refresh_catalog(connection, results_dir) == (0, 0)
+    assert refresh_catalog(connection, results_dir, full = True)[1] == 2
+    assert connection.execute("SELECT SUM(complete) FROM files WHERE sweep = '' AND output != 'csrN'").fetchone() == (1,)
+    connection.close()
+
+# The timing sidecar the queue leaves next to the outputs is not a result file
+def test_timing_sidecar_left_out(tmp_path):
+    results_dir = results(tmp_path)
+    with open(os.path.join(results_dir, timing_name("uDSS_cyc_Dr35_sig1_a0.0_Ko0.5")), "w") as time_file:
+        time_file.write('{"seconds": 12.5}\n')
+    assert len(catalog_files(results_dir)) == 11
+    assert len(create_file_list(results_index(results_dir), None, [], [], [], ['35'])) == 6
+
+# The index of a sweep is built once and rebuilt when the catalog lists other files
+def test_results_index(tmp_path):
+    results_dir = results(tmp_path)
+    index       = results_index(results_dir, "sweep_a")
+    assert results_index(results_dir, "sweep_a") is index
+    assert len(create_file_list(index, None, [], ['cyc'])) == 5
+    write(tmp_path / "sweep_a" / "uDSS_cyc_Dr55_sig4_a0.1_Ko0.5_csrN.txt", 5, "CSR N_to_98%_ru", lambda n: [0.1, 10.0 + n])
+    later(tmp_path / "sweep_a")
+    rebuilt     = results_index(results_dir, "sweep_a")
+    assert rebuilt is not index and len(create_file_list(rebuilt, None, [], ['cyc'])) == 6
+    assert len(create_file_list(results_index(results_dir), None, [], ['cyc'])) == 6
+''' EoF'''
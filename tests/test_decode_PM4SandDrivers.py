@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+- decode_PM4SandDrivers.py: file names decoded as the plotting scripts always read them
+"""
+import pytest
+
+from   decode_PM4SandDrivers import (decode_file, decode_name, create_file_list)
+
+#------------------------------------------------------------
+# The former list interface, for every family of drivers
+@pytest.mark.parametrize("name, expected", [
+    ("uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_1.txt",  ['DSS', 'cyc', 'u', '35', ['sig1', 'a0.0', 'Ko0.5'], '1']),
+    ("uDSS_cyc_Dr55_sig4_a0.2_Ko0.5_csrN.txt", ['DSS', 'cyc', 'u', '55', ['sig4', 'a0.2', 'Ko0.5'], 'csrN']),
+    ("dDSS_MRD_Dr75_Ncyc3_max1%_MRD.txt",    ['DSS', 'MRD', 'd', '75', ['Ncyc3', 'max1%'], 'MRD']),
+    ("dDSS_vol_Dr35_Ncyc3_max1%_2.txt",      ['DSS', 'vol', 'd', '35', ['Ncyc3', 'max1%'], '2']),
+    ("uDSS_rec_Dr55_sig1_a0.0_evol.txt",     ['DSS', 'rec', 'u', '55', ['sig1', 'a0.0'], 'evol']),
+    ("uPSC_mono_Dr75_peakPhi.txt",           ['PSC', 'mono', 'u', '75', 0, 'peakPhi'])])
+def test_decode_name(name, expected):
+    assert decode_name("results/" + name) == expected
+
+# Follow-ups of the adaptive designs keep density and extra pieces where the scripts read them
+def test_follow_ups():
+    info = decode_file("uDSS_cyc_Dr35_CSRx0.8_sig1_a0.0_Ko0.5_3.txt")
+    assert (info.Dr, info.CSR_scale, info.sig, info.alpha, info.output) == (35, 0.8, 1, 0.0, '3')
+    assert decode_name("dDSS_MRD_Dr35_ref1_Ncyc3_MRD.txt")[3:5] == ['35', ['ref1', 'Ncyc3']]
+    info = decode_file("dDSS_MRD_Dr35_ref1_Ncyc3_MRD.txt")
+    assert (info.Dr, info.refine, info.Ncyc, info.max_strain, info.output) == (35, 1, 3, None, 'MRD')
+
+# Names out of the convention: None from decode_file, a ValueError naming the file from decode_name
+def test_nonconforming_name():
+    assert decode_file("results/notes.txt") is None
+    with pytest.raises(ValueError, match = "notes.txt"):
+        decode_name("results/notes.txt")
+
+def test_start_loc_warns():
+    with pytest.warns(DeprecationWarning):
+        assert decode_name("results/uPSC_mono_Dr75_1.txt", 8)[1] == 'mono'
+
+# Former positional calls create_file_list(all_files, start_loc, ...) keep their filters in place
+def test_create_file_list_start_loc():
+    files = ["results/uPSC_mono_Dr75_1.txt", "results/dDSS_mono_Dr35_1.txt", "results/dDSS_mono_Dr35_2.txt"]
+    assert create_file_list(files, None, ['DSS'], [], ['d'], ['35'], [], ['2']) == files[2:]
+    with pytest.warns(DeprecationWarning):
+        assert create_file_list(files, 8, ['DSS'], [], ['d'], ['35'], [], ['2']) == files[2:]
+''' EoF'''
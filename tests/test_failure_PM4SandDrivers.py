@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+- failure_PM4SandDrivers.py: criteria applied to the stored histories against the
+  _csrN.txt written with them
+"""
+import numpy  as np
+import pandas as pd
+
+from   dataset_PM4SandDrivers import (csrN_table)
+from   failure_PM4SandDrivers import (failure_table, first_crossings, half_cycles_before)
+
+flac_criteria = {'N_to_98%_ru':    ('ru',             '>=', 0.98),
+                 'N_to_1%_strain': ('|shear_strain|', '>=', 1.0),
+                 'N_to_3%_strain': ('|shear_strain|', '>=', 3.0)}
+
+#------------------------------------------------------------
+# Half cycles are counted at the reversals of the CSR, separately in each history
+def test_half_cycles_before_counts_reversals():
+    csr     = np.array([0.0, 0.1, 0.2, 0.1, 0.0, 0.0, -0.1, 0.0, 0.1,   0.0, 0.2, 0.1])
+    history = np.array([0,   0,   0,   0,   0,   0,    0,   0,   0,     1,   1,   1])
+    before  = half_cycles_before(csr, history, np.array([0, 9]))
+    assert before.tolist() == [0.0, 0.0, 0.0, 0.5, 0.5, 0.5, 0.5, 1.0, 1.0,   0.0, 0.0, 0.5]
+
+# With half_cycles the counts are those FLAC writes in _csrN.txt for every criterion reached
+def test_half_cycles_match_csrN(undrained_dir):
+    points = failure_table(undrained_dir, flac_criteria, half_cycles = True)
+    flac   = csrN_table(undrained_dir).loc[points.index]
+    assert len(points) == len(flac) == 25
+    np.testing.assert_allclose(points['CSR'], flac['CSR'], rtol = 1e-4)
+    for name in flac_criteria:
+        reached = points[name].notna()
+        assert reached.sum() > 0
+        np.testing.assert_array_equal(points.loc[reached, name], flac.loc[reached, name])
+
+# Continuous counts fall within the half cycle FLAC reports (to one row: 100 rows per cycle)
+def test_continuous_counts_within_half_cycle(undrained_dir):
+    points = failure_table(undrained_dir, flac_criteria)
+    flac   = csrN_table(undrained_dir).loc[points.index]
+    for name in flac_criteria:
+        gap = (flac[name] - points[name]).dropna()
+        assert ((gap >= -0.01) & (gap <= 0.51)).all()
+
+# Follow-up points are pooled with their parameter set, the CSR scale kept as a column
+def test_follow_ups_pooled(undrained_dir):
+    points = failure_table(undrained_dir, flac_criteria)
+    pooled = points.xs((35, 1.0, 0.0, 0.5), level = ['Dr', 'sig_vc', 'alpha', 'Ko'])
+    assert len(pooled) == 10
+    assert sorted(set(pooled['CSR_scale'])) == [0.8, 1.0]
+    only   = failure_table(undrained_dir, flac_criteria, CSR_scale = 1.0)
+    assert len(only) == 20
+
+# Histories never meeting a criterion give NaN
+def test_unreached_criterion_is_nan():
+    index = pd.MultiIndex.from_product([[35], [1.0], [0.0], [0.5], [1.0], [1], range(4)],
+                                       names = ['Dr', 'sig_vc', 'alpha', 'Ko', 'CSR_scale', 'element', 'step'])
+    data  = pd.DataFrame({'Ncyc': [0.0, 0.25, 0.5, 0.75], 'CSR': [0.0, 0.1, 0.0, -0.1],
+                          'ru':   [0.0, 0.5, 0.9, 0.99]}, index = index)
+    table = first_crossings(data, {'N_to_98%_ru': ('ru', '>=', 0.98), 'N_to_99.5%_ru': ('ru', '>=', 0.995)})
+    assert table['CSR'].tolist() == [0.1]
+    assert table['N_to_98%_ru'].tolist() == [0.75]
+    assert np.isnan(table['N_to_99.5%_ru']).all()
+''' EoF'''
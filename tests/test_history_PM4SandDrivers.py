@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+- history_PM4SandDrivers.py: vectorized parsing and striding against the pandas reads they
+  replace, peak-preserving decimation, and the continuous cycle count of $N_gama against
+  a line-by-line transliteration of the FISH loops
+- the chunked reads (iter_history, first_crossing, read_to_cycle) against read_history on
+  files of several chunks, crossings on and next to a chunk boundary, and the early stop
+"""
+import numpy  as np
+import pandas as pd
+import pytest
+
+from   history_PM4SandDrivers import (parse_history, stride_rows, read_history, decimate_rows, decimate,
+                                 continuous_blocks, continuous_cycles, iter_history, first_crossing,
+                                 read_to_cycle)
+from   conftest               import (write, drained_header, drained_row)
+
+#------------------------------------------------------------
+def write_drained(path, rows, tail = ""):
+    return write(path, rows, drained_header, drained_row, tail)
+
+# Same columns and values as pd.read_csv, whole and by columns
+def test_parse_as_pandas(tmp_path):
+    txt_FileName = write_drained(tmp_path / "dDSS_MRD_Dr55_Ncyc3_max1%_1.txt", 40)
+    names, data  = parse_history(txt_FileName)
+    df           = pd.read_csv(txt_FileName, sep = r"\s+", header = 0)
+    assert names == df.columns.tolist()
+    np.testing.assert_array_equal(data, df.to_numpy())
+    names, data  = parse_history(txt_FileName, usecols = ['tauxy', 'eps_xy(%)'])
+    assert names == ['eps_xy(%)', 'tauxy']
+    np.testing.assert_array_equal(data, df[names].to_numpy())
+
+# A last line cut short (driver still writing) is dropped; header-only tables are empty
+@pytest.mark.parametrize("tail", ["1.0e-02 -2.0e-03 4.1e+0", "1.0e-02 -2.0e-03\n"])
+def test_last_line_cut_short(tmp_path, tail):
+    names, data = parse_history(write_drained(tmp_path / "dDSS_MRD_Dr55_Ncyc3_max1%_1.txt", 40, tail))
+    assert data.shape == (40, 6)
+    names, data = parse_history(write_drained(tmp_path / "dDSS_MRD_Dr55_Ncyc3_max1%_2.txt", 0))
+    assert data.shape == (0, 6)
+
+# The rows of skiprows = lambda x: x > 3 and x % skip (first = 3) and lambda x: x % numCyc
+# (first = 0), header line x = 0 left out
+@pytest.mark.parametrize("n_rows", [0, 2, 3, 10, 101])
+@pytest.mark.parametrize("stride", [1, 2, 5, 7])
+def test_stride_rows_as_skiprows(n_rows, stride):
+    rows = np.arange(n_rows)
+    kept = [x - 1 for x in range(1, n_rows + 1) if not (x > 3 and x % stride)]
+    assert rows[stride_rows(n_rows, stride)].tolist() == kept
+    kept = [x - 1 for x in range(1, n_rows + 1) if not x % stride]
+    assert rows[stride_rows(n_rows, stride, first = 0)].tolist() == kept
+
+def test_read_history_strided(tmp_path):
+    txt_FileName = write_drained(tmp_path / "dDSS_MRD_Dr55_Ncyc3_max1%_1.txt", 60)
+    df = read_history(txt_FileName, usecols = ['eps_xy(%)', 'tauxy'], stride = 6)
+    np.testing.assert_array_equal(df.to_numpy(), pd.read_csv(txt_FileName, sep = r"\s+", header = 0,
+                                  usecols = ['eps_xy(%)', 'tauxy'], skiprows = lambda x: x > 3 and x % 6).to_numpy())
+#------------------------------------------------------------
+# Loops of growing amplitude, 1000 rows per cycle, with a ripple on the strain
+def loops(cycles = 6, m = 1000):
+    theta  = 2.0 * np.pi * np.arange(cycles * m) / m
+    strain = np.linspace(0.1, 4.0, theta.size) * np.sin(theta - 0.3) + 0.01 * np.sin(37.0 * theta)
+    return pd.DataFrame({'shear_strain': strain, 'CSR': 0.2 * np.sin(theta)})
+
+# Within the budget, with the ends, the extremes, every reversal of the CSR and the rows
+# around each first crossing
+def test_decimate_keeps_shape():
+    df   = loops()
+    kept = decimate(df, ['shear_strain', 'CSR'], 400, ['CSR'], [('shear_strain', 1.0), ('shear_strain', 3.0)])
+    rows = kept.index.to_numpy()
+    assert len(kept) < 450 and rows[0] == 0 and rows[-1] == len(df) - 1
+    assert (np.diff(rows) > 0).all()
+    for name in ['shear_strain', 'CSR']:
+        assert kept[name].max() == df[name].max() and kept[name].min() == df[name].min()
+    csr   = df['CSR'].to_numpy()
+    peaks = np.flatnonzero(np.sign(np.diff(csr[1:])) != np.sign(np.diff(csr[:-1]))) + 1
+    assert peaks.size == 12 and np.isin(peaks, rows).all()
+    for level in [1.0, 3.0]:
+        hit = np.flatnonzero(np.abs(df['shear_strain'].to_numpy()) >= level)[0]
+        assert np.isin([hit - 1, hit], rows).all()
+
+# Extremes per bucket, reversals at the start of their plateau, crossings; short traces
+# and points <= 0 keep every row
+def test_decimate_rows():
+    values = np.array([0.0, 5.0, 5.0, 1.0, 2.0, -3.0, 0.0, 0.0, 4.0, 1.0, 1.0, 0.5])
+    assert decimate_rows([values], 4).tolist() == [0, 1, 5, 6, 8, 11]
+    assert decimate_rows([values], 2, reversals = [values]).tolist() == [0, 1, 3, 4, 5, 8, 11]
+    assert decimate_rows([values], 2, crossings = [(values, 4.5), (values, 9.0)]).tolist() == [0, 1, 5, 11]
+    assert decimate_rows([values], 0).tolist() == list(range(12))
+    assert decimate_rows([values], 12).tolist() == list(range(12))
+#------------------------------------------------------------
+# $N_gama of DSS_cyclic_undrained.fis line by line, for the half-cycle counts of the table
+# rows first_row, first_row + 1, ... (rows before first_row read 0, as undefined in FISH)
+def N_gama(counts, first_row = 3):
+    size     = first_row - 1 + len(counts)
+    tab2     = dict.fromkeys(range(1, size + 1), 0.0)
+    tab2.update(zip(range(first_row, size + 1), counts))
+    halfcyc  = int(max([0.0] + [numcyc * 2 for numcyc in counts]))
+    tab3     = {}
+    N0       = 0.0
+    laststep = 0
+    for j in range(1, halfcyc + 1):
+        for i in range(1, size + 1):
+            if tab2[i] < N0 + 0.5:
+                laststep    = i
+                tab3[1]     = 0
+                tab3[j + 1] = laststep + 1
+            if laststep < size:
+                tab3[j + 2] = size
+        N0 = N0 + 0.5
+    size2  = len(tab3) - 1
+    ncycf  = 0.0
+    column = []
+    for i in range(first_row, size + 1):
+        for j in range(1, size2 + 1):
+            x0 = tab3[j]
+            x1 = tab3[j + 1]
+            dn = 0.5 / (x1 - x0 + 0.01)
+            if j == size2:
+                dn = 0.5 / (x0 - tab3[j - 1] + 0.01)
+            if x0 < i < x1:
+                ncycf = ncycf + dn
+        column.append(ncycf)
+    return np.array(column)
+
+# Half-cycle counts of rows at the steps $his_steps writes: a few rows at 0, then half
+# cycles of random length (a row may reach two at once), a last one incomplete
+def half_cycle_counts(seed, halves = 40):
+    rng   = np.random.default_rng(seed)
+    steps = rng.choice([0.0, 0.0, 0.0, 0.5], size = halves * 8)
+    steps[:5] = 0.0
+    steps[rng.integers(5, steps.size)] = 1.0
+    return np.cumsum(steps)[:rng.integers(steps.size // 2, steps.size)]
+
+@pytest.mark.parametrize("seed", range(6))
+def test_continuous_cycles_as_N_gama(seed):
+    counts = half_cycle_counts(seed)
+    np.testing.assert_allclose(continuous_cycles(counts), N_gama(counts), rtol = 0.0, atol = 1e-12)
+
+# The counts do not depend on how the column is cut in blocks (to round-off: the sums restart
+# at each block); each block but the last ends on the row completing a half cycle
+@pytest.mark.parametrize("seed", range(4))
+def test_continuous_blocks_split(seed):
+    counts = half_cycle_counts(seed)
+    cuts   = np.sort(np.random.default_rng(seed).integers(0, counts.size, size = 7))
+    blocks = list(continuous_blocks(np.split(counts, cuts)))
+    np.testing.assert_allclose(np.concatenate(blocks), continuous_cycles(counts), rtol = 0.0, atol = 1e-12)
+    ends   = np.cumsum([block.size for block in blocks])[:-1] - 1
+    assert (np.floor(2.0 * counts[ends]) > np.floor(2.0 * counts[ends - 1])).all()
+
+def test_no_complete_half_cycle():
+    assert continuous_cycles(np.zeros(5)).tolist() == [0.0] * 5
+    assert continuous_cycles(np.zeros(0)).size == 0
+#------------------------------------------------------------
+# Undrained element history of rows rows: a half cycle every 25 rows, |shear_strain| < 1 up
+# to row cross and 2.5 from it on; lines that do not parse can follow (never to be read)
+# cycle = 'Ncyc' (continuous count) or 'Nhalf' (half-cycle counts of $skip_N_gama = 1)
+def write_cyclic(path, rows, cross, cycle = 'Ncyc', tail = ""):
+    def row(n):
+        count  = np.floor(n / 25) / 2.0 if cycle == 'Nhalf' else n / 50.0
+        strain = 0.9 * np.sin(0.3 * n) if n < cross else 2.5 * (-1) ** n
+        return [count, 0.2 * np.cos(0.3 * n), strain, 1.0 - 0.001 * n, 0.001 * n]
+    return write(path, rows, cycle + " CSR shear_strain sigv/sigvc ru", row, tail)
+
+# Blocks put together are the rows of read_history, whatever the chunk size
+@pytest.mark.parametrize("cycle", ['Ncyc', 'Nhalf'])
+@pytest.mark.parametrize("chunk_rows", [7, 50, 1000])
+def test_iter_history_as_read_history(tmp_path, cycle, chunk_rows):
+    txt_FileName = write_cyclic(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_2.txt", 487, 100, cycle)
+    for usecols in [None, ['shear_strain', 'Ncyc']]:
+        blocks = list(iter_history(txt_FileName, usecols, chunk_rows))
+        assert [row for row, data in blocks] == list(np.cumsum([0] + [data.shape[0] for row, data in blocks])[:-1])
+        expected = read_history(txt_FileName, usecols).to_numpy()
+        np.testing.assert_allclose(np.concatenate([data for row, data in blocks]), expected, rtol = 0.0, atol = 1e-12)
+
+# First crossing on the last row of a chunk, the first row of the next and inside one; the
+# chunks after it are not read
+@pytest.mark.parametrize("cross", [99, 100, 120])
+def test_first_crossing(tmp_path, cross):
+    txt_FileName = write_cyclic(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_2.txt", 150, cross, tail = "x x x x x\n" * 3)
+    row, values  = first_crossing(txt_FileName, 'shear_strain', 2.0, chunk_rows = 50)
+    expected     = read_history(write_cyclic(tmp_path / "full_2.txt", 150, cross)).iloc[cross]
+    assert row == cross and values == expected.to_dict()
+    assert first_crossing(tmp_path / "full_2.txt", 'shear_strain', 3.0, chunk_rows = 50) is None
+
+# Rows up to the first one past the cycle count of the crossing (Ncyc from the half-cycle
+# counts, to round-off), as read_history strides them; the chunks after it are not read
+@pytest.mark.parametrize("cross", [99, 100, 149])
+@pytest.mark.parametrize("stride", [1, 3])
+def test_read_to_cycle(tmp_path, cross, stride):
+    txt_FileName = write_cyclic(tmp_path / "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5_2.txt", 200, cross, 'Nhalf',
+                                tail = "x x x x x\n" * 3)
+    stop, df     = read_to_cycle(txt_FileName, 'shear_strain', 2.0, usecols = ['Ncyc', 'shear_strain'],
+                                 stride = stride, chunk_rows = 50)
+    full         = read_history(write_cyclic(tmp_path / "full_2.txt", 200, cross, 'Nhalf'),
+                                usecols = ['Ncyc', 'shear_strain'])
+    assert stop == pytest.approx(full['Ncyc'].iloc[cross], abs = 1e-12)
+    expected     = read_history(tmp_path / "full_2.txt", usecols = ['Ncyc', 'shear_strain'], stride = stride)
+    expected     = expected[expected['Ncyc'] <= stop + 1e-9]
+    assert df.columns.tolist() == ['Ncyc', 'shear_strain']
+    np.testing.assert_allclose(df.to_numpy(), expected.to_numpy(), rtol = 0.0, atol = 1e-12)
+    assert read_to_cycle(tmp_path / "full_2.txt", 'shear_strain', 3.0, chunk_rows = 50) == (None, None)
+''' EoF'''
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+- loops_PM4SandDrivers.py: cycles of synthetic sinusoidal loops whose secant modulus and
+  damping are known in closed form
+"""
+import numpy as np
+
+from   loops_PM4SandDrivers import (cycle_loops)
+
+#------------------------------------------------------------
+# Elliptic loop of n cycles, m rows per cycle: strain (%) = A sin(theta) and tau (Pa) =
+# G gamma + c cos(theta), gamma = A / 100. Its secant modulus is G and the trapezoids of a cycle
+# sum to the area of the m-gon inscribed in the ellipse, pi gamma c sin(2 pi/m) / (2 pi/m), so
+# Damp = 100 c / (2 G gamma) sin(2 pi/m) / (2 pi/m). With m = 4k + 2 the peaks of strain fall
+# on rows and its zero crossings half-way between rows
+def ellipse(A, G, c, n, m = 402):
+    theta  = 2.0 * np.pi * (np.arange(n * m) + 0.5) / m
+    strain = A * np.sin(theta)
+    return strain, G * strain / 100.0 + c * np.cos(theta)
+
+def test_sinusoidal_loops():
+    loops = [(0.1, 50.0e6, 20.0e3), (1.0, 8.0e6, 5.0e3)]   # A (%), G (Pa), c (Pa)
+    m     = 402
+    parts = [ellipse(A, G, c, n = 4, m = m) for A, G, c in loops]
+    table = cycle_loops(np.concatenate([strain for strain, tau in parts]),
+                        np.concatenate([tau for strain, tau in parts]), [0, parts[0][0].size])
+    # a cycle starts where the strain turns positive: the part before the first one is left out
+    assert table['history'].tolist() == [0, 0, 0, 1, 1, 1]
+    assert table['cycle'].tolist()   == [1, 2, 3, 1, 2, 3]
+    for history, (A, G, c) in enumerate(loops):
+        cycles = table[table['history'] == history]
+        np.testing.assert_allclose(cycles['eps_xy'], A, rtol = 1e-12)
+        np.testing.assert_allclose(cycles['G'], G / 1000.0, rtol = 1e-12)
+        np.testing.assert_allclose(cycles['G/Gmax'], 1.0, rtol = 1e-12)
+        polygon = np.sin(2.0 * np.pi / m) / (2.0 * np.pi / m)
+        np.testing.assert_allclose(cycles['Damp'], 100.0 * c / (2.0 * G * A / 100.0) * polygon, rtol = 1e-12)
+
+# Boundary rows go to the later cycle: a step in stiffness at a boundary shows in that cycle only
+def test_boundary_row_in_later_cycle():
+    strain, tau = ellipse(0.1, 50.0e6, 0.0, n = 3)
+    first       = np.flatnonzero((strain[:-1] <= 0.0) & (strain[1:] > 0.0))
+    tau[first[1]:] *= 0.5
+    table = cycle_loops(strain, tau, [0])
+    np.testing.assert_allclose(table['G/Gmax'], [1.0, 0.5], rtol = 1e-12)
+''' EoF'''
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+- plotting_all_*.py: the figure functions build on the stand-in sweep, importing the
+  scripts draws and writes nothing, and the figures are reached from the package and saved
+  by python -m processing_plotting figure
+"""
+import os
+import subprocess
+import sys
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pytest
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#------------------------------------------------------------
+@pytest.mark.parametrize("name", ["fig4_2", "fig4_5", "fig4_6", "fig4_7", "fig4_8", "fig4_9", "fig4_10", "fig4_11"])
+def test_undrained_figures(undrained_dir, name):
+    import processing_plotting as pp
+    with plt.style.context(pp.figure_style):
+        fig = getattr(pp, name)(undrained_dir)
+        assert isinstance(fig, matplotlib.figure.Figure) and fig.axes
+        assert any(axis.lines or axis.collections for axis in fig.axes)
+    plt.close(fig)
+
+# Importing the scripts leaves the folder, the style and the open figures as they were
+def test_import_no_side_effects(tmp_path):
+    code = ("import matplotlib; matplotlib.use('Agg'); import matplotlib.pyplot as plt\n"
+            "rc = dict(plt.rcParams)\n"
+            "import plotting_all_undrained_cyclic_DSS, plotting_all_monotonic\n"
+            "import plotting_all_drained_cyclic_DSS, plotting_all_reconsolidation\n"
+            "assert dict(plt.rcParams) == rc and not plt.get_fignums()\n")
+    env  = dict(os.environ, PYTHONPATH = os.path.join(repo, "processing_plotting"))
+    subprocess.run([sys.executable, "-c", code], cwd = tmp_path, env = env, check = True)
+    assert os.listdir(tmp_path) == []
+
+def test_figure_command(undrained_dir, tmp_path):
+    subprocess.run([sys.executable, "-m", "processing_plotting", "figure", "fig4_6", "fig4_9", undrained_dir,
+                    "--out-dir", str(tmp_path)], cwd = repo, check = True)
+    assert sorted(os.listdir(tmp_path)) == ["Fig4-6.png", "Fig4-9.png"]
+''' EoF'''
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+- queue_PM4SandDrivers.py: a small batch run end to end with the stand-in as worker, one job
+  failing, one failing once, one hanging and one driver missing; the status ledger, the
+  timing sidecars and a second run that only takes the unfinished jobs
+"""
+import os
+import shutil
+import sys
+
+from   conftest               import (repo)
+from   sweep_PM4SandDrivers   import (generate_drivers)
+from   queue_PM4SandDrivers   import (run_queue, ledger_name, read_ledger)
+from   cost_PM4SandDrivers    import (read_timing)
+
+# Worker: the stand-in, except that Dr55 always fails, Dr75 fails its first attempt and
+# sig4 hangs (unless run with "plain"); every call is logged
+worker = """import os, sys, time
+sys.path.insert(0, {folder!r})
+from standin_PM4SandDrivers import run_driver
+driver, mode = sys.argv[1], sys.argv[2]
+with open("calls.log", "a") as log_file:
+    log_file.write(driver + "\\n")
+if mode != "plain":
+    if "Dr55" in driver:
+        sys.exit(3)
+    if "Dr75" in driver and not os.path.exists(driver + ".tried"):
+        open(driver + ".tried", "w").close()
+        sys.exit(1)
+    if "sig4" in driver:
+        time.sleep(60)
+run_driver(driver)
+"""
+
+def base_name(p):
+    return "uDSS_cyc_Dr" + str(int(p['Dr']*100)) + "_sig" + str(p['sig_vc']) + "_a0.0_Ko0.5"
+
+def fish_inputs(p):
+    return [('$Dr', p['Dr']), ('$static_bias', 0.0), ('$confinement', p['sig_vc']), ('$Ko', 0.5)]
+
+def calls(folder):
+    with open(os.path.join(folder, "calls.log"), "r") as log_file:
+        return sorted(line.strip() for line in log_file)
+
+#------------------------------------------------------------
+def test_queue_end_to_end(tmp_path):
+    source = os.path.join(repo, "PM4Sand_Cyclic_DSS_undrained_batch")
+    parts  = [shutil.copy(os.path.join(source, name), tmp_path) for name in ["templ_uDSScyc.fis", "DSS_cyclic_undrained.fis"]]
+    design = [{'Dr': Dr, 'sig_vc': 1} for Dr in [0.35, 0.55, 0.75]] + [{'Dr': 0.35, 'sig_vc': 4}]
+    generate_drivers(*parts, "batch_queue.fis", design, base_name, fish_inputs, sweep_dir = str(tmp_path))
+    batch_FileName = os.path.join(tmp_path, "batch_queue.fis")
+    with open(batch_FileName, "a") as batch_file:
+        batch_file.write("call uDSS_cyc_Dr95_sig1_a0.0_Ko0.5.fis\n")     # not generated
+    with open(os.path.join(tmp_path, "worker.py"), "w") as worker_file:
+        worker_file.write(worker.format(folder = os.path.join(repo, "batch_generation")))
+    command = '"' + sys.executable + '" worker.py {driver} '
+
+    ledger = run_queue(batch_FileName, command + "strict", workers = 2, timeout = 3, retries = 1)
+    assert ledger == read_ledger(ledger_name(batch_FileName))
+    state  = {name[:-4]: (entry['state'], entry['attempts']) for name, entry in ledger.items()}
+    assert state == {"uDSS_cyc_Dr35_sig1_a0.0_Ko0.5": ("done", 1),    "uDSS_cyc_Dr55_sig1_a0.0_Ko0.5": ("failed", 2),
+                     "uDSS_cyc_Dr75_sig1_a0.0_Ko0.5": ("done", 2),    "uDSS_cyc_Dr35_sig4_a0.0_Ko0.5": ("timeout", 2),
+                     "uDSS_cyc_Dr95_sig1_a0.0_Ko0.5": ("failed", 0)}
+    assert ledger["uDSS_cyc_Dr55_sig1_a0.0_Ko0.5.fis"]['message'] == "exit code 3"
+    assert "not readable" in ledger["uDSS_cyc_Dr95_sig1_a0.0_Ko0.5.fis"]['message']
+    assert read_timing(str(tmp_path), "uDSS_cyc_Dr35_sig1_a0.0_Ko0.5") > 0.0
+    assert read_timing(str(tmp_path), "uDSS_cyc_Dr55_sig1_a0.0_Ko0.5") is None
+
+    # Started again: finished drivers are not rerun and keep their entries
+    os.remove(os.path.join(tmp_path, "calls.log"))
+    ledger = run_queue(batch_FileName, command + "plain", workers = 2, timeout = 30)
+    assert calls(tmp_path) == ["uDSS_cyc_Dr35_sig4_a0.0_Ko0.5.fis", "uDSS_cyc_Dr55_sig1_a0.0_Ko0.5.fis"]
+    assert ledger["uDSS_cyc_Dr75_sig1_a0.0_Ko0.5.fis"]['attempts'] == 2
+    assert [entry['state'] for name, entry in sorted(ledger.items())] == ["done"] * 4 + ["failed"]
+''' EoF'''
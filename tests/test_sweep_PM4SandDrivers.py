@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+- sweep_PM4SandDrivers.py: batch files and shards of a generation, drivers rewritten only
+  when their content hash changes (manifest), batch files leaving out drivers with complete
+  outputs (resume), a dry run that writes nothing and thin drivers giving the outputs of
+  full ones once the stand-in expands them
+"""
+import os
+import shutil
+
+import pytest
+
+from   conftest               import (repo)
+from   sweep_PM4SandDrivers   import (generate_drivers, inputs_block)
+from   standin_PM4SandDrivers import (read_driver, run_driver)
+
+#------------------------------------------------------------
+def base_name(p):
+    return "uDSS_cyc_Dr" + str(int(p['Dr']*100)) + "_sig" + str(p['sig_vc'])
+
+def fish_inputs(p):
+    return [('$Dr', p['Dr']), ('$confinement', p['sig_vc'])]
+
+def batch_files(folder):
+    return sorted(name for name in os.listdir(folder) if name.startswith("batch_") and name.endswith(".fis"))
+
+def copy_parts(folder, group = "PM4Sand_Cyclic_DSS_undrained_batch", parts = ("templ_uDSScyc.fis", "DSS_cyclic_undrained.fis")):
+    return [shutil.copy(os.path.join(repo, group, name), folder) for name in parts]
+
+# Drivers of a folder set back one hour, so that any rewrite shows in their mtime
+def age_drivers(folder):
+    drivers = {}
+    for name in os.listdir(folder):
+        if name.startswith("uDSS_") and name.endswith(".fis"):
+            path = os.path.join(folder, name)
+            old  = os.path.getmtime(path) - 3600
+            os.utime(path, (old, old))
+            drivers[name] = (old, open(path).read())
+    return drivers
+
+def rewritten(folder, drivers):
+    return sorted(name for name, (old, text) in drivers.items() if os.path.getmtime(os.path.join(folder, name)) != old)
+
+def calls(batch_FileName):
+    with open(batch_FileName, "r") as batch_file:
+        return sorted(line.split()[1] for line in batch_file if line.startswith("call"))
+
+# $var_inputs lines as the generators always wrote them (names padded, blank before newline)
+def test_inputs_block_layout():
+    block = inputs_block([('$Dr', 0.35), ('$static_bias', 0.1)], "uDSS_cyc_Dr35")
+    assert block.splitlines(True)[1:] == ["def $var_inputs\n", "\t$Dr          = 0.35 \n", "\t$static_bias = 0.1 \n",
+                                          "\t$basefile    = 'uDSS_cyc_Dr35' \n", "end \n", "$var_inputs\n", "\n"]
+    block = inputs_block([('$Dr', 0.35), ('$strain_count', 1)], "dDSS_vol", width = 13)
+    assert "\t$strain_count = 1 \n" in block and "\t$basefile     = 'dDSS_vol' \n" in block
+    assert "\t$Dr           = 0.35 \n" in inputs_block([('$Dr', 0.35)], "uDSS_mono", width = 13)
+
+# Shards replace the batch file and the other way round, so every driver is called once
+def test_shards_replace_batch_file(tmp_path):
+    parts  = copy_parts(tmp_path)
+    sweep  = {'Dr': [0.35, 0.55, 0.75], 'sig_vc': [1, 4]}
+    cost   = lambda p: p['sig_vc']
+    lines  = generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path),
+                              shards = 2, driver_cost = cost)
+    assert batch_files(tmp_path) == ["batch_test_shard1.fis", "batch_test_shard2.fis"]
+    called = [line for name in batch_files(tmp_path) for line in open(os.path.join(tmp_path, name)) if line.startswith("call")]
+    assert sorted(called) == sorted(lines) and len(lines) == 6
+
+    generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path))
+    assert batch_files(tmp_path) == ["batch_test.fis"]
+
+# Regenerating an unchanged sweep rewrites no driver; changing the inputs of one driver
+# rewrites that one only
+def test_incremental_regeneration(tmp_path):
+    parts  = copy_parts(tmp_path)
+    sweep  = {'Dr': [0.35, 0.55, 0.75], 'sig_vc': [1, 4]}
+    generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path))
+    drivers = age_drivers(tmp_path)
+    assert len(drivers) == 6
+
+    generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path))
+    assert rewritten(tmp_path, drivers) == []
+
+    changed = lambda p: fish_inputs(p) + ([('$Ko', 0.6)] if p == {'Dr': 0.55, 'sig_vc': 4} else [])
+    generate_drivers(*parts, "batch_test.fis", sweep, base_name, changed, sweep_dir = str(tmp_path))
+    assert rewritten(tmp_path, drivers) == ["uDSS_cyc_Dr55_sig4.fis"]
+    assert "$Ko" in open(os.path.join(tmp_path, "uDSS_cyc_Dr55_sig4.fis")).read()
+    assert all(open(os.path.join(tmp_path, name)).read() == text for name, (old, text) in drivers.items()
+               if name != "uDSS_cyc_Dr55_sig4.fis")
+
+# With resume the batch file leaves out drivers whose outputs are complete and newer than
+# the driver; missing, truncated or stale outputs keep the driver in it
+def test_resume_skips_complete(tmp_path):
+    parts   = copy_parts(tmp_path)
+    sweep   = {'Dr': [0.35, 0.55, 0.75], 'sig_vc': [1, 4]}
+    outputs = {'_1.txt': 2, '_2.txt': 2, '_3.txt': 2, '_4.txt': 2, '_5.txt': 2, '_csrN.txt': 1}
+    generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path))
+    age_drivers(tmp_path)
+    rows = {"uDSS_cyc_Dr35_sig1": 3, "uDSS_cyc_Dr55_sig1": 3, "uDSS_cyc_Dr75_sig1": 1, "uDSS_cyc_Dr35_sig4": 3}
+    for BaseFile, n in rows.items():   # Dr75_sig1 truncated
+        for suffix in outputs:
+            with open(os.path.join(tmp_path, BaseFile + suffix), "w") as txt_file:
+                txt_file.write("time\tvalue\n" + "0.0\t1.0\n" * n)
+    stale = os.path.join(tmp_path, "uDSS_cyc_Dr35_sig4.fis")   # driver newer than its outputs
+    os.utime(stale, (os.path.getmtime(stale) + 7200,) * 2)
+
+    lines = generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path),
+                             outputs = outputs)
+    expected = ["uDSS_cyc_Dr35_sig4.fis", "uDSS_cyc_Dr55_sig4.fis", "uDSS_cyc_Dr75_sig1.fis", "uDSS_cyc_Dr75_sig4.fis"]
+    assert calls(os.path.join(tmp_path, "batch_test.fis")) == expected and len(lines) == 4
+
+    generate_drivers(*parts, "batch_test.fis", sweep, base_name, fish_inputs, sweep_dir = str(tmp_path),
+                     outputs = outputs, resume = False)
+    assert len(calls(os.path.join(tmp_path, "batch_test.fis"))) == 6
+
+# A dry run plans the drivers to run but writes nothing
+def test_dry_run_writes_nothing(tmp_path, capsys):
+    parts = copy_parts(tmp_path)
+    sweep = str(tmp_path / "sweep")
+    lines = generate_drivers(*parts, "batch_test.fis", {'Dr': [0.35, 0.55], 'sig_vc': [1]}, base_name, fish_inputs,
+                             sweep_dir = sweep, dry_run = True)
+    assert len(lines) == 2 and not os.path.exists(sweep)
+    assert "drivers to write   : 2" in capsys.readouterr().out
+
+# A thin driver, expanded by the stand-in (read_driver), runs the text of the full driver
+# (blank lines aside) and writes the same outputs
+@pytest.mark.parametrize("group, parts, sweep, name, inputs", [
+    ("PM4Sand_Cyclic_DSS_undrained_batch", ("templ_uDSScyc.fis", "DSS_cyclic_undrained.fis"),
+     {'Dr': [0.35, 0.75], 'sig_vc': [1, 4]}, base_name, fish_inputs),
+    ("PM4Sand_Cyclic_DSS_drained_batch", ("templ_drDSScyc.fis", "DSS_cyclic_drained.fis"),
+     {'Dr': [0.55], 'Ncyc': [3]}, lambda p: "dDSS_MRD_Dr" + str(int(p['Dr']*100)) + "_Ncyc" + str(p['Ncyc']) + "_max0.1%",
+     lambda p: [('$Dr', p['Dr']), ('$Ncycles', p['Ncyc']), ('$strain_count', 6)])])
+def test_thin_as_full(tmp_path, group, parts, sweep, name, inputs):
+    runs = {}
+    for thin in [False, True]:
+        folder = tmp_path / ("thin" if thin else "full")
+        folder.mkdir()
+        lines  = generate_drivers(*copy_parts(folder, group, parts), "batch_test.fis", sweep, name, inputs,
+                                  sweep_dir = str(folder), thin = thin)
+        texts  = {}
+        for line in lines:
+            FileName    = os.path.join(folder, line.split()[1])
+            texts[line] = [text for text in read_driver(FileName).splitlines() if text.strip()]
+            run_driver(FileName, rows_per_cycle = 20)
+        runs[thin] = (texts, {txt: open(os.path.join(folder, txt)).read()
+                              for txt in os.listdir(folder) if txt.endswith(".txt")})
+    assert runs[True][0] == runs[False][0]
+    assert runs[True][1] == runs[False][1] and len(runs[True][1]) >= 5 * len(lines)
+''' EoF'''
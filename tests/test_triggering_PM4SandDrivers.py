@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+- triggering_PM4SandDrivers.py: batched power-law fits against power_fit and against exact
+  power laws, and the CRR and K ratios of a sweep built on known triggering curves
+"""
+import numpy  as np
+import pandas as pd
+
+from   decode_PM4SandDrivers     import (power_fit)
+from   triggering_PM4SandDrivers import (power_fits, triggering_table)
+
+levels = ['Dr', 'sig_vc', 'alpha', 'Ko', 'point']
+
+#------------------------------------------------------------
+# Exact power laws are recovered; points with N <= 0 are left out; one distinct N gives NaN
+def test_power_fits_exact():
+    N     = np.array([3.0, 8.0, 20.0, 55.0])
+    csr   = 0.25 * N**-0.3
+    table = pd.DataFrame({'CSR': csr, 'N_to_98%_ru': N, 'N_to_1%_strain': [0.0, 0.0, 0.0, 9.5],
+                          'N_to_3%_strain': [-1.0, 8.0, 20.0, 55.0]},
+                         index = pd.MultiIndex.from_tuples([(35, 1.0, 0.0, 0.5, point) for point in range(4)], names = levels))
+    fits  = power_fits(table).xs((35, 1.0, 0.0, 0.5), level = levels[:-1])
+    np.testing.assert_allclose(fits.loc['N_to_98%_ru', ['b', 'amp', 'CSR_N', 'R2']], [0.3, 0.25, 0.25 * 15.0**-0.3, 1.0], rtol = 1e-12)
+    assert fits.loc['N_to_98%_ru', ['points', 'N_min', 'N_max']].tolist() == [4, 3.0, 55.0]
+    np.testing.assert_allclose(fits.loc['N_to_3%_strain', 'CSR_N'], 0.25 * 15.0**-0.3, rtol = 1e-12)
+    assert fits.loc['N_to_3%_strain', 'points'] == 3
+    assert fits.loc['N_to_1%_strain', 'points'] == 1 and fits.loc['N_to_1%_strain', ['b', 'CSR_N', 'R2']].isna().all()
+
+# Scattered points: the line of power_fit (scipy leastsq), driver by driver
+def test_power_fits_as_power_fit():
+    rng    = np.random.default_rng(3)
+    tables = []
+    for Dr in [35, 55, 75]:
+        N = np.sort(rng.uniform(1.0, 100.0, 6))
+        tables.append(pd.DataFrame({'CSR': 0.1 * Dr / 35.0 * N**-0.25 * rng.lognormal(0.0, 0.1, 6), 'N_to_98%_ru': N},
+                      index = pd.MultiIndex.from_tuples([(Dr, 1.0, 0.0, 0.5, point) for point in range(6)], names = levels)))
+    fits = power_fits(pd.concat(tables), ['N_to_98%_ru'])
+    for table, (key, fit) in zip(tables, fits.iterrows()):
+        index, amp, x, y = power_fit(table, 'N_to_98%_ru', 'CSR', 10)
+        np.testing.assert_allclose([fit['b'], fit['amp']], [-index, amp], rtol = 1e-6)
+        assert 0.0 < fit['R2'] < 1.0
+
+# A sweep on CRR = CRR1(Dr) K_sigma(sig_vc) K_alpha(alpha) K_o(Ko) gives back every factor;
+# short fits and states without a reference are NaN
+def test_triggering_table():
+    CRR1    = {35: 0.12, 55: 0.2}
+    K_sigma = {1.0: 1.0, 4.0: 0.8}
+    K_alpha = {0.0: 1.0, 0.1: 1.15}
+    K_o     = {0.5: 1.0, 1.0: 1.3}
+    b       = 0.34
+    cycles  = np.array([2.0, 6.0, 14.0, 40.0])
+    states  = [(Dr, sig, 0.0, 0.5) for Dr in CRR1 for sig in K_sigma] + [(35, 1.0, 0.1, 0.5), (35, 1.0, 0.0, 1.0),
+              (55, 4.0, 0.1, 0.5), (55, 1.0, 0.1, 1.0)]
+    tables  = []
+    for state in states:
+        Dr, sig, alpha, Ko = state
+        CRR = CRR1[Dr] * K_sigma[sig] * K_alpha[alpha] * K_o[Ko]
+        tables.append(pd.DataFrame({'CSR': CRR * (cycles / 15.0)**-b, 'N_to_98%_ru': cycles,
+                                    'N_to_1%_strain': cycles * 1.5, 'N_to_3%_strain': [2.0, 6.0, 0.0, 0.0]},
+                      index = pd.MultiIndex.from_tuples([state + (point,) for point in range(4)], names = levels)))
+    triggers = triggering_table(pd.concat(tables))
+    ru       = triggers.xs('N_to_98%_ru', level = 'criterion')
+    for Dr, sig, alpha, Ko in states:
+        row = ru.loc[(Dr, sig, alpha, Ko)]
+        np.testing.assert_allclose(row['CRR'], CRR1[Dr] * K_sigma[sig] * K_alpha[alpha] * K_o[Ko], rtol = 1e-12)
+        np.testing.assert_allclose(row['b'], b, rtol = 1e-12)
+    np.testing.assert_allclose(ru.loc[(55, 4.0, 0.0, 0.5), ['K_sigma', 'K_alpha', 'K_o']], [0.8, 1.0, 1.0], rtol = 1e-12)
+    np.testing.assert_allclose(ru.loc[(35, 1.0, 0.1, 0.5), ['K_sigma', 'K_alpha']], [1.0, 1.15], rtol = 1e-12)
+    np.testing.assert_allclose(ru.loc[(35, 1.0, 0.0, 1.0), 'K_o'], 1.3, rtol = 1e-12)
+    assert np.isnan(ru.loc[(55, 4.0, 0.1, 0.5), 'K_sigma'])       # no (55, 1.0, 0.1, 0.5) driver
+    assert np.isnan(ru.loc[(55, 1.0, 0.1, 1.0), ['K_alpha', 'K_o']]).all()
+    # the same curve reached 1.5 times later: the CRR is that of 10 cycles
+    strain = triggers.xs('N_to_1%_strain', level = 'criterion')
+    np.testing.assert_allclose(strain['CRR'], ru['CRR'] * 1.5**b, rtol = 1e-12)
+    assert triggers.xs('N_to_3%_strain', level = 'criterion')['CRR'].isna().all()   # 2 points < min_points
+''' EoF'''